@@ -0,0 +1,97 @@
+"""比较 detect_message_direction 与 detect_message_direction_enhanced 的纯 Python 与 numpy 实现。
+
+在 1x/1.5x/2x DPI 尺寸下生成左右两侧的合成消息截图（头像 + 气泡 + 文字噪点），
+先确认两种实现的结果一致，再分别计时。
+
+运行方式（无需 Windows）::
+
+    python benchmarks/bench_direction.py --count 200 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from wxauto4.utils import tools  # noqa: E402
+
+BACKGROUND = (237, 237, 237)
+SELF_BUBBLE = (149, 236, 105)
+FRIEND_BUBBLE = (255, 255, 255)
+
+
+def make_bubble(scale, side, rng):
+    """按 1x 时 720x64 的消息项尺寸生成一张合成截图"""
+    width, height = int(720 * scale), int(rng.randint(56, 120) * scale)
+    img = Image.new('RGB', (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    avatar = int(36 * scale)
+    margin = int(16 * scale)
+    bubble_w = int(rng.randint(60, 420) * scale)
+    top = int(8 * scale)
+    if side == 'left':
+        avatar_x = margin
+        bubble_x = avatar_x + avatar + int(10 * scale)
+        fill = FRIEND_BUBBLE
+    else:
+        avatar_x = width - margin - avatar
+        bubble_x = avatar_x - int(10 * scale) - bubble_w
+        fill = SELF_BUBBLE
+    draw.rectangle((avatar_x, top, avatar_x + avatar, top + avatar), fill=tuple(rng.randrange(256) for _ in range(3)))
+    draw.rectangle((bubble_x, top, bubble_x + bubble_w, height - top), fill=fill)
+    for _ in range(bubble_w // 4):
+        x = rng.randint(bubble_x + 4, bubble_x + bubble_w - 4)
+        y = rng.randint(top + 4, height - top - 4)
+        draw.point((x, y), fill=(rng.randrange(80), rng.randrange(80), rng.randrange(80)))
+    return img
+
+
+def measure(detect, images, vectorized, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for img in images:
+            detect(img, vectorized=vectorized)
+    return (time.perf_counter() - t0) / (repeat * len(images))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=200, help='每种 DPI 生成的截图数量')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if tools.np is None:
+        print('未安装 numpy，无法比较向量化实现')
+        return
+
+    rng = random.Random(args.seed)
+    samples = {
+        scale: [make_bubble(scale, rng.choice(('left', 'right')), rng) for _ in range(args.count)]
+        for scale in (1, 1.5, 2)
+    }
+    print(f'count={args.count} repeat={args.repeat}')
+    for detect in (tools.detect_message_direction, tools.detect_message_direction_enhanced):
+        print(f'\n{detect.__name__}')
+        print(f'{"scale":<8}{"size":>12}{"python":>14}{"numpy":>14}{"speedup":>10}')
+        for scale, images in samples.items():
+            for img in images:
+                expected = detect(img, vectorized=False)
+                actual = detect(img, vectorized=True)
+                assert expected == actual, (expected, actual)
+            python_time = measure(detect, images, False, args.repeat)
+            numpy_time = measure(detect, images, True, args.repeat)
+            size = '{}x{}'.format(*images[0].size)
+            print(
+                f'{scale:<8}{size:>12}{python_time * 1000:>11.3f} ms{numpy_time * 1000:>11.3f} ms'
+                f'{python_time / numpy_time:>9.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    main()
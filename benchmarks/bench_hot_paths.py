@@ -0,0 +1,64 @@
+"""在模拟后端上测量热点路径的耗时与跨进程调用次数。
+
+运行方式（无需 Windows）::
+
+    python benchmarks/bench_hot_paths.py --history 2000 --repeat 20 --latency 0.0002
+
+``--latency`` 为每次模拟 UIA 调用注入的延时（秒），用于近似真实桌面的跨进程开销。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wxauto4 import uia  # noqa: E402
+from wxauto4.uia.simulated import SimulatedBackend  # noqa: E402
+
+
+def measure(name, func, repeat, desktop):
+    desktop.stats.clear()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - t0) / repeat
+    calls = desktop.stats['calls'] / repeat
+    print(f'{name:<28} {elapsed * 1000:>10.2f} ms {calls:>12.1f} calls')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', type=int, default=1000, help='每个会话的历史消息数')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help='每次模拟 UIA 调用的延时（秒）')
+    args = parser.parse_args()
+
+    backend = SimulatedBackend.wechat(history=args.history)
+    uia.set_backend(backend)
+    from wxauto4 import WeChat
+
+    wx = WeChat()
+    app, desktop = backend.app, backend.desktop
+    desktop.call_latency = args.latency
+    chatbox = wx._api._chat_api
+    chat_name = app.current_chat.name
+
+    print(f'history={args.history} repeat={args.repeat} latency={args.latency}s')
+    measure('SessionBox.get_session', wx.GetSession, args.repeat, desktop)
+    measure('ChatBox._get_message_controls', chatbox._get_message_controls, args.repeat, desktop)
+    chatbox.get_new_msgs()
+    measure('ChatBox.get_new_msgs (idle)', chatbox.get_new_msgs, args.repeat, desktop)
+
+    def new_message():
+        app.receive_message(chat_name, '基准测试消息')
+        chatbox.get_new_msgs()
+    measure('ChatBox.get_new_msgs (1 new)', new_message, args.repeat, desktop)
+    measure('ChatBox.get_msgs', chatbox.get_msgs, max(1, args.repeat // 5), desktop)
+    names = list(app.chats)
+    measure('SessionBox.switch_chat', lambda: wx.ChatWith(names[-1]) and wx.ChatWith(names[1]), max(1, args.repeat // 5), desktop)
+
+
+if __name__ == '__main__':
+    main()
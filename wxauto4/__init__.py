@@ -3,28 +3,38 @@
 from __future__ import annotations
 
 from .wx import WeChat
+from .aio import AsyncChat, AsyncWeChat
 from .param import WxParam, WxResponse
 from .logger import wxlog
 from .moment import Moment
+from .outbox import Outbox
 from .exceptions import (
     NetWorkError,
     WxautoError,
+    WxautoLockTimeoutError,
     WxautoNoteLoadTimeoutError,
     WxautoUINotFoundError,
 )
-from .utils.lock import LockManager, uilock
+from .utils.lock import LockManager, LockPriority, uilock
+from .utils.trace import Tracer
 
 
 __all__ = [
     "WeChat",
+    "AsyncWeChat",
+    "AsyncChat",
     "WxParam",
     "WxResponse",
     "wxlog",
     "Moment",
+    "Outbox",
     "LockManager",
+    "LockPriority",
     "uilock",
+    "Tracer",
     "WxautoError",
     "NetWorkError",
     "WxautoUINotFoundError",
     "WxautoNoteLoadTimeoutError",
+    "WxautoLockTimeoutError",
 ]
@@ -0,0 +1,382 @@
+"""asyncio 接口。
+
+所有 UIA 操作都在同一个专用工作线程 :class:`UIAWorker` 中执行：
+
+- 工作线程负责初始化/释放 uia 后端（COM），控件对象始终在创建它的线程中使用；
+- 操作按优先级排队，同一优先级先到先得，监听扫描以 ``WxParam.LISTENER_LOCK_PRIORITY`` 插队；
+- 协程等待的是工作线程返回的 future，取消尚未开始执行的协程会把操作从队列中撤销。
+
+示例::
+
+    wx = await AsyncWeChat.create()
+    await wx.AddListenChat('文件传输助手')
+    async for msg, chat in wx.messages():
+        if msg.is_friend:
+            await chat.SendMsg('收到')
+"""
+
+from __future__ import annotations
+
+from wxauto4 import uia
+from wxauto4.wx import Chat, WeChat
+from wxauto4.param import WxParam, WxResponse
+from wxauto4.logger import wxlog
+from wxauto4.utils.lock import LockManager, LockPriority, uilock
+from wxauto4.utils.scheduler import ListenScheduler
+from concurrent.futures import Future
+import asyncio
+import functools
+import heapq
+import itertools
+import threading
+import traceback
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
+if TYPE_CHECKING:
+    from wxauto4.msgs.base import Message
+    from wxauto4.ui.sessionbox import SessionElement
+
+
+class UIAWorker:
+    """执行 UIA 操作的专用线程，按优先级消费操作队列"""
+
+    _default: Optional['UIAWorker'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, name: str = 'wxauto4-uia'):
+        self._queue: List[Tuple[int, int, Future, Callable, tuple, dict, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats: Dict[str, int] = {'submitted': 0, 'executed': 0, 'failed': 0, 'cancelled': 0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def default(cls) -> 'UIAWorker':
+        """进程内共享的工作线程，多个 :class:`AsyncWeChat` 共用以保证操作顺序"""
+        with cls._default_lock:
+            if cls._default is None or cls._default.closed:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def pending(self) -> int:
+        """队列中尚未执行且未取消的操作数量"""
+        with self._cond:
+            return sum(1 for item in self._queue if not item[2].cancelled())
+
+    def in_worker(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, func: Callable, *args, priority: int = None, **kwargs) -> Future:
+        """提交一个操作，返回 ``concurrent.futures.Future``
+
+        Args:
+            func: 在工作线程中执行的函数
+            priority (int, optional): 优先级，数值越大越先执行，默认 ``LockPriority.NORMAL``
+        """
+        priority = LockPriority.NORMAL if priority is None else priority
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('UIA 工作线程已关闭')
+            heapq.heappush(self._queue, (-priority, next(self._seq), future, func, args, kwargs, priority))
+            self.stats['submitted'] += 1
+            self._cond.notify()
+        return future
+
+    async def run(self, func: Callable, *args, priority: int = None, **kwargs) -> Any:
+        """在工作线程中执行 func 并等待结果，协程被取消时撤销尚未开始的操作"""
+        if self.in_worker():
+            return func(*args, **kwargs)
+        return await asyncio.wrap_future(self.submit(func, *args, priority=priority, **kwargs))
+
+    def _run(self) -> None:
+        backend = uia.get_backend()
+        try:
+            backend.InitializeThread()
+        except Exception:
+            wxlog.debug(f'UIA 工作线程初始化失败：{traceback.format_exc()}')
+        try:
+            while True:
+                with self._cond:
+                    while not self._queue and not self._closed:
+                        self._cond.wait()
+                    if not self._queue:
+                        break
+                    _, _, future, func, args, kwargs, priority = heapq.heappop(self._queue)
+                if not future.set_running_or_notify_cancel():
+                    self.stats['cancelled'] += 1
+                    continue
+                try:
+                    with LockManager.priority(priority):
+                        result = func(*args, **kwargs)
+                except BaseException as e:
+                    self.stats['failed'] += 1
+                    future.set_exception(e)
+                else:
+                    self.stats['executed'] += 1
+                    future.set_result(result)
+        finally:
+            try:
+                backend.UninitializeThread()
+            except Exception:
+                pass
+
+    def close(self, wait: bool = True) -> None:
+        """停止接收新操作，执行完队列中已有的操作后退出"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait and not self.in_worker():
+            self._thread.join()
+
+
+class AsyncChat:
+    """:class:`~wxauto4.wx.Chat` 的 asyncio 封装，所有操作都在 :class:`UIAWorker` 中执行"""
+
+    def __init__(self, chat: Chat, worker: UIAWorker):
+        self._chat = chat
+        self._worker = worker
+        self.who = str(chat)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} object("{self.who}")>'
+
+    async def run(self, func: Callable, *args, priority: int = None, **kwargs) -> Any:
+        """在 UIA 工作线程中执行任意同步函数，例如 ``await wx.run(msg.quote, '收到')``
+
+        Args:
+            func: 要执行的函数
+            priority (int, optional): 优先级，批量操作可以使用 ``LockPriority.LOW``
+        """
+        return await self._worker.run(func, *args, priority=priority, **kwargs)
+
+    async def SendMsg(
+            self,
+            msg: str,
+            who: str = None,
+            clear: bool = True,
+            at: Union[str, List[str]] = None,
+            exact: bool = False,
+        ) -> WxResponse:
+        """发送消息，参数同 :meth:`Chat.SendMsg`"""
+        return await self.run(self._chat.SendMsg, msg, who, clear, at, exact)
+
+    async def SendFiles(self, filepath, who=None, exact=False) -> WxResponse:
+        """发送文件，参数同 :meth:`Chat.SendFiles`"""
+        return await self.run(self._chat.SendFiles, filepath, who, exact)
+
+    async def GetAllMessage(self) -> List['Message']:
+        return await self.run(self._chat.GetAllMessage)
+
+    async def GetNewMessage(self) -> List['Message']:
+        return await self.run(self._chat.GetNewMessage)
+
+    async def GetMessageById(self, msg_id) -> Optional['Message']:
+        return await self.run(self._chat.GetMessageById, msg_id)
+
+    async def GetMessageByHash(self, msg_hash: str) -> Optional['Message']:
+        return await self.run(self._chat.GetMessageByHash, msg_hash)
+
+    async def GetLastMessage(self) -> Optional['Message']:
+        return await self.run(self._chat.GetLastMessage)
+
+    async def Close(self) -> None:
+        await self.run(_close_chat, self._chat)
+
+
+def _drop_msg_cursor(chat: Chat) -> None:
+    try:
+        chat._api._chat_api._drop_msg_cursor()
+    except:
+        pass
+
+
+@uilock
+def _open_listen_chat(wx: WeChat, nickname: str) -> Optional[Chat]:
+    subwin = wx._api.open_separate_window(nickname)
+    if subwin is None:
+        return None
+    chat = Chat(subwin)
+    try:
+        chat._api._chat_api._reset_msg_cursor()
+    except:
+        pass
+    return chat
+
+
+@uilock
+def _close_chat(chat: Chat) -> None:
+    chat.Close()
+
+
+class AsyncWeChat(AsyncChat):
+    """:class:`~wxauto4.wx.WeChat` 的 asyncio 封装
+
+    通过 :meth:`create` 创建，微信窗口对象在 UIA 工作线程中初始化。
+    监听不使用 ``WeChat`` 的监听线程，而是由 :meth:`messages` 在事件循环中按
+    :class:`~wxauto4.utils.scheduler.ListenScheduler` 的节奏向工作线程提交扫描。
+    """
+
+    def __init__(self, wx: WeChat, worker: UIAWorker):
+        super().__init__(wx, worker)
+        self._wx = wx
+        self.nickname = wx.nickname
+        self.listen: Dict[str, AsyncChat] = {}
+        self._scheduler = ListenScheduler()
+        self._listen_changed: Optional[asyncio.Event] = None
+        self._closed = False
+
+    @classmethod
+    async def create(
+            cls,
+            nickname: str = None,
+            worker: UIAWorker = None,
+            **kwargs
+        ) -> 'AsyncWeChat':
+        """在 UIA 工作线程中初始化微信主窗口
+
+        Args:
+            nickname (str, optional): 微信昵称，参数同 :class:`WeChat`
+            worker (UIAWorker, optional): 工作线程，默认使用进程内共享的 :meth:`UIAWorker.default`
+        """
+        worker = worker or UIAWorker.default()
+        wx = await worker.run(functools.partial(WeChat, nickname, **kwargs))
+        return cls(wx, worker)
+
+    async def __aenter__(self) -> 'AsyncWeChat':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _notify_listen_changed(self) -> None:
+        if self._listen_changed is not None:
+            self._listen_changed.set()
+
+    async def GetSession(self) -> List['SessionElement']:
+        return await self.run(self._wx.GetSession)
+
+    async def ChatWith(
+            self,
+            who: str,
+            exact: bool = True,
+            force: bool = False,
+            force_wait: Union[float, int] = 0.5
+        ):
+        """打开聊天窗口，参数同 :meth:`WeChat.ChatWith`"""
+        return await self.run(self._wx.ChatWith, who, exact, force, force_wait)
+
+    async def GetSubWindow(self, nickname: str) -> Optional[AsyncChat]:
+        if chat := await self.run(self._wx.GetSubWindow, nickname):
+            return AsyncChat(chat, self._worker)
+
+    async def GetAllSubWindow(self) -> List[AsyncChat]:
+        return [AsyncChat(chat, self._worker) for chat in await self.run(self._wx.GetAllSubWindow)]
+
+    async def AddListenChat(self, nickname: str) -> Union[AsyncChat, WxResponse]:
+        """添加监听聊天，将聊天窗口独立出去，新消息通过 :meth:`messages` 获取
+
+        Args:
+            nickname (str): 要监听的聊天对象
+
+        Returns:
+            AsyncChat: 监听的子窗口；找不到聊天窗口时返回失败的 WxResponse
+        """
+        if nickname in self.listen:
+            return self.listen[nickname]
+        chat = await self.run(_open_listen_chat, self._wx, nickname)
+        if chat is None:
+            return WxResponse.failure('找不到聊天窗口')
+        async_chat = AsyncChat(chat, self._worker)
+        self.listen[chat.who] = async_chat
+        self._scheduler.add(chat.who)
+        self._notify_listen_changed()
+        return async_chat
+
+    async def RemoveListenChat(self, nickname: str, close_window: bool = True) -> WxResponse:
+        """移除监听聊天
+
+        Args:
+            nickname (str): 要移除的监听聊天对象
+            close_window (bool, optional): 是否关闭聊天窗口. Defaults to True.
+        """
+        chat = self.listen.pop(nickname, None)
+        if chat is None:
+            return WxResponse.failure('未找到监听对象')
+        self._scheduler.remove(nickname)
+        await self.run(_drop_msg_cursor, chat._chat)
+        if close_window:
+            await self.run(_close_chat, chat._chat)
+        return WxResponse.success()
+
+    async def _poll(self, who: str) -> List['Message']:
+        chat = self.listen.get(who)
+        if chat is None:
+            return []
+        try:
+            msgs = await self.run(chat._chat.GetNewMessage, priority=WxParam.LISTENER_LOCK_PRIORITY)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            wxlog.debug(f'获取 {who} 的新消息失败: {e}')
+            msgs = []
+        self._scheduler.record(who, bool(msgs))
+        return msgs
+
+    async def messages(self) -> AsyncIterator[Tuple['Message', AsyncChat]]:
+        """逐条产出监听聊天中的新消息
+
+        每个监听对象按 ``ListenScheduler`` 的自适应间隔轮询，同一时间只应有一个消费者迭代。
+
+        Yields:
+            tuple: (Message, AsyncChat)，与同步监听回调的参数一致
+        """
+        if self._listen_changed is None:
+            self._listen_changed = asyncio.Event()
+        while not self._closed:
+            self._listen_changed.clear()
+            due = self._scheduler.due()
+            if not due:
+                wait = self._scheduler.time_to_next()
+                try:
+                    await asyncio.wait_for(
+                        self._listen_changed.wait(),
+                        WxParam.LISTEN_MAX_INTERVAL if wait is None else wait
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            for who in due:
+                for msg in await self._poll(who):
+                    chat = self.listen.get(who)
+                    if chat is not None:
+                        wxlog.debug(f"[{msg.attr}]获取到新消息：{who} - {msg.content}")
+                        yield msg, chat
+
+    async def close(self, remove: bool = True) -> None:
+        """停止 :meth:`messages`，并按需关闭监听的子窗口（不关闭共享的工作线程）"""
+        self._closed = True
+        self._scheduler.close()
+        self._notify_listen_changed()
+        if remove:
+            for who in list(self.listen):
+                await self.RemoveListenChat(who)
+
+
+__all__ = ['UIAWorker', 'AsyncChat', 'AsyncWeChat']
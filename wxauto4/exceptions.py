@@ -50,9 +50,16 @@ class WxautoNoteLoadTimeoutError(WxautoError):
     default_message = "微信笔记加载超时"
 
 
+class WxautoLockTimeoutError(WxautoError):
+    """等待 UI 锁超时异常。"""
+
+    default_message = "等待 UI 锁超时"
+
+
 __all__ = [
     "WxautoError",
     "NetWorkError",
     "WxautoUINotFoundError",
     "WxautoNoteLoadTimeoutError",
+    "WxautoLockTimeoutError",
 ]
@@ -20,6 +20,7 @@ from wxauto4.logger import wxlog
 from wxauto4.param import WxParam, WxResponse
 from wxauto4.ui.base import BaseUISubWnd
 from wxauto4.utils.tools import find_all_windows_from_root
+from wxauto4.utils.wait import wait_for
 
 
 def _lang(key: str) -> str:
@@ -465,9 +466,8 @@ class MomentActionMenu(BaseUISubWnd):
         self.control = self._locate(timeout)
 
     def _locate(self, timeout: float) -> Optional[uia.Control]:
-        t0 = time.time()
-        while time.time() - t0 <= timeout:
-            wins = find_all_windows_from_root(classname=self._win_cls_name, pid=self.root.pid)
+        def find() -> Optional[uia.Control]:
+            wins = find_all_windows_from_root(classname=self._win_cls_name, pid=self.root.pid, fresh=True)
             for win in wins:
                 try:
                     children = win.GetChildren()
@@ -477,8 +477,9 @@ class MomentActionMenu(BaseUISubWnd):
                     name = getattr(child, 'Name', '')
                     if name in {_lang('赞'), _lang('取消'), _lang('评论')}:
                         return win
-            time.sleep(0.05)
-        return None
+            return None
+
+        return wait_for(find, timeout, name='MomentActionMenu', window_event=True)
 
     def exists(self, wait: float = 0) -> bool:  # type: ignore[override]
         if not self.control:
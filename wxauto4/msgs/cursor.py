@@ -0,0 +1,91 @@
+"""新消息游标。
+
+每个聊天的消息列表对应一个 :class:`MessageCursor`，记录最近见过的消息 runtime id。
+获取新消息时从列表末尾向前扫描，遇到第一条见过的消息即停止，每次的工作量只与新消息数量成正比。
+"""
+
+from wxauto4.param import WxParam
+from wxauto4.logger import wxlog
+from collections import deque
+from typing import Any, Hashable, List, Optional, Sequence
+
+
+class MessageCursor:
+    """单个聊天的消息游标
+
+    - 环形缓冲区按时间顺序保存最近 ``capacity`` 条见过的 runtime id，配合集合做 O(1) 查询；
+    - ``high_water`` 为最新一条见过的消息 id，``total`` 为累计见过的消息数；
+    - 微信会虚拟化消息列表，从顶部移除旧消息，这只影响列表头部，不影响从末尾向前的扫描；
+    - 如果扫描完整个列表都没有遇到见过的消息，说明列表被整体重建（runtime id 全部变化），
+      此时重新同步游标而不是把整页历史当作新消息返回；
+    - 新建的游标没有记录任何状态（``seeded`` 为 False），第一次 :meth:`diff` 只记录当前列表并返回空列表。
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or WxParam.MESSAGE_CURSOR_CAPACITY
+        self._ring = deque()
+        self._seen = set()
+        self.high_water: Optional[Hashable] = None
+        self.total = 0
+        self.resyncs = 0
+        self.seeded = False
+
+    def __len__(self):
+        return len(self._ring)
+
+    def __contains__(self, msg_id: Hashable) -> bool:
+        return msg_id in self._seen
+
+    @property
+    def ids(self) -> tuple:
+        """按时间顺序排列的已见消息 id"""
+        return tuple(self._ring)
+
+    def _add(self, msg_id: Hashable) -> None:
+        if msg_id in self._seen:
+            return
+        if len(self._ring) >= self.capacity:
+            self._seen.discard(self._ring.popleft())
+        self._ring.append(msg_id)
+        self._seen.add(msg_id)
+        self.high_water = msg_id
+        self.total += 1
+
+    def reset(self, controls: Optional[Sequence[Any]] = None) -> None:
+        """清空游标，并把 controls 中的消息全部记为已见
+
+        Args:
+            controls: 当前消息列表中的消息控件，None 表示消息列表不可用，游标回到未初始化状态
+        """
+        self._ring.clear()
+        self._seen.clear()
+        self.high_water = None
+        self.seeded = controls is not None
+        for control in (controls or ())[-self.capacity:]:
+            self._add(control.runtimeid)
+
+    def diff(self, controls: Sequence[Any]) -> List[Any]:
+        """返回 controls 中的新消息（按时间顺序），并记为已见
+
+        Args:
+            controls: 当前消息列表中的消息控件，按时间顺序排列
+        """
+        if not self.seeded:
+            self.reset(controls)
+            return []
+        new_controls = []
+        for control in reversed(controls):
+            if control.runtimeid in self._seen:
+                break
+            new_controls.append(control)
+        else:
+            if self._seen and controls:
+                # 没有任何重叠：消息列表被重建，重新同步，避免把整页历史消息当作新消息
+                wxlog.debug(f'消息列表与游标没有重叠，重新同步（{len(controls)} 条）')
+                self.resyncs += 1
+                self.reset(controls)
+                return []
+        new_controls.reverse()
+        for control in new_controls:
+            self._add(control.runtimeid)
+        return new_controls
@@ -0,0 +1,76 @@
+"""消息气泡布局模型。
+
+同一个聊天窗口里，好友消息气泡的左边缘到消息列表左边缘的距离、自己消息气泡的右边缘到消息列表右边缘的距离
+基本固定（由头像宽度与边距决定）。:class:`BubbleLayoutModel` 从截图与位置检测结论一致的消息中学习这两条边缘带，
+学习完成后仅凭气泡的 ``BoundingRectangle`` 即可判断方向，落在模糊区域时才交给截图检测。
+"""
+
+from wxauto4.param import WxParam
+from typing import Dict, List, Optional, Tuple
+
+
+class BubbleLayoutModel:
+    """每个 ChatBox 一份的气泡边缘带模型，消息列表宽度变化（窗口缩放）时自动重置"""
+
+    def __init__(self):
+        self.reset()
+        self.stats: Dict[str, int] = {'classified': 0, 'ambiguous': 0, 'learned': 0, 'resets': 0}
+
+    def reset(self) -> None:
+        self.width: Optional[int] = None
+        # left: 好友气泡左边缘距消息列表左边缘的距离；right: 自己气泡右边缘距消息列表右边缘的距离
+        self.samples: Dict[str, List[int]] = {'left': [], 'right': []}
+
+    def _offsets(self, msgbox_rect, bubble_rect) -> Tuple[int, int]:
+        width = msgbox_rect.right - msgbox_rect.left
+        if self.width != width:
+            if self.width is not None:
+                self.stats['resets'] += 1
+            self.reset()
+            self.width = width
+        return bubble_rect.left - msgbox_rect.left, msgbox_rect.right - bubble_rect.right
+
+    def _band(self, side: str) -> Optional[Tuple[int, int]]:
+        samples = self.samples[side]
+        if len(samples) < WxParam.LAYOUT_MODEL_MIN_SAMPLES:
+            return None
+        tolerance = WxParam.LAYOUT_MODEL_TOLERANCE
+        return min(samples) - tolerance, max(samples) + tolerance
+
+    @property
+    def ready(self) -> bool:
+        """至少一侧的边缘带已经学习完成"""
+        return self._band('left') is not None or self._band('right') is not None
+
+    def classify(self, msgbox_rect, bubble_rect) -> Tuple[Optional[str], float]:
+        """根据气泡矩形判断方向
+
+        Returns:
+            tuple: (direction, distance)，气泡只落在一侧的边缘带内时 direction 为 'left' 或 'right'，
+                distance 为气泡到该侧边缘的距离；否则返回 (None, 0.0)，需要截图检测
+        """
+        if bubble_rect is None or bubble_rect.right - bubble_rect.left <= 0:
+            return None, 0.0
+        left_offset, right_offset = self._offsets(msgbox_rect, bubble_rect)
+        left_band, right_band = self._band('left'), self._band('right')
+        in_left = left_band is not None and left_band[0] <= left_offset <= left_band[1]
+        in_right = right_band is not None and right_band[0] <= right_offset <= right_band[1]
+        if in_left and not in_right:
+            self.stats['classified'] += 1
+            return 'left', float(left_offset)
+        if in_right and not in_left:
+            self.stats['classified'] += 1
+            return 'right', float(right_offset)
+        self.stats['ambiguous'] += 1
+        return None, 0.0
+
+    def learn(self, msgbox_rect, bubble_rect, direction: str) -> None:
+        """记录一条方向已确定的消息"""
+        if direction not in self.samples or bubble_rect is None:
+            return
+        left_offset, right_offset = self._offsets(msgbox_rect, bubble_rect)
+        samples = self.samples[direction]
+        samples.append(left_offset if direction == 'left' else right_offset)
+        # 只保留最近的样本，避免早期的异常值一直撑大边缘带
+        del samples[:-WxParam.LAYOUT_MODEL_MAX_SAMPLES]
+        self.stats['learned'] += 1
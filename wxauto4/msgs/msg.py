@@ -1,6 +1,9 @@
 from wxauto4.utils.tools import (
-    detect_message_direction
+    detect_message_direction,
+    detect_message_direction_enhanced
 )
+from wxauto4.param import WxParam
+from wxauto4.utils.trace import traced
 from wxauto4 import uia
 from wxauto4.ui_config import WxUI41Config
 from .mattr import (
@@ -9,22 +12,73 @@ from .mattr import (
     SelfMessage
 )
 from .mtype import *
+from .layout import BubbleLayoutModel
 from . import self as selfmsg
 from . import friend as friendmsg
 from typing import (
     TYPE_CHECKING,
+    Iterable,
     Literal,
+    List,
+    Optional,
     Dict,
     Any
 )
 import time
-import os
 import re
 
 if TYPE_CHECKING:
     from wxauto4.ui.chatbox import ChatBox
 
-def _detect_direction_by_message_index(control: uia.Control, parent: 'ChatBox') -> tuple:
+class ParseContext:
+    """一批消息共用的解析上下文
+
+    消息框矩形只获取一次，消息列表按 runtimeid 建立索引，气泡矩形与相对消息框中心的偏移按需计算并缓存，
+    批内每条消息判断方向时不再重新枚举消息列表。
+
+    Args:
+        parent: 消息所在的 ChatBox
+        controls: 完整的消息控件列表（用作相邻消息的上下文），为 None 时枚举一次消息列表
+    """
+
+    def __init__(self, parent: 'ChatBox', controls: Iterable[uia.Control] = None):
+        self.parent = parent
+        self.controls: List[uia.Control] = list(parent._iter_message_controls() if controls is None else controls)
+        self.msgbox_rect = parent.msgbox.BoundingRectangle
+        self._index: Dict[tuple, int] = {}
+        for idx, ctrl in enumerate(self.controls):
+            self._index.setdefault(ctrl.runtimeid, idx)
+        self._bubble_rects: Dict[int, Any] = {}
+        self._offsets: Dict[int, Optional[float]] = {}
+
+    def index(self, control: uia.Control) -> Optional[int]:
+        return self._index.get(control.runtimeid)
+
+    def bubble_rect(self, control: uia.Control):
+        """气泡矩形，见 :func:`_find_bubble_rect`，同一控件在批内只计算一次"""
+        idx = self.index(control)
+        if idx is None:
+            return _find_bubble_rect(control, self.msgbox_rect)
+        if idx not in self._bubble_rects:
+            self._bubble_rects[idx] = _find_bubble_rect(self.controls[idx], self.msgbox_rect)
+        return self._bubble_rects[idx]
+
+    def offset(self, idx: int) -> Optional[float]:
+        """第 idx 条消息的气泡中心相对消息框中心的偏移，找不到气泡时为 None"""
+        if idx not in self._offsets:
+            try:
+                rect = self.bubble_rect(self.controls[idx])
+            except:
+                rect = None
+            if rect is None:
+                self._offsets[idx] = None
+            else:
+                msgbox_rect = self.msgbox_rect
+                self._offsets[idx] = (rect.left + rect.right) / 2 - (msgbox_rect.left + msgbox_rect.right) / 2
+        return self._offsets[idx]
+
+
+def _detect_direction_by_message_index(control: uia.Control, parent: 'ChatBox', context: ParseContext = None) -> tuple:
     """通过消息控件在消息列表中的位置来判断方向（新方法）
     
     获取消息控件在消息列表中的所有控件中的索引，然后获取相邻消息的位置来判断方向
@@ -33,47 +87,28 @@ def _detect_direction_by_message_index(control: uia.Control, parent: 'ChatBox')
         tuple: (direction, confidence) - direction 为 'left' 或 'right', confidence 为置信度 (0-1)
     """
     try:
-        # 获取所有消息控件
-        all_controls = list(parent._iter_message_controls())
+        if context is None:
+            context = ParseContext(parent)
+        all_controls = context.controls
         if len(all_controls) < 2:
             return None, 0.0
         
         # 找到当前消息控件在列表中的索引
-        current_index = None
-        for idx, ctrl in enumerate(all_controls):
-            if ctrl.runtimeid == control.runtimeid:
-                current_index = idx
-                break
-        
+        current_index = context.index(control)
         if current_index is None:
             return None, 0.0
         
-        # 获取当前消息和相邻消息的位置
-        current_rect = control.BoundingRectangle
-        msgbox_rect = parent.msgbox.BoundingRectangle
+        msgbox_rect = context.msgbox_rect
         msgbox_width = msgbox_rect.right - msgbox_rect.left
         
         # 获取前后几条消息的位置，计算平均位置
         sample_count = min(3, len(all_controls))
-        positions = []
-        
-        # 获取当前消息前后的消息位置
         start_idx = max(0, current_index - sample_count // 2)
         end_idx = min(len(all_controls), current_index + sample_count // 2 + 1)
-        
-        for idx in range(start_idx, end_idx):
-            if idx == current_index:
-                continue
-            try:
-                ctrl_rect = all_controls[idx].BoundingRectangle
-                # 如果边界矩形和消息框不一样，说明是真正的消息气泡
-                if abs(ctrl_rect.width() - msgbox_width) >= 10:
-                    ctrl_center_x = (ctrl_rect.left + ctrl_rect.right) / 2
-                    msgbox_center_x = (msgbox_rect.left + msgbox_rect.right) / 2
-                    offset = ctrl_center_x - msgbox_center_x
-                    positions.append(offset)
-            except:
-                continue
+        positions = [
+            offset for idx in range(start_idx, end_idx)
+            if idx != current_index and (offset := context.offset(idx)) is not None
+        ]
         
         # 如果找到了其他消息的位置，使用它们来判断
         if positions:
@@ -89,7 +124,7 @@ def _detect_direction_by_message_index(control: uia.Control, parent: 'ChatBox')
     except:
         return None, 0.0
 
-def _detect_direction_by_window_position(control: uia.Control, parent: 'ChatBox') -> tuple:
+def _detect_direction_by_window_position(control: uia.Control, parent: 'ChatBox', context: ParseContext = None) -> tuple:
     """通过消息控件在窗口（消息框）中的位置来判断方向（主要方法）
     
     使用消息框的中心位置来判断消息在窗口的左侧还是右侧：
@@ -103,8 +138,7 @@ def _detect_direction_by_window_position(control: uia.Control, parent: 'ChatBox'
         tuple: (direction, confidence) - direction 为 'left' 或 'right', confidence 为置信度 (0-1)
     """
     try:
-        control_rect = control.BoundingRectangle
-        msgbox_rect = parent.msgbox.BoundingRectangle
+        msgbox_rect = context.msgbox_rect if context else parent.msgbox.BoundingRectangle
         
         # 计算消息框的宽度和中心点
         msgbox_width = msgbox_rect.right - msgbox_rect.left
@@ -112,45 +146,18 @@ def _detect_direction_by_window_position(control: uia.Control, parent: 'ChatBox'
             return None, 0.0
         
         # 关键优化：如果消息控件的边界矩形和消息框一样，说明获取的是容器而不是真正的消息气泡
-        # 需要从子控件中找到真正的消息气泡位置
-        if abs(control_rect.width() - msgbox_width) < 10:
-            # 边界矩形宽度几乎和消息框一样，说明是容器，需要查找子控件
-            try:
-                children = control.GetChildren()
-                # 查找真正的消息气泡控件
-                best_child_rect = None
-                best_child_width = 0
-                for child in children:
-                    child_classname = child.ClassName
-                    # ChatBubbleItemView 或 ChatTextItemView 是真正的消息气泡
-                    if child_classname in [WxUI41Config.MSG_BUBBLE_ITEM_CLS, WxUI41Config.MSG_TEXT_ITEM_CLS, WxUI41Config.MSG_REFER_ITEM_CLS]:
-                        try:
-                            child_rect = child.BoundingRectangle
-                            child_width = child_rect.width()
-                            # 选择宽度最大的子控件（通常是真正的消息气泡）
-                            # 但宽度要明显小于消息框宽度（至少小10%）
-                            if child_width > 0 and child_width < msgbox_width * 0.9 and child_width > best_child_width:
-                                best_child_rect = child_rect
-                                best_child_width = child_width
-                        except:
-                            continue
-                
-                if best_child_rect:
-                    # 找到了真正的消息气泡，使用它的位置
-                    control_rect = best_child_rect
-                else:
-                    # 如果没找到子控件，尝试通过消息索引位置判断（使用相邻消息的位置）
-                    index_result = _detect_direction_by_message_index(control, parent)
-                    if index_result[0]:
-                        return index_result
-                    # 如果索引方法也失败，返回None，让截图检测来处理
-                    return None, 0.0
-            except:
-                # 如果查找子控件失败，尝试通过消息索引位置判断
-                index_result = _detect_direction_by_message_index(control, parent)
-                if index_result[0]:
-                    return index_result
-                return None, 0.0
+        # 需要从子控件中找到真正的消息气泡位置（ChatBubbleItemView 或 ChatTextItemView）
+        try:
+            control_rect = context.bubble_rect(control) if context else _find_bubble_rect(control, msgbox_rect)
+        except:
+            control_rect = None
+        if control_rect is None:
+            # 如果没找到子控件，尝试通过消息索引位置判断（使用相邻消息的位置）
+            index_result = _detect_direction_by_message_index(control, parent, context)
+            if index_result[0]:
+                return index_result
+            # 如果索引方法也失败，返回None，让截图检测来处理
+            return None, 0.0
         
         # 如果边界矩形有效，直接使用位置判断
         
@@ -193,7 +200,7 @@ def _detect_direction_by_window_position(control: uia.Control, parent: 'ChatBox'
     except:
         return None, 0.0
 
-def _detect_direction_by_position(control: uia.Control, parent: 'ChatBox') -> tuple:
+def _detect_direction_by_position(control: uia.Control, parent: 'ChatBox', context: ParseContext = None) -> tuple:
     """通过消息控件在聊天窗口中的位置来判断方向（备用方法）
     
     使用多种方法综合判断：
@@ -205,35 +212,16 @@ def _detect_direction_by_position(control: uia.Control, parent: 'ChatBox') -> tu
         tuple: (direction, confidence) - direction 为 'left' 或 'right', confidence 为置信度 (0-1)
     """
     try:
-        control_rect = control.BoundingRectangle
-        msgbox_rect = parent.msgbox.BoundingRectangle
+        msgbox_rect = context.msgbox_rect if context else parent.msgbox.BoundingRectangle
         
         # 关键优化：如果消息控件的边界矩形和消息框一样，说明获取的是容器而不是真正的消息气泡
-        # 需要从子控件中找到真正的消息气泡（ChatBubbleItemView 或 ChatTextItemView）
-        msgbox_width = msgbox_rect.right - msgbox_rect.left
-        if msgbox_width > 0 and abs(control_rect.width() - msgbox_width) < 10:
-            # 边界矩形宽度几乎和消息框一样，说明是容器，需要查找子控件
-            try:
-                children = control.GetChildren()
-                # 查找真正的消息气泡控件
-                best_child_rect = None
-                best_child_width = 0
-                for child in children:
-                    child_classname = child.ClassName
-                    # ChatBubbleItemView 或 ChatTextItemView 是真正的消息气泡
-                    if child_classname in [WxUI41Config.MSG_BUBBLE_ITEM_CLS, WxUI41Config.MSG_TEXT_ITEM_CLS, WxUI41Config.MSG_REFER_ITEM_CLS]:
-                        child_rect = child.BoundingRectangle
-                        child_width = child_rect.width()
-                        # 选择宽度最大的子控件（通常是真正的消息气泡）
-                        # 但宽度要明显小于消息框宽度（至少小10%）
-                        if child_width > 0 and child_width < msgbox_width * 0.9 and child_width > best_child_width:
-                            best_child_rect = child_rect
-                            best_child_width = child_width
-                
-                if best_child_rect:
-                    control_rect = best_child_rect
-            except:
-                pass
+        # 需要从子控件中找到真正的消息气泡（ChatBubbleItemView 或 ChatTextItemView），找不到时仍使用容器
+        try:
+            control_rect = context.bubble_rect(control) if context else _find_bubble_rect(control, msgbox_rect)
+        except:
+            control_rect = None
+        if control_rect is None:
+            control_rect = control.BoundingRectangle
         
         # 检查边界矩形是否有效
         if control_rect.width() <= 0 or control_rect.height() <= 0:
@@ -313,9 +301,24 @@ def _detect_direction_by_position(control: uia.Control, parent: 'ChatBox') -> tu
     except Exception as e:
         return None, 0.0
 
+def _find_bubble_rect(control: uia.Control, msgbox_rect) -> 'uia.Rect':
+    """返回消息气泡的矩形：消息控件与消息框同宽时说明是容器，取其中最宽的气泡子控件"""
+    control_rect = control.BoundingRectangle
+    msgbox_width = msgbox_rect.right - msgbox_rect.left
+    if msgbox_width <= 0 or abs(control_rect.width() - msgbox_width) >= 10:
+        return control_rect
+    best_child_rect = None
+    for child in control.GetChildren():
+        if child.ClassName in [WxUI41Config.MSG_BUBBLE_ITEM_CLS, WxUI41Config.MSG_TEXT_ITEM_CLS, WxUI41Config.MSG_REFER_ITEM_CLS]:
+            child_rect = child.BoundingRectangle
+            if 0 < child_rect.width() < msgbox_width * 0.9 and (best_child_rect is None or child_rect.width() > best_child_rect.width()):
+                best_child_rect = child_rect
+    return best_child_rect
+
 def parse_msg_attr(
     control: uia.Control,
-    parent: 'ChatBox'
+    parent: 'ChatBox',
+    context: ParseContext = None
 ):
     # 注意：微信4.1的布局是：
     # - 如果消息在窗口左侧，是好友发送的（left -> friend）
@@ -325,16 +328,41 @@ def parse_msg_attr(
         'right': 'self'    # 右侧是自己发送的
     }
     if control.AutomationId:
+        # 方法0：布局模型学习完成后，只根据气泡矩形判断，不再截图
+        layout_model: BubbleLayoutModel = getattr(parent, 'layout_model', None)
+        msgbox_rect = bubble_rect = None
+        if layout_model is not None and WxParam.LAYOUT_MODEL_ENABLED:
+            try:
+                if context is not None:
+                    msgbox_rect, bubble_rect = context.msgbox_rect, context.bubble_rect(control)
+                else:
+                    msgbox_rect = parent.msgbox.BoundingRectangle
+                    bubble_rect = _find_bubble_rect(control, msgbox_rect)
+            except:
+                msgbox_rect = bubble_rect = None
+            if bubble_rect is not None:
+                msg_direction, msg_direction_distence = layout_model.classify(msgbox_rect, bubble_rect)
+                if msg_direction:
+                    return _build_msg(control, parent, msg_direction_hash[msg_direction], {
+                        'direction': msg_direction,
+                        'direction_distence': msg_direction_distence
+                    })
+
         # 方法1：通过窗口位置检测（主要方法，基于消息框中心）
-        window_direction, window_confidence = _detect_direction_by_window_position(control, parent)
+        window_direction, window_confidence = _detect_direction_by_window_position(control, parent, context)
         
         # 方法2：通过截图检测（使用基础版，返回的是距离，更可靠）
-        msg_screenshot = control.ScreenShot()
-        screenshot_direction, screenshot_distance = detect_message_direction(msg_screenshot)
-        os.remove(msg_screenshot)
+        # 截图直接在内存中检测，不写临时文件
+        msg_screenshot = control.ScreenShot(return_img=True)
+        if WxParam.MESSAGE_DIRECTION_DETECTOR == 'enhanced':
+            # 增强版返回的是头像区域得分而不是距离，头像紧贴所在一侧的边界，距离按 0 处理
+            screenshot_direction, _ = detect_message_direction_enhanced(msg_screenshot)
+            screenshot_distance = 0.0
+        else:
+            screenshot_direction, screenshot_distance = detect_message_direction(msg_screenshot)
         
         # 方法3：通过控件位置检测（备用方法，用于验证）
-        position_direction, position_confidence = _detect_direction_by_position(control, parent)
+        position_direction, position_confidence = _detect_direction_by_position(control, parent, context)
         
         # 综合判断：优先使用位置检测（最可靠），截图检测作为备用
         
@@ -408,10 +436,18 @@ def parse_msg_attr(
             'direction': msg_direction,
             'direction_distence': msg_direction_distence
         }
+
+        # 截图与任一位置检测结论一致时，作为布局模型的学习样本
+        if bubble_rect is not None and msg_direction == screenshot_direction and msg_direction in (window_direction, position_direction):
+            layout_model.learn(msgbox_rect, bubble_rect, msg_direction)
         
     else:
         msg_attr = 'system'
+        additonal_attr = {}
+
+    return _build_msg(control, parent, msg_attr, additonal_attr)
 
+def _build_msg(control: uia.Control, parent: 'ChatBox', msg_attr: str, additonal_attr: Dict[str, Any]):
     if msg_attr == 'system':
         return SystemMessage(control, parent)
     elif msg_attr == 'friend':
@@ -558,15 +594,26 @@ def _is_quote_message(name: str) -> bool:
     return bool(re.search(quote_pattern, name, re.DOTALL))
     
     
+@traced
 def parse_msg(
     control: uia.Control,
-    parent
+    parent,
+    context: ParseContext = None
 ):
-    # t0 = time.time()
-    result = parse_msg_attr(control, parent)
-    
-    # t1 = time.time()
-    # msgtype = str(result.__class__.__name__).ljust(20)
-    # ms = int((t1 - t0)*1000)
-    # print(f'parse_msg: {msgtype} {"□"*ms} {ms}ms')
-    return result
\ No newline at end of file
+    return parse_msg_attr(control, parent, context)
+
+def parse_msgs(
+    controls: Iterable[uia.Control],
+    parent: 'ChatBox',
+    all_controls: Iterable[uia.Control] = None
+) -> list:
+    """一次解析一批消息，批内共用消息框矩形、消息列表索引与气泡矩形
+
+    Args:
+        controls: 需要解析的消息控件
+        parent: 消息所在的 ChatBox
+        all_controls: 完整的消息控件列表，用于相邻消息的上下文；为 None 时使用 controls
+    """
+    controls = list(controls)
+    context = ParseContext(parent, controls if all_controls is None else all_controls)
+    return [parse_msg(control, parent, context) for control in controls]
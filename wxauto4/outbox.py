@@ -0,0 +1,464 @@
+"""发件箱：排队、合并与限速发送消息。
+
+逐条调用 ``WeChat.SendMsg(msg, who)`` 时每条消息都要单独定位（搜索并切换）聊天窗口。
+:class:`Outbox` 接收发送任务后在后台线程中按聊天对象分组，每批只定位一次聊天窗口，
+在同一次 UI 锁持有期间把该聊天所有到期的任务依次发出：
+
+- 全局与每个聊天各有一个令牌桶（``OUTBOX_RATE``/``OUTBOX_BURST``、``OUTBOX_CHAT_RATE``/``OUTBOX_CHAT_BURST``）；
+- 发送失败按指数退避重试，最多尝试 ``OUTBOX_MAX_ATTEMPTS`` 次；
+- 任务写入 ``OUTBOX_PATH`` 指定的 SQLite 文件（默认为用户目录下的 ``.wxauto4/outbox.db``），进程崩溃后重新创建 Outbox 会继续发送未完成的任务
+  （发送成功与写回状态之间崩溃的任务会再发一次）；
+- :meth:`Outbox.stats` 返回队列深度、吞吐量与任务延迟（入队到发送完成）。
+
+示例::
+
+    outbox = Outbox(wx)
+    job_id = outbox.put('文件传输助手', '你好')
+    outbox.wait(job_id)
+"""
+
+from __future__ import annotations
+
+from wxauto4.param import WxParam, WxResponse, PROJECT_NAME
+from wxauto4.logger import wxlog
+from wxauto4.utils.lock import LockManager, _percentile
+from wxauto4.wx import WeChat
+from collections import deque
+from dataclasses import dataclass, field
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积累 burst 个"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float = None) -> bool:
+        self._refill(time.monotonic() if now is None else now)
+        return self.tokens >= 1
+
+    def consume(self, now: float = None) -> bool:
+        """取走一个令牌，令牌不足时返回 False"""
+        if not self.available(now):
+            return False
+        self.tokens -= 1
+        return True
+
+    def wait_time(self, now: float = None) -> float:
+        """距离下一个令牌可用还有多久"""
+        if self.available(now) or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass
+class OutboxJob:
+    """一条发送任务，kind 为 'text' 或 'file'"""
+
+    id: int
+    who: str
+    kind: str
+    payload: Dict[str, Any]
+    exact: bool = False
+    created: float = field(default_factory=time.time)
+    attempts: int = 0
+    next_attempt: float = 0.0
+    status: str = 'pending'
+    error: Optional[str] = None
+    finished: Optional[float] = None
+
+    @property
+    def latency(self) -> Optional[float]:
+        """入队到发送完成（或最终失败）的时间"""
+        if self.finished is None:
+            return None
+        return self.finished - self.created
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'who': self.who,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+            'latency': self.latency,
+        }
+
+
+class OutboxStore:
+    """发送任务的 SQLite 持久化"""
+
+    _COLUMNS = 'id, who, kind, payload, exact, created, attempts, next_attempt, status, error, finished'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS outbox_jobs ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, who TEXT NOT NULL, kind TEXT NOT NULL, '
+                'payload TEXT NOT NULL, exact INTEGER NOT NULL, created REAL NOT NULL, '
+                'attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL DEFAULT 0, '
+                "status TEXT NOT NULL DEFAULT 'pending', error TEXT, finished REAL)"
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS outbox_jobs_status ON outbox_jobs (status)')
+
+    @staticmethod
+    def _job(row: tuple) -> OutboxJob:
+        job_id, who, kind, payload, exact, created, attempts, next_attempt, status, error, finished = row
+        return OutboxJob(
+            job_id, who, kind, json.loads(payload), bool(exact), created,
+            attempts, next_attempt, status, error, finished
+        )
+
+    def add(self, who: str, kind: str, payload: Dict[str, Any], exact: bool = False) -> OutboxJob:
+        created = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO outbox_jobs (who, kind, payload, exact, created) VALUES (?, ?, ?, ?, ?)',
+                (who, kind, json.dumps(payload, ensure_ascii=False), int(exact), created)
+            )
+        return OutboxJob(cursor.lastrowid, who, kind, payload, exact, created)
+
+    def update(self, job: OutboxJob) -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE outbox_jobs SET attempts=?, next_attempt=?, status=?, error=?, finished=? WHERE id=?',
+                (job.attempts, job.next_attempt, job.status, job.error, job.finished, job.id)
+            )
+
+    def get(self, job_id: int) -> Optional[OutboxJob]:
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {self._COLUMNS} FROM outbox_jobs WHERE id=?', (job_id,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def pending(self) -> List[OutboxJob]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM outbox_jobs WHERE status='pending' ORDER BY id"
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def purge(self, before: float) -> int:
+        """删除 before（时间戳）之前已完成的任务，返回删除数量"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox_jobs WHERE status!='pending' AND finished<?", (before,)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class Outbox:
+    """按聊天合并、限速并持久化的发件箱
+
+    Args:
+        wx (WeChat): 用于发送的微信主窗口；任务按 who 在主窗口中搜索并切换聊天，
+            因此不接受只能发给固定对象的子窗口（Chat）
+        path (str, optional): SQLite 文件路径，默认 ``WxParam.OUTBOX_PATH``，未设置时为用户目录下的 ``.wxauto4/outbox.db``
+        start (bool): 是否立即启动后台发送线程
+    """
+
+    # 计算吞吐量的时间窗口，单位秒
+    THROUGHPUT_WINDOW = 60.0
+
+    def __init__(self, wx: WeChat, path: str = None, start: bool = True):
+        if not isinstance(wx, WeChat):
+            raise TypeError(f'Outbox 只接受 WeChat 主窗口，不接受 {type(wx).__name__}')
+        self.wx = wx
+        self.store = OutboxStore(path or self.default_path())
+        self._jobs: Dict[int, OutboxJob] = {job.id: job for job in self.store.pending()}
+        if self._jobs:
+            wxlog.debug(f'发件箱恢复了 {len(self._jobs)} 条未完成的任务')
+        self._bucket = TokenBucket(WxParam.OUTBOX_RATE, WxParam.OUTBOX_BURST)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._latencies = deque(maxlen=1000)
+        self._sent_times = deque()
+        self.counters: Dict[str, int] = {'sent': 0, 'failed': 0, 'retries': 0, 'batches': 0}
+        if start:
+            self.start()
+
+    @staticmethod
+    def default_path() -> str:
+        """默认的 SQLite 文件路径：WxParam.OUTBOX_PATH，未设置时为用户目录下的 .wxauto4/outbox.db"""
+        if WxParam.OUTBOX_PATH:
+            return WxParam.OUTBOX_PATH
+        folder = os.path.join(os.path.expanduser('~'), f'.{PROJECT_NAME}')
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, 'outbox.db')
+
+    # region --- 入队 -----------------------------------------------------------
+    def _put(self, who: str, kind: str, payload: Dict[str, Any], exact: bool) -> int:
+        job = self.store.add(who, kind, payload, exact)
+        with self._cond:
+            self._jobs[job.id] = job
+            self._cond.notify_all()
+        return job.id
+
+    def put(
+            self,
+            who: str,
+            msg: str,
+            at: Union[str, List[str]] = None,
+            clear: bool = True,
+            exact: bool = False
+        ) -> int:
+        """加入一条文本消息，返回任务 id
+
+        Args:
+            who (str): 发送对象
+            msg (str): 消息内容
+            at (Union[str, List[str]], optional): @对象
+            clear (bool, optional): 发送前是否清空编辑框
+            exact (bool, optional): 搜索 who 时是否精确匹配
+        """
+        return self._put(who, 'text', {'msg': msg, 'at': at, 'clear': clear}, exact)
+
+    def put_files(self, who: str, filepath: Union[str, List[str]], exact: bool = False) -> int:
+        """加入一个发送文件任务，返回任务 id"""
+        return self._put(who, 'file', {'filepath': filepath}, exact)
+
+    # endregion ----------------------------------------------------------------
+
+    # region --- 查询 -----------------------------------------------------------
+    def status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """任务状态：pending、sent 或 failed，以及尝试次数、错误信息与延迟"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+        job = self.store.get(job_id)
+        return job.to_dict() if job else None
+
+    def wait(self, job_id: int, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """等待任务完成（发送成功或最终失败），返回任务状态；超时返回 None"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: job_id not in self._jobs or self._stopped, timeout):
+                return None
+        return self.status(job_id)
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待队列清空，返回是否在超时前清空"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._jobs or self._stopped, timeout) and not self._jobs
+
+    @property
+    def pending(self) -> int:
+        """队列深度"""
+        with self._cond:
+            return len(self._jobs)
+
+    def stats(self) -> Dict[str, Any]:
+        """队列深度、累计发送/失败/重试次数、批次数、最近一分钟吞吐量（条/秒）与任务延迟分位数（秒）"""
+        now = time.monotonic()
+        with self._cond:
+            self._trim_sent_times(now)
+            latencies = sorted(self._latencies)
+            return {
+                'pending': len(self._jobs),
+                'chats': len({job.who for job in self._jobs.values()}),
+                **self.counters,
+                'throughput': len(self._sent_times) / self.THROUGHPUT_WINDOW,
+                'latency_p50': _percentile(latencies, 50),
+                'latency_p99': _percentile(latencies, 99),
+                'latency_max': latencies[-1] if latencies else None,
+            }
+
+    def purge(self, max_age: float = 86400) -> int:
+        """删除完成超过 max_age 秒的任务记录"""
+        return self.store.purge(time.time() - max_age)
+
+    def _trim_sent_times(self, now: float) -> None:
+        while self._sent_times and now - self._sent_times[0] > self.THROUGHPUT_WINDOW:
+            self._sent_times.popleft()
+
+    # endregion ----------------------------------------------------------------
+
+    # region --- 调度 -----------------------------------------------------------
+    def _chat_bucket(self, who: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(who)
+        if bucket is None:
+            bucket = self._chat_buckets[who] = TokenBucket(WxParam.OUTBOX_CHAT_RATE, WxParam.OUTBOX_CHAT_BURST)
+        return bucket
+
+    def _next_batch(self) -> Tuple[Optional[List[OutboxJob]], Optional[float]]:
+        """选出下一批（同一聊天、到期且有令牌）的任务
+
+        同一聊天内按入队顺序发送：某条任务在等待重试时，同一聊天后面的任务也不会发出。
+
+        Returns:
+            tuple: (任务列表, None) 或 (None, 需要等待的秒数)，等待秒数为 None 表示队列为空
+        """
+        now, wall = time.monotonic(), time.time()
+        groups: Dict[Tuple[str, bool], List[OutboxJob]] = {}
+        blocked = set()
+        wait = None
+        for job in sorted(self._jobs.values(), key=lambda job: job.id):
+            if job.who in blocked:
+                continue
+            if job.next_attempt > wall:
+                blocked.add(job.who)
+                delay = job.next_attempt - wall
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            groups.setdefault((job.who, job.exact), []).append(job)
+        if not groups:
+            return None, wait
+        global_wait = self._bucket.wait_time(now)
+        if global_wait > 0:
+            return None, global_wait if wait is None else min(wait, global_wait)
+        for (who, _), jobs in groups.items():
+            chat_wait = self._chat_bucket(who).wait_time(now)
+            if chat_wait <= 0:
+                return jobs, None
+            wait = chat_wait if wait is None else min(wait, chat_wait)
+        return None, wait
+
+    def _acquire_tokens(self, who: str) -> bool:
+        now = time.monotonic()
+        chat_bucket = self._chat_bucket(who)
+        if not (self._bucket.available(now) and chat_bucket.available(now)):
+            return False
+        self._bucket.consume(now)
+        chat_bucket.consume(now)
+        return True
+
+    def _finish(self, job: OutboxJob, error: str = None) -> None:
+        """记录一次发送结果，失败时安排重试或标记为最终失败"""
+        job.attempts += 1
+        job.error = error
+        wall = time.time()
+        if error is None or job.attempts >= WxParam.OUTBOX_MAX_ATTEMPTS:
+            job.status = 'sent' if error is None else 'failed'
+            job.finished = wall
+        else:
+            delay = min(WxParam.OUTBOX_RETRY_DELAY * 2 ** (job.attempts - 1), WxParam.OUTBOX_RETRY_MAX_DELAY)
+            job.next_attempt = wall + delay
+        self.store.update(job)
+        with self._cond:
+            if job.status == 'pending':
+                self.counters['retries'] += 1
+                wxlog.debug(f'发件箱任务 {job.id}（{job.who}）发送失败，{job.next_attempt - wall:.1f} 秒后重试：{error}')
+                return
+            self._jobs.pop(job.id, None)
+            self._latencies.append(job.latency)
+            if job.status == 'sent':
+                self.counters['sent'] += 1
+                self._sent_times.append(time.monotonic())
+            else:
+                self.counters['failed'] += 1
+                wxlog.debug(f'发件箱任务 {job.id}（{job.who}）发送失败：{error}')
+            self._cond.notify_all()
+
+    def _send(self, chatbox, job: OutboxJob) -> Optional[str]:
+        """发送一条任务，返回错误信息，成功返回 None"""
+        try:
+            if job.kind == 'text':
+                result = chatbox.send_msg(job.payload['msg'], job.payload.get('clear', True), job.payload.get('at'))
+            else:
+                result = chatbox.send_file(job.payload['filepath'])
+        except Exception as e:
+            return f'{type(e).__name__}: {e}'
+        if isinstance(result, WxResponse) and not result:
+            return result['message'] or '发送失败'
+        return None
+
+    def _send_batch(self, jobs: List[OutboxJob]) -> None:
+        """定位一次聊天窗口，在同一次 UI 锁持有期间发送该聊天的任务，令牌用完时剩余任务留到下一批"""
+        who, exact = jobs[0].who, jobs[0].exact
+        with LockManager.priority(WxParam.OUTBOX_LOCK_PRIORITY), \
+                LockManager.acquire(site='wxauto4.outbox.Outbox._send_batch'):
+            with self._cond:
+                self.counters['batches'] += 1
+            try:
+                chatbox = self.wx._api._get_chatbox(who, exact)
+            except Exception as e:
+                chatbox, error = None, f'{type(e).__name__}: {e}'
+            else:
+                error = f'未找到聊天窗口：{who}'
+            if chatbox is None:
+                # 找不到聊天窗口时整批任务都记一次失败，按各自的尝试次数重试或标记为最终失败
+                for job in jobs:
+                    self._finish(job, error)
+                return
+            for job in jobs:
+                if not self._acquire_tokens(who):
+                    break
+                self._finish(job, self._send(chatbox, job))
+                if job.status == 'pending':
+                    # 等待重试，保持同一聊天内的发送顺序
+                    break
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    break
+                jobs, wait = self._next_batch()
+                if jobs is None:
+                    self._cond.wait(wait)
+                    continue
+            try:
+                self._send_batch(jobs)
+            except Exception as e:
+                wxlog.debug(f'发件箱发送失败：{e}')
+                time.sleep(WxParam.OUTBOX_RETRY_DELAY)
+
+    def start(self) -> None:
+        """启动后台发送线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='wxauto4-outbox', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """停止后台发送线程，未完成的任务保留在 SQLite 文件中"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def close(self) -> None:
+        self.stop()
+        self.store.close()
+
+    # endregion ----------------------------------------------------------------
+
+
+__all__ = ['Outbox', 'OutboxJob', 'OutboxStore', 'TokenBucket']
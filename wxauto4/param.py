@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional
 import os
 
 PROJECT_NAME = 'wxauto4'
@@ -16,6 +16,17 @@ class WxParam:
     # 是否启用消息哈希值用于辅助判断消息，开启后会稍微影响性能
     MESSAGE_HASH: bool = False
 
+    # 消息截图方向检测方法：'basic' 扫描气泡边缘列；'enhanced' 比较左右头像区域的方差与颜色多样性
+    MESSAGE_DIRECTION_DETECTOR: Literal['basic', 'enhanced'] = 'basic'
+
+    # 是否启用气泡布局模型：学习到左右气泡边缘带后仅凭气泡位置判断方向，只有模糊时才截图
+    LAYOUT_MODEL_ENABLED: bool = True
+
+    # 布局模型每侧至少需要的样本数、最多保留的样本数，以及边缘带两侧的容差（像素）
+    LAYOUT_MODEL_MIN_SAMPLES: int = 3
+    LAYOUT_MODEL_MAX_SAMPLES: int = 20
+    LAYOUT_MODEL_TOLERANCE: int = 4
+
     # 头像到消息X偏移量，用于消息定位，点击消息等操作
     DEFAULT_MESSAGE_XBIAS = 51
     DEFAULT_MESSAGE_YBIAS = 30
@@ -26,12 +37,96 @@ class WxParam:
     # 监听消息时间间隔，单位秒（优化为0.3秒以提高实时性）
     LISTEN_INTERVAL: float = 0.3
 
+    # 轮询中的聊天连续没有新消息时，轮询间隔按该倍数增长（设为 1 关闭退避），最长为 LISTEN_MAX_INTERVAL 秒
+    LISTEN_BACKOFF_FACTOR: float = 1.5
+    LISTEN_MAX_INTERVAL: float = 3.0
+
+    # 收到消息后保持快速轮询的时间，单位秒
+    LISTEN_HOT_PERIOD: float = 10.0
+
+    # 监听模式：'event' 订阅消息列表的结构变化事件，只扫描发生变化的聊天；'poll' 按每个聊天的自适应间隔轮询；
+    # 'session' 每隔 LISTEN_INTERVAL 读取一次主窗口会话列表，只扫描名称、未读数或消息预览发生变化的聊天
+    # 事件模式下无法订阅事件的聊天、会话模式下不在会话列表中的聊天会自动退回轮询
+    # 默认轮询；事件模式依赖微信消息列表发出结构变化事件，确认当前版本会发出事件后再开启
+    LISTEN_MODE: Literal['event', 'poll', 'session'] = 'poll'
+
+    # 事件模式与会话模式下的兜底全量扫描间隔，单位秒，防止漏掉变化
+    LISTEN_FALLBACK_INTERVAL: float = 5.0
+
+    # 事件模式下收到事件后合并后续事件的等待时间，单位秒
+    LISTEN_EVENT_DEBOUNCE: float = 0.05
+
+    # 每个聊天的新消息游标最多记住的消息 runtime id 数量
+    MESSAGE_CURSOR_CAPACITY: int = 500
+
+    # 批量解析消息时共用同一帧窗口截图的最长时间，单位秒
+    FRAME_CACHE_MAX_AGE: float = 1.0
+
+    # 监听线程扫描消息、监听回调（回复）获取 UI 锁的优先级，数值越大越优先，普通调用为 LockPriority.NORMAL(10)
+    LISTENER_LOCK_PRIORITY: int = 20
+
+    # 跨进程 UI 锁后端：'multiprocessing' 只在同一父进程派生的进程之间互斥；
+    # 'file' 使用 UI_LOCK_DIR 下名为 UI_LOCK_NAME 的锁文件，同一台机器上互不相关的进程也能互斥
+    UI_LOCK_BACKEND: Literal['multiprocessing', 'file'] = 'multiprocessing'
+    UI_LOCK_NAME: str = 'wxauto4-ui'
+    # 锁文件目录，None 表示系统临时目录
+    UI_LOCK_DIR: Optional[str] = None
+
+    # 等待 UI 锁的最长时间，单位秒，None 表示一直等待；超时抛出 WxautoLockTimeoutError
+    UI_LOCK_TIMEOUT: Optional[float] = None
+
+    # UI 锁每个调用点保留最近多少次的等待/持有时间用于计算分位数
+    LOCK_STATS_WINDOW: int = 1000
+
+    # 操作追踪（wxauto4.utils.trace.Tracer）保留最近多少个 span 用于导出，以及每个操作保留最近多少次耗时用于汇总分位数
+    TRACE_BUFFER: int = 10000
+    TRACE_SUMMARY_WINDOW: int = 1000
+
     # 监听执行器线程池大小
     LISTENER_EXCUTOR_WORKERS: int = 4
 
+    # 发件箱（Outbox）持久化文件路径，':memory:' 表示不落盘；
+    # None 表示用户目录下的 .wxauto4/outbox.db，在创建 Outbox 时确定，不随工作目录变化
+    OUTBOX_PATH: Optional[str] = None
+
+    # 发件箱令牌桶限速：全局/每个聊天每秒最多发送的条数与允许的突发条数
+    OUTBOX_RATE: float = 1.0
+    OUTBOX_BURST: int = 5
+    OUTBOX_CHAT_RATE: float = 0.5
+    OUTBOX_CHAT_BURST: int = 3
+
+    # 发件箱发送失败的最多尝试次数，以及重试的初始退避时间（秒，每次翻倍，最长 OUTBOX_RETRY_MAX_DELAY）
+    OUTBOX_MAX_ATTEMPTS: int = 3
+    OUTBOX_RETRY_DELAY: float = 2.0
+    OUTBOX_RETRY_MAX_DELAY: float = 60.0
+
+    # 发件箱获取 UI 锁的优先级，默认低于普通调用与监听回复
+    OUTBOX_LOCK_PRIORITY: int = 0
+
+    # 等待窗口、菜单出现时的轮询间隔：从 WAIT_MIN_INTERVAL 秒开始按 WAIT_BACKOFF 倍增长，最长 WAIT_MAX_INTERVAL 秒
+    WAIT_MIN_INTERVAL: float = 0.005
+    WAIT_MAX_INTERVAL: float = 0.1
+    WAIT_BACKOFF: float = 2.0
+
+    # 等待窗口出现时是否订阅窗口显示事件（Windows 下为 WinEvent 钩子），窗口一出现就立即检查
+    WAIT_WINDOW_EVENTS: bool = True
+
+    # 按相同条件枚举顶层窗口的结果缓存时间，单位秒，设为 0 关闭缓存
+    WINDOW_SNAPSHOT_TTL: float = 0.05
+
+    # 未识别为聊天窗口的同类名窗口句柄多久后重新检查，单位秒（新打开的窗口控件可能尚未加载完成）
+    SUBWINDOW_IGNORE_TTL: float = 1.0
+
     # 搜索聊天对象超时时间，单位秒
     SEARCH_CHAT_TIMEOUT: int = 2
 
+    # 等待搜索框文本、聊天标题、独立窗口等界面状态更新的最长时间，单位秒
+    UI_STATE_TIMEOUT: float = 1.0
+
+    # 搜索关键词解析出的聊天名称缓存：最多缓存的关键词数量与有效期（秒），容量设为 0 关闭缓存
+    CHAT_NAME_CACHE_SIZE: int = 256
+    CHAT_NAME_CACHE_TTL: float = 600.0
+
     # 微信笔记加载超时时间，单位秒
     NOTE_LOAD_TIMEOUT: int = 30
 
@@ -3,8 +3,6 @@ from wxauto4.param import PROJECT_NAME
 from wxauto4.logger import wxlog
 from wxauto4.utils.lock import uilock
 from abc import ABC, abstractmethod
-import win32gui
-import ctypes
 from typing import Union
 import time
 
@@ -28,20 +26,18 @@ class BaseUIWnd(ABC):
     def _show(self):
         if not hasattr(self, 'HWND'):
             self.HWND = self.control.GetTopLevelControl().NativeWindowHandle
+        backend = uia.get_backend()
         
         # 优化：检查窗口是否已经在前台，如果是就不需要重复操作
         try:
-            from wxauto4.utils.win32 import is_window_visible
-            foreground_hwnd = win32gui.GetForegroundWindow()
+            foreground_hwnd = backend.GetForegroundWindow()
             # 如果窗口已经在前台且可见，跳过显示操作
-            if foreground_hwnd == self.HWND and is_window_visible(self.HWND):
+            if foreground_hwnd == self.HWND and backend.IsWindowVisible(self.HWND):
                 return
         except:
             pass
         
-        win32gui.ShowWindow(self.HWND, 1)
-        win32gui.SetWindowPos(self.HWND, -1, 0, 0, 0, 0, 3)
-        win32gui.SetWindowPos(self.HWND, -2, 0, 0, 0, 0, 3)
+        backend.ShowWindow(self.HWND)
         self.control.Show()
         # 将窗口移到屏幕中央（在窗口显示后，减少等待时间）
         try:
@@ -50,14 +46,7 @@ class BaseUIWnd(ABC):
                 self.control.MoveToCenter()
             else:
                 # 如果MoveToCenter不可用，手动计算并移动
-                rect = win32gui.GetWindowRect(self.HWND)
-                window_width = rect[2] - rect[0]
-                window_height = rect[3] - rect[1]
-                screen_width = ctypes.windll.user32.GetSystemMetrics(0)
-                screen_height = ctypes.windll.user32.GetSystemMetrics(1)
-                x = (screen_width - window_width) // 2
-                y = (screen_height - window_height) // 2
-                win32gui.SetWindowPos(self.HWND, 0, x, y, 0, 0, 0x0001)  # SWP_NOSIZE
+                backend.MoveWindowToCenter(self.HWND)
         except:
             pass
 
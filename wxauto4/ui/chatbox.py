@@ -14,21 +14,22 @@ from wxauto4.ui.component import (
 from .base import (
     BaseUISubWnd
 )
-from wxauto4.msgs.msg import parse_msg
+from wxauto4.msgs.msg import ParseContext, parse_msg, parse_msgs
+from wxauto4.msgs.layout import BubbleLayoutModel
+from wxauto4.msgs.cursor import MessageCursor
 from wxauto4.ui_config import WxUI41Config
+from wxauto4.utils.trace import trace_methods
 
 import time
 import os
 import re
-from typing import Iterable, Optional, Sequence, Tuple, Union
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
 def truncate_string(s: str, n: int=8) -> str:
     s = s.replace('\n', '').strip()
     return s if len(s) <= n else s[:n] + '...'
 
-USED_MSG_IDS = {}
-LAST_MSG_COUNT = {}
-
+@trace_methods
 class ChatBox(BaseUISubWnd):
     def __init__(self, control: uia.Control, parent):
         self.control: uia.Control = control
@@ -45,13 +46,21 @@ class ChatBox(BaseUISubWnd):
             return self.msgbox.runtimeid
         return None
     
+    @property
+    def cursor(self) -> MessageCursor:
+        """当前消息列表的新消息游标，消息列表 runtime id 变化（切换了聊天）时换成新的游标"""
+        cid = self.id
+        if cid is None:
+            # 消息列表不可用，返回不保存的空游标，第一次 diff 时只记录状态
+            return MessageCursor()
+        if cid != self._cursor_id:
+            self._cursor_id = cid
+            self._cursor = MessageCursor()
+        return self._cursor
+
     @property
     def used_msg_ids(self):
-        if self.id in USED_MSG_IDS:
-            return USED_MSG_IDS[self.id]
-        else:
-            USED_MSG_IDS[self.id] = tuple()
-            return USED_MSG_IDS[self.id]
+        return self.cursor.ids
     
     @property
     def who(self):
@@ -60,6 +69,24 @@ class ChatBox(BaseUISubWnd):
         self._who = self.editbox.Name
         return self._who
     
+    def current_chat(self) -> Optional[str]:
+        """读取当前打开的聊天名称（不使用 :attr:`who` 的缓存），没有打开聊天时返回 None
+
+        先读输入框名称，读不到时读聊天标题栏，都只是一次属性读取，不会触发点击
+        """
+        try:
+            if self.editbox.Exists(0) and (name := self.editbox.Name):
+                return name
+            title = self.control.GetParentControl().GroupControl(ClassName=WxUI41Config.CHAT_INFO_VIEW_CLS).TextControl(
+                AutomationId='top_content_h_view.top_spacing_v_view.top_left_info_v_view.'
+                             'big_title_line_h_view.current_chat_name_label'
+            )
+            if title.Exists(0):
+                return title.Name or None
+        except:
+            pass
+        return None
+
     def get_info(self):
         chat_info = {}
         chat_info_control = self.control.GetParentControl().GroupControl(ClassName=WxUI41Config.CHAT_INFO_VIEW_CLS)
@@ -105,19 +132,15 @@ class ChatBox(BaseUISubWnd):
         self.editbox = self.control.EditControl(ClassName=WxUI41Config.CHAT_INPUT_FIELD_CLS)
         self.sendbtn = self.control.ButtonControl(Name=self._lang('发送(S)'))
         self.tools = self.control.ToolBarControl()
-        self._empty = False
-        if (cid := self.id) and cid not in USED_MSG_IDS:
+        self.layout_model = BubbleLayoutModel()
+        # 新消息游标归 ChatBox 所有，随聊天窗口对象一起释放
+        self._cursor = MessageCursor()
+        self._cursor_id = self.id
+        if self._cursor_id:
             try:
-                msg_controls = self.msgbox.GetChildren()
-                msg_count = len([c for c in msg_controls if c.ControlTypeName == 'ListItemControl'])
-                LAST_MSG_COUNT[cid] = msg_count
+                self._cursor.reset(self._get_message_controls())
             except:
                 pass
-            try:
-                if not self.msgbox.GetChildren():
-                    self._empty = True
-            except:
-                self._empty = True
 
     def clear_edit(self):
         self._show()
@@ -191,21 +214,24 @@ class ChatBox(BaseUISubWnd):
         
     def get_msgs(self):
         if self.msgbox.Exists(0):
-            return [
-                parse_msg(msg_control, self)
-                for msg_control in self._iter_message_controls()
-                if uia.IsElementInWindow(self.msgbox, msg_control)
-            ]
+            msgbox_rect = self.msgbox.BoundingRectangle
+            msg_controls = self._get_message_controls()
+            return self.parse_msgs(
+                [
+                    msg_control
+                    for msg_control in msg_controls
+                    if msgbox_rect.top <= msg_control.CachedBoundingRectangle.top
+                    and msg_control.CachedBoundingRectangle.bottom <= msgbox_rect.bottom
+                ],
+                msg_controls
+            )
         return []
 
     def get_new_msgs(self):
-        """获取新消息（优化版：基于窗口状态/布局变化检测）
-        
-        核心思路：
-        1. 启动监听时，记录当前窗口状态（所有消息ID）
-        2. 后续检查时，比较当前状态和已记录状态
-        3. 只有当状态变化时（有新消息），才返回新消息
-        
+        """获取新消息
+
+        由 :class:`MessageCursor` 从消息列表末尾向前扫描到第一条已见过的消息，工作量只与新消息数量成正比
+
         注意：此方法在监听模式下会被频繁调用，应避免触发窗口激活操作
         """
         # 优化：使用Exists(0)快速检查，不等待，避免触发窗口激活
@@ -217,113 +243,59 @@ class ChatBox(BaseUISubWnd):
             # 如果检查失败，直接返回空列表，避免后续操作触发窗口激活
             return []
         
-        # 快速检查：先获取消息控件（只获取 ListItemControl 类型的控件）
+        # 一次性获取消息控件（只获取 ListItemControl 类型的控件，runtimeid 等属性已预取）
         try:
-            all_controls = self.msgbox.GetChildren()
-            # 只获取 ListItemControl 类型的控件（真正的消息控件）
-            msg_controls = [c for c in all_controls if c.ControlTypeName == 'ListItemControl']
-            current_msg_count = len(msg_controls)
+            msg_controls = self._get_message_controls()
+            new_controls = self.cursor.diff(msg_controls)
         except:
             return []
         
-        if current_msg_count == 0:
+        if not new_controls:
             return []
-        
-        # 获取已记录的消息ID列表（窗口状态）
-        current_used_ids = self.used_msg_ids or tuple()
-        
-        # 获取上次记录的消息数量
-        last_msg_count = LAST_MSG_COUNT.get(self.id, 0)
-        
-        if self._empty and current_used_ids:
-            self._empty = False
-        
-        # 启动监听时的初始化：如果状态还没记录，记录当前窗口状态（所有消息ID），但不返回历史消息
-        if not current_used_ids:
-            if not self._empty:
-                try:
-                    all_msg_ids = tuple((i.runtimeid for i in msg_controls))
-                    USED_MSG_IDS[self.id] = all_msg_ids[-100:] if len(all_msg_ids) > 100 else all_msg_ids
-                    LAST_MSG_COUNT[self.id] = current_msg_count
-                except:
-                    pass
-            return []
-        
-        # 比较当前窗口状态和已记录的状态，如果状态变化则返回新消息
-        msg_count_increased = current_msg_count > last_msg_count
-        
-        if msg_count_increased:
-            new_msg_count = current_msg_count - last_msg_count
-            check_count = min(new_msg_count + 10, current_msg_count)
-            try:
-                recent_controls = msg_controls[-check_count:] if check_count < len(msg_controls) else msg_controls
-                recent_msg_ids = tuple((i.runtimeid for i in recent_controls))
-            except:
-                return []
-            
-            candidate_new_ids = recent_msg_ids[-new_msg_count:] if len(recent_msg_ids) >= new_msg_count else recent_msg_ids
-            used_msg_ids_set = set(current_used_ids)
-            confirmed_new_ids = [msg_id for msg_id in candidate_new_ids if msg_id not in used_msg_ids_set]
-            
-            if confirmed_new_ids:
-                try:
-                    all_msg_ids = tuple((i.runtimeid for i in msg_controls))
-                    USED_MSG_IDS[self.id] = all_msg_ids[-100:] if len(all_msg_ids) > 100 else all_msg_ids
-                    LAST_MSG_COUNT[self.id] = current_msg_count
-                except:
-                    pass
-                
-                new_controls = [i for i in recent_controls if i.runtimeid in confirmed_new_ids]
-                return [parse_msg(msg_control, self) for msg_control in new_controls]
-        
-        # 如果消息数量没变，检查最后20条消息是否有ID变化
-        check_count = min(20, current_msg_count)
-        try:
-            recent_controls = msg_controls[-check_count:] if check_count < len(msg_controls) else msg_controls
-            recent_msg_ids = tuple((i.runtimeid for i in recent_controls))
-        except:
-            return []
-        
-        used_msg_ids_set = set(current_used_ids)
-        new_ids = [msg_id for msg_id in recent_msg_ids if msg_id not in used_msg_ids_set]
-        
-        if new_ids:
-            try:
-                all_msg_ids = tuple((i.runtimeid for i in msg_controls))
-                USED_MSG_IDS[self.id] = all_msg_ids[-100:] if len(all_msg_ids) > 100 else all_msg_ids
-                LAST_MSG_COUNT[self.id] = current_msg_count
-            except:
-                pass
-            
-            new_controls = [i for i in recent_controls if i.runtimeid in new_ids]
-            return [parse_msg(msg_control, self) for msg_control in new_controls]
+        return self.parse_msgs(new_controls, msg_controls)
 
-        return []
-
-    def _update_used_msg_ids(self):
+    def _reset_msg_cursor(self):
+        """把当前消息列表中的消息全部记为已读，之后只返回新到的消息"""
         if not self.msgbox.Exists(0):
-            USED_MSG_IDS[self.id] = tuple()
-            LAST_MSG_COUNT[self.id] = 0
             return
-        msg_controls = [
-            ctrl for ctrl in self.msgbox.GetChildren()
-            if ctrl.ControlTypeName == 'ListItemControl'
-        ]
-        if not msg_controls:
-            USED_MSG_IDS[self.id] = tuple()
-            LAST_MSG_COUNT[self.id] = 0
-            return
-        USED_MSG_IDS[self.id] = tuple(ctrl.runtimeid for ctrl in msg_controls[-100:])
-        LAST_MSG_COUNT[self.id] = len(msg_controls)
+        self.cursor.reset(self._get_message_controls())
+
+    def _drop_msg_cursor(self):
+        """释放新消息游标记录的消息 id（例如移除监听时），之后第一次获取新消息只重新记录状态"""
+        self._cursor = MessageCursor()
+        self._cursor_id = None
+
+    def parse_msgs(self, msg_controls: Iterable[uia.Control], all_controls: Sequence[uia.Control] = None) -> List['Message']:
+        """一次解析一批消息
+
+        批内共用同一帧窗口截图、消息框矩形与气泡矩形，相邻消息的位置从 all_controls 中取得，不再逐条重新枚举消息列表；
+        窗口截图按消息列表内容（消息数量与最后一条消息）区分，列表有变化时重新截取
+
+        Args:
+            msg_controls: 需要解析的消息控件
+            all_controls: 完整的消息控件列表，默认为 msg_controls
+        """
+        msg_controls = list(msg_controls)
+        all_controls = msg_controls if all_controls is None else all_controls
+        with uia.WindowFrameCache.batch(key=self._frame_key(all_controls)):
+            return parse_msgs(msg_controls, self, all_controls)
+
+    @staticmethod
+    def _frame_key(controls: Sequence[uia.Control]) -> Optional[tuple]:
+        """窗口截图缓存的内容标识：消息数量与最后一条消息的 runtime id（已预取，不跨进程调用）"""
+        if not controls:
+            return None
+        return len(controls), tuple(controls[-1].runtimeid)
+
+    def _get_message_controls(self) -> List[uia.Control]:
+        """一次 FindAllBuildCache 调用获取所有消息控件，ControlType、Name、ClassName、
+        AutomationId、BoundingRectangle 与 runtimeid 均已预取，读取时不再跨进程调用"""
+        return self.msgbox.GetCachedChildren(uia.ControlType.ListItemControl)
 
     def _iter_message_controls(self) -> Iterable[uia.Control]:
         if not self.msgbox.Exists(0):
             return []
-        return [
-            ctrl
-            for ctrl in self.msgbox.GetChildren()
-            if ctrl.ControlTypeName == 'ListItemControl'
-        ]
+        return self._get_message_controls()
 
     def _normalize_msg_id(self, msg_id: Union[Sequence[int], str, None]) -> Optional[Tuple[int, ...]]:
         if msg_id is None:
@@ -349,9 +321,10 @@ class ChatBox(BaseUISubWnd):
         normalized_id = self._normalize_msg_id(msg_id)
         if normalized_id is None:
             return None
-        for msg_control in self._iter_message_controls():
+        controls = list(self._iter_message_controls())
+        for msg_control in controls:
             if msg_control.runtimeid == normalized_id:
-                return parse_msg(msg_control, self)
+                return parse_msg(msg_control, self, ParseContext(self, controls))
         return None
 
     def get_msg_by_hash(self, msg_hash: str) -> Optional['Message']:
@@ -360,18 +333,22 @@ class ChatBox(BaseUISubWnd):
         msg_hash = msg_hash.strip()
         is_digest = bool(re.fullmatch(r"[0-9a-fA-F]{32}", msg_hash))
         controls = list(self._iter_message_controls())
-        for msg_control in reversed(controls):
-            msg = parse_msg(msg_control, self)
-            candidate = msg.hash if is_digest else getattr(msg, 'hash_text', None)
-            if candidate == msg_hash:
-                return msg
+        if not controls:
+            return None
+        context = ParseContext(self, controls)
+        with uia.WindowFrameCache.batch(key=self._frame_key(controls)):
+            for msg_control in reversed(controls):
+                msg = parse_msg(msg_control, self, context)
+                candidate = msg.hash if is_digest else getattr(msg, 'hash_text', None)
+                if candidate == msg_hash:
+                    return msg
         return None
 
     def get_last_msg(self) -> Optional['Message']:
         message_controls = list(self._iter_message_controls())
         if not message_controls:
             return None
-        return parse_msg(message_controls[-1], self)
+        return parse_msg(message_controls[-1], self, ParseContext(self, message_controls))
 
 
 class AtEle:
@@ -1,10 +1,11 @@
 from wxauto4 import uia
 from wxauto4.utils.win32 import (
     FindWindow,
-    GetAllWindows,
+    EnumWindows,
     SetClipboardText,
     ReadClipboardData
 )
+from wxauto4.utils.wait import wait_for
 from wxauto4.utils.tools import (
     find_window_from_root,
     is_valid_image,
@@ -25,13 +26,27 @@ import shutil
 import time
 import os
 
+def _root_pid(parent):
+    """弹出窗口所属微信进程的 ID，用于只枚举该进程的窗口，获取失败返回 None"""
+    try:
+        return parent.root.pid
+    except:
+        return None
+
+def _find_popup(win_cls_name, win_name, ui_cls_name, pid):
+    for win in EnumWindows(classname=win_cls_name, name=win_name, pid=pid, fresh=True):
+        control = uia.ControlFromHandle(win[0])
+        if control.ClassName == ui_cls_name:
+            return control
+    return None
+
 class UpdateWindow(BaseUISubWnd):
     _ui_cls_name: str = WxUI41Config.UPDATE_WINDOW_CLS
     _win_cls_name: str = WxUI41Config.WIN_CLS_NAME
     _win_name: str = "微信"
 
     def __init__(self):
-        wins = GetAllWindows(name=self._win_name, classname=self._win_cls_name)
+        wins = EnumWindows(classname=self._win_cls_name, name=self._win_name)
         for win in wins:
             self.control = uia.ControlFromHandle(win[0])
             if (
@@ -56,19 +71,13 @@ class Menu(BaseUISubWnd):
     def __init__(self, parent, timeout=2):
         self.parent = parent
         self.root = parent.root
-        t0 = time.time()
-        while True:
-            if time.time() - t0 > timeout:
-                break
-            wins = GetAllWindows(classname=self._win_cls_name,name=self._win_name)
-            _find = False
-            for win in wins:
-                self.control = uia.ControlFromHandle(win[0])
-                if self.control.ClassName == self._ui_cls_name:
-                    _find = True
-                    break
-            if _find:
-                break
+        pid = _root_pid(parent)
+        self.control = wait_for(
+            lambda: _find_popup(self._win_cls_name, self._win_name, self._ui_cls_name, pid),
+            timeout,
+            name='Menu',
+            window_event=True
+        )
     
     @property
     def option_controls(self):
@@ -106,20 +115,14 @@ class SelectContactWnd(BaseUISubWnd):
     def __init__(self, parent, timeout=2):
         self.parent = parent
         self.root = parent.root
-        t0 = time.time()
-        while True:
-            if time.time() - t0 > timeout:
-                break
-            wins = GetAllWindows(classname=self._win_cls_name,name=self._win_name)
-            _find = False
-            for win in wins:
-                self.control = uia.ControlFromHandle(win[0])
-                if self.control.ClassName == self._ui_cls_name:
-                    _find = True
-                    break
-            if _find:
-                break
-        if _find:
+        pid = _root_pid(parent)
+        self.control = wait_for(
+            lambda: _find_popup(self._win_cls_name, self._win_name, self._ui_cls_name, pid),
+            timeout,
+            name='SelectContactWnd',
+            window_event=True
+        )
+        if self.control:
             self.confirm_btn = self.control.ButtonControl(AutomationId="confirm_btn")
             self.confirm_btn_rect = self.confirm_btn.BoundingRectangle
 
@@ -4,20 +4,25 @@ from .sessionbox import SessionBox
 from .chatbox import ChatBox
 from wxauto4.utils.win32 import (
     FindWindow,
-    GetAllWindows,
+    EnumWindows,
     GetPathByHwnd,
     get_windows_by_pid
 )
 from wxauto4.param import WxParam, WxResponse, PROJECT_NAME
+from wxauto4.utils.wait import wait_for
 from wxauto4.logger import wxlog
 from wxauto4 import uia
 from wxauto4.ui_config import WxUI41Config
 from typing import (
+    Dict,
+    Optional,
     Union, 
     List,
     Literal
 )
+import threading
 import random
+import time
 import os
 import re
 import sys
@@ -138,6 +143,95 @@ class WeChatSubWnd(BaseUISubWnd):
             return chatbox.get_last_msg()
 
     
+class SubWindowRegistry:
+    """主窗口拖出的独立聊天窗口登记表，按窗口句柄保存并维护昵称索引
+
+    每次刷新只枚举一次顶层窗口（不经过 UIA），与上次的结果比较：
+    - 已登记的窗口直接复用 :class:`WeChatSubWnd` 对象，只根据窗口标题更新昵称；
+    - 新出现的窗口才读取 UIA 控件判断是否为本微信进程的聊天窗口；
+    - 已经关闭的窗口从登记表中移除；
+    - 未识别为聊天窗口的句柄在 ``SUBWINDOW_IGNORE_TTL`` 秒内不再检查，之后重新检查一次。
+    """
+
+    def __init__(self, parent: 'WeChatMainWnd'):
+        self.parent = parent
+        self._windows: Dict[int, WeChatSubWnd] = {}
+        self._by_name: Dict[str, int] = {}
+        # 同类名但不是本进程聊天窗口的句柄（如主窗口或尚未加载完成的窗口） -> 忽略到期的 monotonic 时间
+        self._ignored: Dict[int, float] = {}
+        self._lock = threading.RLock()
+        self.stats: Dict[str, int] = {'refreshes': 0, 'created': 0, 'removed': 0, 'index_hits': 0}
+
+    def _create(self, hwnd: int) -> Optional[WeChatSubWnd]:
+        try:
+            control = uia.ControlFromHandle(hwnd)
+            if control is None or control.ClassName != WeChatSubWnd._ui_cls_name:
+                return None
+            subwin = WeChatSubWnd(hwnd, self.parent)
+            if subwin.pid == self.parent.pid:
+                return subwin
+        except:
+            pass
+        return None
+
+    def refresh(self) -> Dict[int, WeChatSubWnd]:
+        """按当前的顶层窗口增量更新登记表"""
+        with self._lock:
+            self.stats['refreshes'] += 1
+            current = {hwnd: title for hwnd, _, title in EnumWindows(
+                classname=WeChatSubWnd._win_cls_name, pid=self.parent.pid, fresh=True
+            )}
+            for hwnd in list(self._windows):
+                if hwnd not in current:
+                    self._windows.pop(hwnd)
+                    self.stats['removed'] += 1
+            now = time.monotonic()
+            self._ignored = {
+                hwnd: expiry for hwnd, expiry in self._ignored.items()
+                if hwnd in current and expiry > now
+            }
+            for hwnd, title in current.items():
+                if hwnd in self._ignored:
+                    continue
+                subwin = self._windows.get(hwnd)
+                if subwin is None:
+                    if (subwin := self._create(hwnd)) is None:
+                        self._ignored[hwnd] = now + WxParam.SUBWINDOW_IGNORE_TTL
+                        continue
+                    self._windows[hwnd] = subwin
+                    self.stats['created'] += 1
+                elif title:
+                    subwin.nickname = title
+            self._by_name = {subwin.nickname: hwnd for hwnd, subwin in self._windows.items()}
+            return dict(self._windows)
+
+    def get(self, nickname: str) -> Optional[WeChatSubWnd]:
+        """按昵称精确查找，索引中的窗口仍然存在时不枚举窗口"""
+        with self._lock:
+            hwnd = self._by_name.get(nickname)
+            if hwnd is not None and uia.get_backend().IsWindow(hwnd):
+                self.stats['index_hits'] += 1
+                return self._windows[hwnd]
+            self.refresh()
+            return self._windows.get(self._by_name.get(nickname))
+
+    def add(self, subwin: WeChatSubWnd) -> None:
+        """登记刚打开的独立窗口"""
+        with self._lock:
+            hwnd = subwin.control.NativeWindowHandle
+            self._windows[hwnd] = subwin
+            self._ignored.pop(hwnd, None)
+            self._by_name[subwin.nickname] = hwnd
+            self.stats['created'] += 1
+
+    def snapshot(self) -> List[WeChatSubWnd]:
+        """登记表中的窗口，不刷新"""
+        with self._lock:
+            return list(self._windows.values())
+
+    def all(self) -> List[WeChatSubWnd]:
+        return list(self.refresh().values())
+
 
 class WeChatMainWnd(WeChatSubWnd):
     _ui_cls_name: str = WxUI41Config.MAIN_WINDOW_UI_CLS
@@ -147,10 +241,12 @@ class WeChatMainWnd(WeChatSubWnd):
     def __init__(self, nickname: str = None, hwnd: int = None):
         self.root = self
         self.parent = self
+        self.chat_switch_stats: Dict[str, int] = {'current': 0, 'session_row': 0, 'search': 0}
+        self.sub_wnds = SubWindowRegistry(self)
         if hwnd:
             self._setup_ui(hwnd)
         else:
-            wxs = [i for i in GetAllWindows() if i[1] == self._win_cls_name]
+            wxs = EnumWindows(classname=self._win_cls_name, fresh=True)
             if len(wxs) == 0:
                 # 尝试查找所有可能的窗口类名
                 possible_classes = [
@@ -160,7 +256,7 @@ class WeChatMainWnd(WeChatSubWnd):
                 ]
                 all_wxs = []
                 for cls in possible_classes:
-                    found = [i for i in GetAllWindows() if i[1] == cls]
+                    found = EnumWindows(classname=cls, fresh=True)
                     if found:
                         all_wxs.extend(found)
                 
@@ -227,15 +323,57 @@ class WeChatMainWnd(WeChatSubWnd):
             nickname: str=None, 
             exact: bool=False
         ) -> ChatBox:
-        if nickname and (chatbox := WeChatSubWnd(nickname, self, timeout=0)).control:
-            return chatbox._chat_api
+        if nickname:
+            # 关键词之前解析过时按解析出的聊天名称查找独立窗口
+            cached = self._session_api.name_cache.peek((nickname, exact))
+            for name in dict.fromkeys((nickname, cached and cached[0])):
+                if name and (subwin := self.sub_wnds.get(name)):
+                    return subwin._chat_api
+            switch_result = self._activate_chat(nickname, exact)
+            if not switch_result:
+                return None
+        if self._chat_api.msgbox.Exists(0.5):
+            return self._chat_api
+
+    def _wait_current_chat(self, name: str, timeout: float = None) -> bool:
+        timeout = WxParam.UI_STATE_TIMEOUT if timeout is None else timeout
+        return bool(wait_for(lambda: self._chat_api.current_chat() == name, timeout, name='current_chat'))
+
+    def _activate_chat(
+            self,
+            keywords: str,
+            exact: bool = True,
+            force: bool = False,
+            force_wait: Union[float, int] = 0.5
+        ):
+        """切换到 keywords 对应的聊天，返回聊天名称，失败返回 None
+
+        关键词之前搜索解析过时使用缓存的聊天名称，依次尝试（force 时直接搜索）：
+        1. 当前打开的就是目标聊天，不做任何操作；
+        2. 会话列表可见区域内有同名会话，直接点击该会话；
+        3. 通过搜索框搜索切换，并缓存关键词解析出的聊天名称。
+        """
+        if not force:
+            cached = self._session_api.resolved_name(keywords, exact)
+            name = cached or keywords
+            current = self._chat_api.current_chat()
+            if current and current == name:
+                self.chat_switch_stats['current'] += 1
+                return current
+            if session := self._session_api.find_visible_session(name):
+                session.click()
+                if self._wait_current_chat(name):
+                    self.chat_switch_stats['session_row'] += 1
+                    return name
+                if cached:
+                    # 点击缓存名称对应的会话没有切换过去，缓存已经失效
+                    self._session_api.name_cache.invalidate((keywords, exact))
+        result = self._session_api.switch_chat(keywords, exact, force, force_wait)
+        if result:
+            self.chat_switch_stats['search'] += 1
         else:
-            if nickname:
-                switch_result = self._session_api.switch_chat(keywords=nickname, exact=exact)
-                if not switch_result:
-                    return None
-            if self._chat_api.msgbox.Exists(0.5):
-                return self._chat_api
+            self._session_api.name_cache.invalidate((keywords, exact))
+        return result
 
     def switch_chat(
             self, 
@@ -244,26 +382,17 @@ class WeChatMainWnd(WeChatSubWnd):
             force: bool = False,
             force_wait: Union[float, int] = 0.5
         ):
-        return self._session_api.switch_chat(keywords, exact, force, force_wait)
+        return self._activate_chat(keywords, exact, force, force_wait)
         
-    def get_all_sub_wnds(self):
-        """获取所有子窗口，增强错误处理"""
-        sub_wxs = GetAllWindows(classname=WeChatSubWnd._win_cls_name)
-        result = []
-        for i in sub_wxs:
-            try:
-                control = uia.ControlFromHandle(i[0])
-                if control.ClassName == WeChatSubWnd._ui_cls_name:
-                    sub_win = WeChatSubWnd(i[0], self)
-                    if sub_win.pid == self.pid:
-                        result.append(sub_win)
-            except:
-                continue
-        return result
+    def get_all_sub_wnds(self) -> List[WeChatSubWnd]:
+        """获取所有子窗口"""
+        return self.sub_wnds.all()
     
     def get_sub_wnd(self, who: str):
         """获取子窗口，支持精确匹配和模糊匹配"""
-        subwins = self.get_all_sub_wnds()
+        if subwin := self.sub_wnds.get(who):
+            return subwin
+        subwins = self.sub_wnds.snapshot()
         if not subwins:
             return None
         
@@ -289,6 +418,9 @@ class WeChatMainWnd(WeChatSubWnd):
         
         if result := self._session_api.open_separate_window(keywords):
             find_nickname = result['data'].get('nickname', keywords)
-            return WeChatSubWnd(find_nickname, self)
+            subwin = WeChatSubWnd(find_nickname, self)
+            if subwin.control is not None:
+                self.sub_wnds.add(subwin)
+            return subwin
         
         return None
\ No newline at end of file
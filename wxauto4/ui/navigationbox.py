@@ -3,7 +3,7 @@ from wxauto4.param import (
     WxParam, 
     WxResponse,
 )
-from wxauto4.utils.win32 import GetAllWindows
+from wxauto4.utils.win32 import EnumWindows
 from wxauto4.ui_config import WxUI41Config
 from wxauto4.logger import wxlog
 import time
@@ -72,7 +72,7 @@ class NavigationBox:
             # 从弹窗窗口中查找ContactHeadView控件
             nickname = ""
             try:
-                wins = GetAllWindows(classname=WxUI41Config.MENU_WIN_CLS, name="Weixin")
+                wins = EnumWindows(classname=WxUI41Config.MENU_WIN_CLS, name="Weixin", fresh=True)
                 for win in wins:
                     control = uia.ControlFromHandle(win[0])
                     if control.ClassName in ['mmui::ProfileUniquePop', 'mmui::XPopover', WxUI41Config.MENU_CLS]:
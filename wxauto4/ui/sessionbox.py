@@ -7,21 +7,32 @@ from wxauto4.param import (
 from wxauto4.languages import MENU_OPTIONS
 from wxauto4.ui.component import Menu
 from wxauto4.utils.win32 import SetClipboardText
+from wxauto4.utils.cache import TTLCache
+from wxauto4.utils.wait import wait_for
+from wxauto4.utils.trace import trace_methods
 from wxauto4.logger import wxlog
 from wxauto4.ui_config import WxUI41Config
 import time
 from typing import (
+    Dict,
+    Optional,
     Union,
-    List
+    List,
+    Tuple
 )
 import re
 
 
+@trace_methods
 class SessionBox:
     def __init__(self, control, parent):
         self.control: uia.Control = control
         self.root = parent.root
         self.parent = parent
+        # (keywords, exact) -> (聊天名称, 'contact' | 'group')
+        self.name_cache: TTLCache[Tuple[str, str]] = TTLCache(
+            WxParam.CHAT_NAME_CACHE_SIZE, WxParam.CHAT_NAME_CACHE_TTL
+        )
         self.init()
 
     def init(self):
@@ -45,7 +56,7 @@ class SessionBox:
         """
         # 首先尝试标准方式
         if self.session_list.Exists(0):
-            children = self.session_list.GetChildren()
+            children = self.session_list.GetCachedChildren()
             if children:
                 return [SessionElement(i, self) for i in children]
         
@@ -76,7 +87,7 @@ class SessionBox:
             if list_controls:
                 list_controls.sort(key=lambda c: len(c.GetChildren()), reverse=True)
                 target_list = list_controls[0]
-                children = target_list.GetChildren()
+                children = target_list.GetCachedChildren()
                 if children:
                     # 更新session_list引用
                     self.session_list = target_list
@@ -86,6 +97,29 @@ class SessionBox:
         
         return []
 
+    def get_session_fingerprints(self) -> Dict[str, Tuple[str, int, str]]:
+        """读取一次会话列表，返回 会话名称 -> 指纹（名称、未读数、最后一条消息预览）
+
+        监听时只有指纹变化的聊天才需要扫描消息列表；同名会话只保留列表中靠前的一个
+        """
+        fingerprints = {}
+        for session in self.get_session():
+            fingerprint = session.fingerprint
+            fingerprints.setdefault(fingerprint[0], fingerprint)
+        return fingerprints
+
+    def find_visible_session(self, name: str) -> Optional['SessionElement']:
+        """在会话列表可见区域内查找名称完全一致的会话，不滚动、不搜索"""
+        try:
+            list_rect = self.session_list.BoundingRectangle
+            for session in self.get_session():
+                rect = session.control.CachedBoundingRectangle
+                if session.name == name and list_rect.top <= rect.top and rect.bottom <= list_rect.bottom:
+                    return session
+        except:
+            pass
+        return None
+
     def search(
             self, 
             keywords: str,
@@ -104,52 +138,73 @@ class SessionBox:
                 return []
             
             self.searchbox.Click()
-            time.sleep(0.1)
+            wait_for(lambda: self.searchbox.HasKeyboardFocus, WxParam.UI_STATE_TIMEOUT, name='SessionBox.search.focus')
             self.searchbox.SendKeys('{Ctrl}a')  # 全选
-            time.sleep(0.1)
             
             # 设置剪贴板并粘贴
             SetClipboardText(keywords)
-            time.sleep(0.1)
             
             # 尝试多种粘贴方式
             try:
                 self.searchbox.SendKeys('{Ctrl}v')
-                time.sleep(0.2)
+                applied = self._wait_search_text(keywords)
             except:
+                applied = False
+            if not applied:
                 try:
                     self.searchbox.RightClick()
-                    time.sleep(0.2)
                     menu = Menu(self)
                     if menu.exists(0.5):
                         menu.select('粘贴')
-                        time.sleep(0.2)
+                        self._wait_search_text(keywords)
                 except:
                     pass
             
             # 触发搜索（点击搜索框外部或按回车）
             self.searchbox.MiddleClick()
-            time.sleep(0.3)  # 等待搜索结果出现
 
             if force:
                 time.sleep(force_wait)
 
-            try:
-                if not self.search_content.Exists(1):
-                    return []
-                
-                search_result = self.search_content.ListControl()
-                if not search_result.Exists(0.5):
-                    return []
-                
-                children = search_result.GetChildren()
-                return [SearchResultElement(i) for i in children]
-            except:
-                return []
+            items = self._wait_search_results()
+            return [SearchResultElement(i) for i in items]
                 
         except:
             return []
+
+    def _wait_search_text(self, keywords: str) -> bool:
+        """等待搜索框中的文本变为 keywords"""
+        def applied():
+            return (self.searchbox.GetValuePattern().Value or '').strip() == keywords.strip()
+
+        return bool(wait_for(applied, WxParam.UI_STATE_TIMEOUT, name='SessionBox.search.text'))
+
+    def _wait_search_results(self, timeout: float = None) -> List[uia.Control]:
+        """等待搜索结果弹窗出现并填充完成，返回结果列表中的控件，超时返回空列表
+
+        结果列表非空、且条目数与上一次检查时相同（不再增加）时视为填充完成；
+        不按名称过滤（拼音、备注名、微信号搜索的结果名称不一定包含关键词），匹配交给调用方。
+        """
+        timeout = min(WxParam.SEARCH_CHAT_TIMEOUT, 3) if timeout is None else timeout
+        last_count = [-1]
+
+        def populated():
+            if not self.search_content.Exists(0):
+                return None
+            items = self.search_content.ListControl().GetChildren()
+            settled = len(items) == last_count[0]
+            last_count[0] = len(items)
+            if settled and items:
+                return items
+            return None
+
+        return wait_for(populated, timeout, name='SessionBox.search.results', max_interval=0.05) or []
     
+    def resolved_name(self, keywords: str, exact: bool = True) -> Optional[str]:
+        """之前用相同关键词搜索切换到的聊天名称，没有缓存时返回 None"""
+        cached = self.name_cache.get((keywords, exact))
+        return cached[0] if cached else None
+
     def switch_chat(
         self,
         keywords: str, 
@@ -159,38 +214,8 @@ class SessionBox:
     ):
         clean_keywords = keywords.split('?')[0].split('，')[0].split(',')[0].strip()
         try:
-            # 执行搜索
-            search_result = self.search(clean_keywords, force, force_wait)
-            
-            t0 = time.time()
-            max_wait = min(WxParam.SEARCH_CHAT_TIMEOUT, 3)
-            while not self.search_content.Exists(0.5) and (time.time() - t0) < max_wait:
-                time.sleep(0.1)
-            
-            if not self.search_content.Exists(0):
-                return None
-            
-            try:
-                search_box = self.search_content.ListControl()
-                if not search_box.Exists(1):
-                    if self.search_content.Exists(0):
-                        self.control.MiddleClick()
-                    return None
-            except:
-                if self.search_content.Exists(0):
-                    self.control.MiddleClick()
-                return None
-            
-            t0 = time.time()
-            search_result_items = []
-            while (time.time() - t0) < max_wait:
-                try:
-                    search_result_items = search_box.GetChildren()
-                    if search_result_items:
-                        break
-                    time.sleep(0.1)
-                except:
-                    time.sleep(0.1)
+            # 执行搜索，search 已等待结果填充完成
+            search_result_items = [i.control for i in self.search(clean_keywords, force, force_wait)]
             
             if not search_result_items:
                 if self.search_content.Exists(0):
@@ -273,8 +298,15 @@ class SessionBox:
             selected = matched_items[0]
             
             try:
+                chat_api = self.parent._chat_api
+                previous = chat_api.current_chat()
                 selected['item'].Click()
-                time.sleep(0.2)
+                wait_for(
+                    lambda: (current := chat_api.current_chat()) == selected['text'] or (current and current != previous),
+                    WxParam.UI_STATE_TIMEOUT,
+                    name='SessionBox.switch_chat.header'
+                )
+                self.name_cache.put((keywords, exact), (selected['text'], selected['type']))
                 return selected['text']
             except:
                 if self.search_content.Exists(0):
@@ -295,24 +327,29 @@ class SessionBox:
         if not realname:
             return WxResponse.failure('未找到会话')
         
-        time.sleep(0.1)
-        
         try:
-            sessions = [i for i in self.get_session() if uia.IsElementInWindow(self.session_list, i.control)]
-            if not sessions:
-                return WxResponse.failure('未找到会话列表')
-            
-            target_session = None
-            for session in sessions:
-                if session.content.startswith(realname):
-                    target_session = session
-                    break
-            
+            def visible_session():
+                list_rect = self.session_list.BoundingRectangle
+                for session in self.get_session():
+                    rect = session.control.CachedBoundingRectangle
+                    if (
+                        list_rect.top <= rect.top and rect.bottom <= list_rect.bottom
+                        and session.content.startswith(realname)
+                    ):
+                        return session
+
+            target_session = wait_for(visible_session, WxParam.UI_STATE_TIMEOUT, name='SessionBox.open_separate_window.row')
             if not target_session:
                 return WxResponse.failure(f'未找到会话: {realname}')
             
             target_session.double_click()
-            time.sleep(0.2)
+            backend = uia.get_backend()
+            wait_for(
+                lambda: backend.FindWindow(WxUI41Config.WIN_CLS_NAME, realname),
+                WxParam.UI_STATE_TIMEOUT,
+                name='SessionBox.open_separate_window.window',
+                window_event=True
+            )
             return WxResponse.success(data={'nickname': realname})
         except:
             return WxResponse.failure('打开独立窗口失败')
@@ -364,6 +401,19 @@ class SessionElement:
                 return int(match.group(1))
         return 0
 
+    @property
+    def preview(self) -> str:
+        """最后一条消息预览"""
+
+        texts = self.texts
+        return texts[1] if len(texts) > 1 else ''
+
+    @property
+    def fingerprint(self) -> Tuple[str, int, str]:
+        """会话指纹：名称、未读数与最后一条消息预览，有新消息时会发生变化"""
+
+        return self.name, self.unread_count, self.preview
+
     def _menu_option_text(self, option_key: str) -> str:
         option = MENU_OPTIONS.get(option_key, {})
         lang = getattr(WxParam, 'LANGUAGE', 'cn')
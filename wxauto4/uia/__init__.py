@@ -1 +1,23 @@
-from .uiautomation import *
\ No newline at end of file
+try:
+    from .uiautomation import *  # noqa: F401,F403
+except (ImportError, AttributeError, OSError):
+    # 非 Windows 环境无法加载 comtypes/pywin32，仅提供公共类型与模拟控件，需配合 SimulatedBackend 使用
+    from .common import *  # noqa: F401,F403
+    from .simulated import SimControl as Control, WalkControl  # noqa: F401
+
+from .backend import UIABackend, get_backend, set_backend
+
+
+def ControlFromHandle(handle: int):
+    """根据窗口句柄返回顶层控件（经由当前后端）"""
+    return get_backend().ControlFromHandle(handle)
+
+
+def GetRootControl():
+    """返回桌面根控件（经由当前后端）"""
+    return get_backend().GetRootControl()
+
+
+def Click(x: int, y: int) -> None:
+    """在屏幕坐标处单击（经由当前后端）"""
+    get_backend().Click(x, y)
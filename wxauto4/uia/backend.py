@@ -0,0 +1,289 @@
+"""UIA 后端接口。
+
+``wxauto4.ui``、``wxauto4.msgs`` 与 ``wxauto4.moment`` 通过 ``uia.ControlFromHandle``、
+``GetAllWindows`` 以及剪贴板辅助函数访问桌面，这些入口统一转发到当前后端：
+
+- :class:`WindowsBackend`：默认后端，基于 ``uiautomation`` 与 ``pywin32`` 操作真实桌面；
+- :class:`wxauto4.uia.simulated.SimulatedBackend`：纯 Python 的模拟微信控件树，
+  用于在非 Windows 环境下回归测试与性能测试。
+
+示例::
+
+    from wxauto4 import uia
+    from wxauto4.uia.simulated import SimulatedBackend
+
+    uia.set_backend(SimulatedBackend.wechat())
+"""
+
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+WindowInfo = Tuple[int, str, str]
+
+
+class UIABackend(ABC):
+    """后端需要实现的桌面访问接口，方法命名与 ``wxauto4.utils.win32`` 保持一致。"""
+
+    name: str = 'base'
+
+    # region --- 控件 -----------------------------------------------------------
+    @abstractmethod
+    def ControlFromHandle(self, handle: int) -> Any:
+        """根据窗口句柄返回顶层控件。"""
+
+    @abstractmethod
+    def GetRootControl(self) -> Any:
+        """返回桌面根控件。"""
+
+    def InitializeThread(self) -> None:
+        """在当前线程初始化后端（如 COM），默认无需处理。"""
+
+    def UninitializeThread(self) -> None:
+        """释放 :meth:`InitializeThread` 申请的资源。"""
+
+    # endregion ----------------------------------------------------------------
+
+    # region --- 事件 -----------------------------------------------------------
+    def AddStructureChangedHandler(self, control: Any, callback: Callable[[int], None]) -> Any:
+        """订阅控件自身及其子控件的结构变化事件，返回取消订阅时使用的令牌。
+
+        callback 在后端的事件线程中调用，参数为 ``StructureChangeType``；不支持事件的后端抛出 NotImplementedError。
+        """
+        raise NotImplementedError(f'{self.name} backend does not support structure changed events')
+
+    def RemoveStructureChangedHandler(self, token: Any) -> None:
+        """取消 :meth:`AddStructureChangedHandler` 的订阅。"""
+
+    def AddWindowShownHandler(self, callback: Callable[[int], None]) -> Any:
+        """订阅窗口显示事件（新窗口、弹出菜单出现时触发），返回取消订阅时使用的令牌。
+
+        callback 在后端的事件线程中调用，参数为窗口句柄；不支持事件的后端抛出 NotImplementedError。
+        """
+        raise NotImplementedError(f'{self.name} backend does not support window shown events')
+
+    def RemoveWindowShownHandler(self, token: Any) -> None:
+        """取消 :meth:`AddWindowShownHandler` 的订阅。"""
+
+    # endregion ----------------------------------------------------------------
+
+    # region --- 窗口 -----------------------------------------------------------
+    @abstractmethod
+    def GetAllWindows(self, name: str = None, classname: str = None) -> List[WindowInfo]:
+        """返回顶层窗口列表，每个元素为 ``(窗口句柄, 类名, 窗口标题)``。"""
+
+    def EnumWindows(
+            self,
+            classname: str = None,
+            name: str = None,
+            pid: int = None,
+            first: bool = False
+        ) -> List[WindowInfo]:
+        """按类名、标题与进程 ID 过滤顶层窗口，``first`` 为 True 时最多返回一个。
+
+        默认基于 :meth:`GetAllWindows` 实现，后端可以改为在枚举过程中过滤。
+        """
+        windows = self.GetAllWindows(name, classname)
+        if pid is not None:
+            windows = [i for i in windows if self.GetWindowProcessId(i[0]) == pid]
+        return windows[:1] if first else windows
+
+    def GetWindowProcessId(self, hwnd: int) -> int:
+        """窗口所属进程的 ID。"""
+        return self.ControlFromHandle(hwnd).ProcessId
+
+    @abstractmethod
+    def FindWindow(self, classname: str = None, name: str = None) -> int:
+        """查找一次顶层窗口，找不到返回 0。"""
+
+    @abstractmethod
+    def GetWindowsByPid(self, pid: int) -> List[int]:
+        """返回指定进程所有可见顶层窗口的句柄。"""
+
+    @abstractmethod
+    def IsWindow(self, hwnd: int) -> bool:
+        """窗口句柄是否仍然有效。"""
+
+    @abstractmethod
+    def IsWindowVisible(self, hwnd: int) -> bool:
+        """窗口是否可见且未最小化。"""
+
+    @abstractmethod
+    def GetForegroundWindow(self) -> int:
+        """返回前台窗口句柄。"""
+
+    @abstractmethod
+    def ShowWindow(self, hwnd: int) -> None:
+        """还原窗口并置于最前。"""
+
+    @abstractmethod
+    def MoveWindowToCenter(self, hwnd: int) -> None:
+        """将窗口移动到屏幕中央。"""
+
+    # endregion ----------------------------------------------------------------
+
+    # region --- 输入 -----------------------------------------------------------
+    @abstractmethod
+    def Click(self, x: int, y: int) -> None:
+        """在屏幕坐标处单击鼠标左键。"""
+
+    # endregion ----------------------------------------------------------------
+
+    # region --- 剪贴板 ---------------------------------------------------------
+    @abstractmethod
+    def SetClipboardText(self, text: str) -> None:
+        """设置剪贴板文本。"""
+
+    @abstractmethod
+    def SetClipboardFiles(self, paths: Sequence[str]) -> bool:
+        """以 CF_HDROP 格式设置剪贴板文件。"""
+
+    @abstractmethod
+    def SetClipboardData(self, data_dict: Dict[str, Any]) -> None:
+        """按格式 ID 设置剪贴板数据。"""
+
+    @abstractmethod
+    def ReadClipboardData(self) -> Dict[str, Any]:
+        """读取剪贴板中所有格式的数据，键为格式 ID 字符串。"""
+
+    # endregion ----------------------------------------------------------------
+
+    def __repr__(self):
+        return f'<wxauto4 UIABackend({self.name})>'
+
+
+class WindowsBackend(UIABackend):
+    """基于 ``uiautomation`` 与 ``pywin32`` 的真实桌面后端。"""
+
+    name = 'windows'
+
+    def __init__(self):
+        from . import uiautomation
+        from wxauto4.utils import win32
+
+        self._uia = uiautomation
+        self._win32 = win32
+
+    def ControlFromHandle(self, handle: int):
+        return self._uia.ControlFromHandle(handle)
+
+    def GetRootControl(self):
+        return self._uia.GetRootControl()
+
+    def InitializeThread(self) -> None:
+        self._uia.InitializeUIAutomationInCurrentThread()
+
+    def UninitializeThread(self) -> None:
+        self._uia.UninitializeUIAutomationInCurrentThread()
+
+    def AddStructureChangedHandler(self, control, callback: Callable[[int], None]):
+        handler = self._uia.AddStructureChangedEventHandler(control, callback)
+        return control, handler
+
+    def RemoveStructureChangedHandler(self, token) -> None:
+        control, handler = token
+        self._uia.RemoveStructureChangedEventHandler(control, handler)
+
+    def AddWindowShownHandler(self, callback: Callable[[int], None]):
+        hook = self._win32.WinEventHook(callback)
+        hook.start()
+        return hook
+
+    def RemoveWindowShownHandler(self, token) -> None:
+        token.stop()
+
+    def GetAllWindows(self, name: str = None, classname: str = None) -> List[WindowInfo]:
+        return self._win32._GetAllWindows(name, classname)
+
+    def EnumWindows(self, classname: str = None, name: str = None, pid: int = None, first: bool = False) -> List[WindowInfo]:
+        return self._win32._EnumWindows(classname, name, pid, first)
+
+    def GetWindowProcessId(self, hwnd: int) -> int:
+        return self._win32.win32process.GetWindowThreadProcessId(hwnd)[1]
+
+    def FindWindow(self, classname: str = None, name: str = None) -> int:
+        return self._win32.win32gui.FindWindow(classname, name)
+
+    def GetWindowsByPid(self, pid: int) -> List[int]:
+        return self._win32.enum_windows_by_pid(pid)
+
+    def IsWindow(self, hwnd: int) -> bool:
+        return bool(self._win32.win32gui.IsWindow(hwnd))
+
+    def IsWindowVisible(self, hwnd: int) -> bool:
+        return self._win32.is_window_visible(hwnd)
+
+    def GetForegroundWindow(self) -> int:
+        return self._win32.win32gui.GetForegroundWindow()
+
+    def ShowWindow(self, hwnd: int) -> None:
+        win32gui = self._win32.win32gui
+        win32gui.ShowWindow(hwnd, 1)
+        win32gui.SetWindowPos(hwnd, -1, 0, 0, 0, 0, 3)
+        win32gui.SetWindowPos(hwnd, -2, 0, 0, 0, 0, 3)
+
+    def MoveWindowToCenter(self, hwnd: int) -> None:
+        import ctypes
+
+        win32gui = self._win32.win32gui
+        rect = win32gui.GetWindowRect(hwnd)
+        window_width = rect[2] - rect[0]
+        window_height = rect[3] - rect[1]
+        screen_width = ctypes.windll.user32.GetSystemMetrics(0)
+        screen_height = ctypes.windll.user32.GetSystemMetrics(1)
+        x = (screen_width - window_width) // 2
+        y = (screen_height - window_height) // 2
+        win32gui.SetWindowPos(hwnd, 0, x, y, 0, 0, 0x0001)  # SWP_NOSIZE
+
+    def Click(self, x: int, y: int) -> None:
+        self._uia.Click(x, y)
+
+    def SetClipboardText(self, text: str) -> None:
+        import pyperclip
+
+        pyperclip.copy(text)
+
+    def SetClipboardFiles(self, paths: Sequence[str]) -> bool:
+        return self._win32.set_files_to_clipboard(paths)
+
+    def SetClipboardData(self, data_dict: Dict[str, Any]) -> None:
+        self._win32._SetClipboardData(data_dict)
+
+    def ReadClipboardData(self) -> Dict[str, Any]:
+        return self._win32._ReadClipboardData()
+
+
+_backend: Optional[UIABackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> UIABackend:
+    """返回当前后端，未设置时创建 :class:`WindowsBackend`。"""
+
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = WindowsBackend()
+    return _backend
+
+
+def set_backend(backend: Optional[UIABackend]) -> Optional[UIABackend]:
+    """切换后端，返回之前的后端；传入 ``None`` 恢复为默认后端。"""
+
+    global _backend
+    with _backend_lock:
+        previous = _backend
+        _backend = backend
+    return previous
+
+
+__all__ = [
+    'UIABackend',
+    'WindowsBackend',
+    'get_backend',
+    'set_backend',
+]
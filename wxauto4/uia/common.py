@@ -0,0 +1,504 @@
+"""UIA 控件类型常量与几何辅助函数。
+
+这些定义不依赖 Windows，真实的 uiautomation 后端与模拟后端共用同一份实现。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ControlType:
+    """
+    ControlType from IUIAutomation.
+    Refer https://docs.microsoft.com/en-us/windows/desktop/WinAuto/uiauto-controltype-ids
+    """
+    AppBarControl = 50040
+    ButtonControl = 50000
+    CalendarControl = 50001
+    CheckBoxControl = 50002
+    ComboBoxControl = 50003
+    CustomControl = 50025
+    DataGridControl = 50028
+    DataItemControl = 50029
+    DocumentControl = 50030
+    EditControl = 50004
+    GroupControl = 50026
+    HeaderControl = 50034
+    HeaderItemControl = 50035
+    HyperlinkControl = 50005
+    ImageControl = 50006
+    ListControl = 50008
+    ListItemControl = 50007
+    MenuBarControl = 50010
+    MenuControl = 50009
+    MenuItemControl = 50011
+    PaneControl = 50033
+    ProgressBarControl = 50012
+    RadioButtonControl = 50013
+    ScrollBarControl = 50014
+    SemanticZoomControl = 50039
+    SeparatorControl = 50038
+    SliderControl = 50015
+    SpinnerControl = 50016
+    SplitButtonControl = 50031
+    StatusBarControl = 50017
+    TabControl = 50018
+    TabItemControl = 50019
+    TableControl = 50036
+    TextControl = 50020
+    ThumbControl = 50027
+    TitleBarControl = 50037
+    ToolBarControl = 50021
+    ToolTipControl = 50022
+    TreeControl = 50023
+    TreeItemControl = 50024
+    WindowControl = 50032
+
+
+ControlTypeNames = {
+    ControlType.AppBarControl: 'AppBarControl',
+    ControlType.ButtonControl: 'ButtonControl',
+    ControlType.CalendarControl: 'CalendarControl',
+    ControlType.CheckBoxControl: 'CheckBoxControl',
+    ControlType.ComboBoxControl: 'ComboBoxControl',
+    ControlType.CustomControl: 'CustomControl',
+    ControlType.DataGridControl: 'DataGridControl',
+    ControlType.DataItemControl: 'DataItemControl',
+    ControlType.DocumentControl: 'DocumentControl',
+    ControlType.EditControl: 'EditControl',
+    ControlType.GroupControl: 'GroupControl',
+    ControlType.HeaderControl: 'HeaderControl',
+    ControlType.HeaderItemControl: 'HeaderItemControl',
+    ControlType.HyperlinkControl: 'HyperlinkControl',
+    ControlType.ImageControl: 'ImageControl',
+    ControlType.ListControl: 'ListControl',
+    ControlType.ListItemControl: 'ListItemControl',
+    ControlType.MenuBarControl: 'MenuBarControl',
+    ControlType.MenuControl: 'MenuControl',
+    ControlType.MenuItemControl: 'MenuItemControl',
+    ControlType.PaneControl: 'PaneControl',
+    ControlType.ProgressBarControl: 'ProgressBarControl',
+    ControlType.RadioButtonControl: 'RadioButtonControl',
+    ControlType.ScrollBarControl: 'ScrollBarControl',
+    ControlType.SemanticZoomControl: 'SemanticZoomControl',
+    ControlType.SeparatorControl: 'SeparatorControl',
+    ControlType.SliderControl: 'SliderControl',
+    ControlType.SpinnerControl: 'SpinnerControl',
+    ControlType.SplitButtonControl: 'SplitButtonControl',
+    ControlType.StatusBarControl: 'StatusBarControl',
+    ControlType.TabControl: 'TabControl',
+    ControlType.TabItemControl: 'TabItemControl',
+    ControlType.TableControl: 'TableControl',
+    ControlType.TextControl: 'TextControl',
+    ControlType.ThumbControl: 'ThumbControl',
+    ControlType.TitleBarControl: 'TitleBarControl',
+    ControlType.ToolBarControl: 'ToolBarControl',
+    ControlType.ToolTipControl: 'ToolTipControl',
+    ControlType.TreeControl: 'TreeControl',
+    ControlType.TreeItemControl: 'TreeItemControl',
+    ControlType.WindowControl: 'WindowControl',
+}
+
+
+class TreeScope:
+    """
+    TreeScope from IUIAutomation.
+    Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/ne-uiautomationclient-treescope
+    """
+    Element = 1
+    Children = 2
+    Descendants = 4
+    Parent = 8
+    Ancestors = 16
+    Subtree = 7
+
+
+class StructureChangeType:
+    """
+    StructureChangeType from IUIAutomation.
+    Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationcore/ne-uiautomationcore-structurechangetype
+    """
+    ChildAdded = 0
+    ChildRemoved = 1
+    ChildrenInvalidated = 2
+    ChildrenBulkAdded = 3
+    ChildrenBulkRemoved = 4
+    ChildrenReordered = 5
+
+
+class Rect():
+    """
+    class Rect, like `ctypes.wintypes.RECT`.
+    """
+    def __init__(self, left: int = 0, top: int = 0, right: int = 0, bottom: int = 0):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+
+    def width(self) -> int:
+        return self.right - self.left
+
+    def height(self) -> int:
+        return self.bottom - self.top
+
+    def xcenter(self) -> int:
+        return self.left + self.width() // 2
+
+    def ycenter(self) -> int:
+        return self.top + self.height() // 2
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.left <= x < self.right and self.top <= y < self.bottom
+    
+    def __eq__(self, rect):
+        return self.left == rect.left and self.top == rect.top and self.right == rect.right and self.bottom == rect.bottom
+
+    def __str__(self) -> str:
+        return '({},{},{},{})[{}x{}]'.format(self.left, self.top, self.right, self.bottom, self.width(), self.height())
+
+    def __repr__(self) -> str:
+        return '{}({},{},{},{})[{}x{}]'.format(self.__class__.__name__, self.left, self.top, self.right, self.bottom, self.width(), self.height())
+
+
+class UIACallCounter:
+    """
+    按线程统计 UIA 调用次数，供追踪（``wxauto4.utils.trace``）计算每个操作的调用量。
+
+    只在 ``enabled`` 为 True 时计数，调用方在计数前先检查 ``enabled``，关闭时只多一次属性读取：
+
+    - ``com``：经由控件发出的跨进程调用（真实后端为每次访问 ``Control.Element``）；
+    - ``property``：其中读取控件属性（Name、ClassName、BoundingRectangle 等）的次数。
+    """
+    enabled = False
+
+    _local = threading.local()
+
+    @classmethod
+    def com(cls, n: int = 1) -> None:
+        local = cls._local
+        local.com = getattr(local, 'com', 0) + n
+
+    @classmethod
+    def property(cls, n: int = 1) -> None:
+        local = cls._local
+        local.property = getattr(local, 'property', 0) + n
+
+    @classmethod
+    def snapshot(cls) -> tuple:
+        """当前线程累计的 (com, property) 调用次数"""
+        local = cls._local
+        return getattr(local, 'com', 0), getattr(local, 'property', 0)
+
+
+class WindowFrameCache:
+    """
+    顶层窗口截图缓存，让同一批消息的截图共用一帧窗口画面。
+
+    仅在 :meth:`batch` 的作用域内生效（按线程隔离），每个最外层批次都从空缓存开始，出现以下情况时重新截取整个窗口：
+
+    - 窗口矩形变化（移动或缩放）；
+    - 滚动代数变化：滚轮与按键输入都会调用 :meth:`invalidate`；
+    - 嵌套批次的 ``key`` 与当前不同，例如消息列表中的消息数量或最后一条消息变了；
+    - 缓存帧超过 ``max_age`` 秒，默认 ``WxParam.FRAME_CACHE_MAX_AGE``。
+
+    用法::
+
+        with WindowFrameCache.batch():
+            for control in controls:
+                control.ScreenShot(return_img=True)
+    """
+    _local = threading.local()
+    _generation = 0
+    _generation_lock = threading.Lock()
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """窗口内容可能发生滚动，使所有线程已缓存的帧失效"""
+        with cls._generation_lock:
+            cls._generation += 1
+
+    @classmethod
+    @contextmanager
+    def batch(cls, max_age: float = None, key=None):
+        """在当前线程开启帧缓存，可嵌套，最外层退出时释放缓存的帧
+
+        Args:
+            max_age (float, optional): 缓存帧的最长使用时间，单位秒，默认 WxParam.FRAME_CACHE_MAX_AGE
+            key (optional): 窗口内容的标识，嵌套批次的 key 与当前不同时丢弃已缓存的帧
+        """
+        local = cls._local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            if max_age is None:
+                from wxauto4.param import WxParam
+                max_age = WxParam.FRAME_CACHE_MAX_AGE
+            local.frames = {}
+            local.max_age = max_age
+            local.key = key
+            local.hits = local.misses = 0
+        elif key is not None and key != local.key:
+            local.frames = {}
+            local.key = key
+        local.depth = depth + 1
+        try:
+            yield cls
+        finally:
+            local.depth -= 1
+            if local.depth == 0:
+                local.frames = {}
+
+    @classmethod
+    def active(cls) -> bool:
+        return getattr(cls._local, 'depth', 0) > 0
+
+    @classmethod
+    def get(cls, hwnd: int, window_rect: tuple):
+        """返回仍然有效的窗口帧，没有开启缓存或已失效时返回 None"""
+        if not cls.active():
+            return None
+        local = cls._local
+        frame = local.frames.get(hwnd)
+        if frame is not None:
+            rect, generation, captured, img = frame
+            if (
+                rect == tuple(window_rect)
+                and generation == cls._generation
+                and time.time() - captured <= local.max_age
+            ):
+                local.hits += 1
+                return img
+            del local.frames[hwnd]
+        local.misses += 1
+        return None
+
+    @classmethod
+    def put(cls, hwnd: int, window_rect: tuple, img) -> None:
+        """缓存窗口帧，没有开启缓存时忽略"""
+        if cls.active():
+            cls._local.frames[hwnd] = (tuple(window_rect), cls._generation, time.time(), img)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """当前线程本批次的命中统计"""
+        local = cls._local
+        return {'hits': getattr(local, 'hits', 0), 'misses': getattr(local, 'misses', 0)}
+
+
+def RollIntoView(win, ele, equal=True, bias=0):
+    """
+    将目标元素滚动到主窗口内可见区域
+    
+    参数:
+        win: 主窗口元素 (uiautomation.Control对象)
+        ele: 目标元素 (uiautomation.Control对象)  
+        bias: 偏移量，元素边缘需要超过这个量才算完全在窗口内 (默认为0)
+    """
+    # 获取窗口和元素的边界矩形
+    win_rect = win.BoundingRectangle
+    ele_rect = ele.BoundingRectangle
+    
+    # 计算窗口的有效显示区域（考虑bias偏移）
+    win_top = win_rect.top + bias
+    win_bottom = win_rect.bottom - bias
+    win_height = win_bottom - win_top
+    
+    # 获取元素的位置信息
+    ele_top = ele_rect.top
+    ele_bottom = ele_rect.bottom
+    ele_height = ele_rect.height()
+    ele_ycenter = ele_rect.ycenter()
+    
+    # 如果元素高度超过窗口高度，只需要确保元素中心在窗口内
+    if ele_height > win_height:
+        # 元素太高，只需要中心点在窗口内即可
+        target_top = ele_ycenter
+        target_bottom = ele_ycenter
+    else:
+        # 元素高度适中，需要整个元素都在窗口内
+        target_top = ele_top
+        target_bottom = ele_bottom
+    
+    # 执行滚动操作
+    max_attempts = 100  # 防止无限循环
+    attempt = 0
+    
+    while attempt < max_attempts:
+        # 重新获取当前位置（滚动后位置会变化）
+        current_ele_rect = ele.BoundingRectangle
+        
+        if ele_height > win_height:
+            # 元素太高的情况，检查中心点
+            current_ycenter = current_ele_rect.ycenter()
+            if win_top <= current_ycenter <= win_bottom:
+                break  # 中心点已在窗口内，停止滚动
+                
+            if current_ycenter < win_top:
+                # 中心点在窗口上方，需要向下滚动
+                # print('下滚动')
+                win.WheelUp()
+                time.sleep(0.1)
+            elif current_ycenter > win_bottom:
+                # 中心点在窗口下方，需要向上滚动  
+                # print('上滚动')
+                win.WheelDown()
+                time.sleep(0.1)
+        else:
+            # 元素高度适中的情况，检查整个元素
+            current_top = current_ele_rect.top
+            current_bottom = current_ele_rect.bottom
+            
+            # 检查是否已经完全在窗口内
+            if win_top <= current_top and current_bottom <= win_bottom:
+                break  # 元素已完全在窗口内，停止滚动
+            
+            if current_top < win_top:
+                # 元素顶部在窗口上方，需要向下滚动
+                # print('下滚动')
+                win.WheelUp()
+                time.sleep(0.1)
+            elif current_bottom > win_bottom:
+                # 元素底部在窗口下方，需要向上滚动
+                # print('上滚动')
+                win.WheelDown()
+                time.sleep(0.1)
+            else:
+                # 理论上不应该到达这里
+                break
+        
+        attempt += 1
+    
+    if attempt >= max_attempts:
+        print(f"Warning: 滚动操作达到最大尝试次数({max_attempts})，可能元素无法完全滚动到视图内")
+
+def CheckElementPosition(win, ele, bias=0):
+    """
+    判断目标元素相对于主窗口的位置关系
+    
+    参数:
+        win: 主窗口元素 (uiautomation.Control对象)
+        ele: 目标元素 (uiautomation.Control对象)
+        bias: 偏移量，调整判断的边界 (默认为0)
+    
+    返回:
+        dict: 包含各种位置关系判断结果的字典
+    """
+    # 获取窗口和元素的边界矩形
+    win_rect = win.BoundingRectangle
+    ele_rect = ele.BoundingRectangle
+    
+    # 计算实际的判断边界（考虑bias）
+    win_top = win_rect.top + bias
+    win_bottom = win_rect.bottom - bias
+    win_left = win_rect.left + bias
+    win_right = win_rect.right - bias
+    
+    # 元素的边界
+    ele_top = ele_rect.top
+    ele_bottom = ele_rect.bottom
+    ele_left = ele_rect.left
+    ele_right = ele_rect.right
+    
+    # 各种位置关系判断
+    result = {
+        # 垂直方向的关系
+        'ele_top_above_win_top': ele_top < win_top,                    # ele顶部高于win顶部
+        'ele_bottom_below_win_bottom': ele_bottom > win_bottom,        # ele底部低于win底部
+        'ele_completely_above_win': ele_bottom <= win_top,             # ele完全在win上方
+        'ele_completely_below_win': ele_top >= win_bottom,             # ele完全在win下方
+        'ele_vertically_inside_win': win_top <= ele_top and ele_bottom <= win_bottom,  # ele垂直方向完全在win内
+        'win_vertically_inside_ele': ele_top <= win_top and win_bottom <= ele_bottom,  # win垂直方向完全在ele内
+        
+        # 水平方向的关系
+        'ele_left_before_win_left': ele_left < win_left,              # ele左边在win左边之前
+        'ele_right_after_win_right': ele_right > win_right,           # ele右边在win右边之后
+        'ele_completely_left_of_win': ele_right <= win_left,          # ele完全在win左侧
+        'ele_completely_right_of_win': ele_left >= win_right,         # ele完全在win右侧
+        'ele_horizontally_inside_win': win_left <= ele_left and ele_right <= win_right,  # ele水平方向完全在win内
+        'win_horizontally_inside_ele': ele_left <= win_left and win_right <= ele_right,  # win水平方向完全在ele内
+        
+        # 综合关系
+        'ele_completely_inside_win': False,                           # ele完全在win内部
+        'win_completely_inside_ele': False,                           # win完全在ele内部
+        'ele_and_win_overlap': False,                                 # ele和win有重叠
+        'ele_and_win_separate': False,                                # ele和win完全分离
+    }
+    
+    # 计算综合关系
+    result['ele_completely_inside_win'] = (result['ele_vertically_inside_win'] and 
+                                          result['ele_horizontally_inside_win'])
+    
+    result['win_completely_inside_ele'] = (result['win_vertically_inside_ele'] and 
+                                          result['win_horizontally_inside_ele'])
+    
+    # 判断是否有重叠（在两个方向上都有重叠）
+    vertical_overlap = not (result['ele_completely_above_win'] or result['ele_completely_below_win'])
+    horizontal_overlap = not (result['ele_completely_left_of_win'] or result['ele_completely_right_of_win'])
+    result['ele_and_win_overlap'] = vertical_overlap and horizontal_overlap
+    
+    # 判断是否完全分离
+    result['ele_and_win_separate'] = not result['ele_and_win_overlap']
+    
+    return result
+
+
+def IsElementInWindow(win, ele, bias=0):
+    """
+    简化版本：判断元素是否在窗口内（仅垂直方向）
+    
+    参数:
+        win: 主窗口元素 (uiautomation.Control对象)
+        ele: 目标元素 (uiautomation.Control对象)
+        bias: 偏移量 (默认为0)
+    
+    返回:
+        bool: True表示元素在窗口内，False表示不在
+    """
+    position_info = CheckElementPosition(win, ele, bias)
+    return position_info['ele_vertically_inside_win']
+
+
+def GetElementPositionDescription(win, ele, bias=0):
+    """
+    获取元素位置的文字描述
+    
+    参数:
+        win: 主窗口元素 (uiautomation.Control对象)
+        ele: 目标元素 (uiautomation.Control对象)
+        bias: 偏移量 (默认为0)
+    
+    返回:
+        str: 位置关系的文字描述
+    """
+    result = CheckElementPosition(win, ele, bias)
+    
+    if result['ele_completely_inside_win']:
+        return "元素完全在窗口内部"
+    elif result['win_completely_inside_ele']:
+        return "窗口完全在元素内部"
+    elif result['ele_completely_above_win']:
+        return "元素完全在窗口上方"
+    elif result['ele_completely_below_win']:
+        return "元素完全在窗口下方"
+    elif result['ele_completely_left_of_win']:
+        return "元素完全在窗口左侧"
+    elif result['ele_completely_right_of_win']:
+        return "元素完全在窗口右侧"
+    elif result['ele_and_win_overlap']:
+        descriptions = []
+        if result['ele_top_above_win_top']:
+            descriptions.append("元素顶部高于窗口顶部")
+        if result['ele_bottom_below_win_bottom']:
+            descriptions.append("元素底部低于窗口底部")
+        if result['ele_left_before_win_left']:
+            descriptions.append("元素左边超出窗口左边")
+        if result['ele_right_after_win_right']:
+            descriptions.append("元素右边超出窗口右边")
+        
+        if descriptions:
+            return "元素与窗口重叠，" + "，".join(descriptions)
+        else:
+            return "元素与窗口重叠"
+    else:
+        return "元素与窗口完全分离"
@@ -0,0 +1,1696 @@
+"""纯 Python 的模拟桌面与微信 4.1 控件树。
+
+模拟后端按 ``wxauto4.ui_config.WxUI41Config`` 中的类名搭建控件树，接口与 ``uiautomation.Control``
+保持一致，使 ``wxauto4.ui``、``wxauto4.msgs`` 的代码可以在 Linux/CI 上原样运行，
+用于回归测试与热点路径的性能测试。
+
+示例::
+
+    from wxauto4 import uia, WeChat
+    from wxauto4.uia.simulated import SimulatedBackend
+
+    backend = SimulatedBackend.wechat(history=200)
+    uia.set_backend(backend)
+    wx = WeChat()
+    backend.app.receive_message('张三', '你好')
+    backend.app.start_traffic(rate=20)
+
+说明：
+
+- 属性读取、树遍历等“跨进程调用”都会计入 ``SimDesktop.stats['calls']``，便于比较优化前后的调用次数；
+  ``SimDesktop.call_latency`` 可为每次调用注入固定延时，模拟真实 UIA 的开销；
+- 消息列表按 ``message_capacity`` 做虚拟化，每个列表项拥有稳定的 runtimeid；
+- 所有树操作都在 ``SimDesktop.lock`` 下进行，可以在后台线程持续注入消息。
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw
+
+from wxauto4.ui_config import WxUI41Config
+from .backend import UIABackend
+from .common import ControlType, ControlTypeNames, Rect, StructureChangeType, UIACallCounter, WindowFrameCache
+
+
+SCREEN_SIZE = (1920, 1080)
+CF_UNICODETEXT = '13'
+CF_HDROP = '15'
+OBJECT_REPLACEMENT_CHAR = '￼'
+
+BACKGROUND_COLOR = (245, 245, 245)
+FRIEND_BUBBLE_COLOR = (255, 255, 255)
+SELF_BUBBLE_COLOR = (149, 236, 105)
+
+_MODIFIER_KEYS = {'CTRL', 'ALT', 'SHIFT', 'WIN'}
+_KEY_ALIASES = {
+    'ESCAPE': 'ESC',
+    'DEL': 'DELETE',
+    'BACKSPACE': 'BACK',
+    'RETURN': 'ENTER',
+}
+
+
+def _copy_rect(rect: Rect) -> Rect:
+    return Rect(rect.left, rect.top, rect.right, rect.bottom)
+
+
+def ParseKeys(text: str) -> List[Tuple[frozenset, str]]:
+    """把 ``uiautomation.SendKeys`` 语法解析为 ``(修饰键, 按键)`` 序列。
+
+    ``{Ctrl}a`` -> ``[({'CTRL'}, 'a')]``，``{Esc}`` -> ``[(set(), 'ESC')]``，普通字符原样输出。
+    """
+    keys = []
+    modifiers = set()
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '{':
+            end = text.find('}', i + 1)
+            if end > i + 1:
+                name = text[i + 1:end].split(' ')[0].upper()
+                name = _KEY_ALIASES.get(name, name)
+                i = end + 1
+                if name in _MODIFIER_KEYS:
+                    modifiers.add(name)
+                    continue
+                keys.append((frozenset(modifiers), name))
+                modifiers = set()
+                continue
+        keys.append((frozenset(modifiers), char.lower() if modifiers else char))
+        modifiers = set()
+        i += 1
+    return keys
+
+
+# region --- 控件树 -------------------------------------------------------------
+class SimElement:
+    """模拟的 UIA 元素（树节点）。
+
+    ``behaviors`` 保存交互回调，键为 ``click``、``double_click``、``right_click``、``middle_click``、
+    ``wheel``、``key``、``changed``、``submit`` 等，回调签名为 ``handler(element, **kwargs)``。
+    """
+
+    _runtime_ids = itertools.count(1)
+
+    def __init__(
+            self,
+            control_type: int,
+            name: str = '',
+            class_name: str = '',
+            automation_id: str = '',
+            rect: Rect = None,
+            fill: Tuple[int, int, int] = None,
+            value: str = None,
+            **behaviors: Callable
+        ):
+        self.control_type = control_type
+        self.name = name
+        self.class_name = class_name
+        self.automation_id = automation_id
+        self.rect = rect or Rect()
+        self.fill = fill
+        self.value = value
+        self.attachments: List[str] = []
+        self.selected = False
+        self.behaviors: Dict[str, Callable] = dict(behaviors)
+        self.parent: Optional[SimElement] = None
+        self.children: List[SimElement] = []
+        self.runtime_id = (42, next(SimElement._runtime_ids))
+        self.alive = True
+        self.data: Dict[str, Any] = {}
+
+    def __repr__(self):
+        return f'<SimElement {ControlTypeNames.get(self.control_type, "Control")} {self.class_name!r} {self.name[:20]!r}>'
+
+    @property
+    def is_edit(self) -> bool:
+        return self.control_type == ControlType.EditControl
+
+    @property
+    def window(self) -> Optional['SimWindow']:
+        element = self
+        while element is not None and not isinstance(element, SimWindow):
+            element = element.parent
+        return element
+
+    def add(self, child: 'SimElement', index: int = None) -> 'SimElement':
+        if child.parent is not None:
+            child.parent.children.remove(child)
+        child.parent = self
+        if index is None:
+            self.children.append(child)
+        else:
+            self.children.insert(index, child)
+        child._revive()
+        self._structure_changed(StructureChangeType.ChildAdded)
+        return child
+
+    def remove(self, child: 'SimElement') -> None:
+        if child in self.children:
+            self.children.remove(child)
+        child.parent = None
+        child._kill()
+        self._structure_changed(StructureChangeType.ChildRemoved)
+
+    def _structure_changed(self, change_type: int) -> None:
+        window = self.window
+        desktop = window.desktop if window is not None else None
+        if desktop is not None and desktop.structure_handlers:
+            desktop.raise_structure_changed(self, change_type)
+
+    def clear(self) -> None:
+        for child in list(self.children):
+            self.remove(child)
+
+    def _kill(self):
+        self.alive = False
+        for child in self.children:
+            child._kill()
+
+    def _revive(self):
+        self.alive = True
+        for child in self.children:
+            child._revive()
+
+    def walk(self, max_depth: int = 0xFFFFFFFF, depth: int = 0) -> Iterator[Tuple['SimElement', int]]:
+        """先序遍历子孙节点，与 ``uiautomation.WalkTree`` 的顺序一致"""
+        if depth >= max_depth:
+            return
+        for child in list(self.children):
+            yield child, depth + 1
+            yield from child.walk(max_depth, depth + 1)
+
+    def offset(self, dx: int, dy: int) -> None:
+        self.rect = Rect(self.rect.left + dx, self.rect.top + dy, self.rect.right + dx, self.rect.bottom + dy)
+        for child in self.children:
+            child.offset(dx, dy)
+
+    def element_from_point(self, x: int, y: int) -> Optional['SimElement']:
+        if not self.rect.contains(x, y):
+            return None
+        for child in reversed(self.children):
+            found = child.element_from_point(x, y)
+            if found is not None:
+                return found
+        return self
+
+
+class SimWindow(SimElement):
+    """模拟的顶层窗口"""
+
+    _handles = itertools.count(0x20010, 2)
+
+    def __init__(
+            self,
+            name: str,
+            class_name: str,
+            win_class: str,
+            rect: Rect,
+            pid: int = 0,
+            popup: bool = False,
+            **kwargs
+        ):
+        super().__init__(ControlType.WindowControl, name, class_name, rect=rect, **kwargs)
+        self.hwnd = next(SimWindow._handles)
+        self.win_class = win_class
+        self.pid = pid
+        self.popup = popup
+        self.visible = True
+        self.minimized = False
+        self.desktop: Optional[SimDesktop] = None
+
+
+class SimDesktop:
+    """模拟桌面：管理顶层窗口、z 序、前台窗口、焦点与剪贴板"""
+
+    def __init__(self, size: Tuple[int, int] = SCREEN_SIZE, call_latency: float = 0.0, input_delay: float = 0.0):
+        self.size = size
+        self.root = SimElement(ControlType.PaneControl, '桌面 1', '#32769', rect=Rect(0, 0, size[0], size[1]))
+        self.lock = threading.RLock()
+        self.clipboard: Dict[str, Any] = {}
+        self.focus: Optional[SimElement] = None
+        self.foreground = 0
+        self.stats = Counter()
+        self.call_latency = call_latency
+        self.input_delay = input_delay
+        self.structure_handlers: Dict[int, Tuple[SimElement, Callable[[int], None]]] = {}
+        self.window_handlers: Dict[int, Callable[[int], None]] = {}
+        self._handler_ids = itertools.count(1)
+
+    # region 计数
+    def count(self, kind: str = 'calls', n: int = 1) -> None:
+        self.stats[kind] += n
+        if kind == 'calls' and UIACallCounter.enabled:
+            UIACallCounter.com(n)
+        if kind == 'calls' and self.call_latency:
+            time.sleep(self.call_latency * n)
+
+    def _input_done(self):
+        self.stats['inputs'] += 1
+        if self.input_delay:
+            time.sleep(self.input_delay)
+    # endregion
+
+    # region 事件
+    def add_structure_handler(self, element: SimElement, callback: Callable[[int], None]) -> int:
+        with self.lock:
+            token = next(self._handler_ids)
+            self.structure_handlers[token] = (element, callback)
+            return token
+
+    def remove_structure_handler(self, token: int) -> None:
+        with self.lock:
+            self.structure_handlers.pop(token, None)
+
+    def raise_structure_changed(self, parent: SimElement, change_type: int) -> None:
+        """parent 的子节点发生变化，通知订阅了 parent 本身或其父节点的回调（Element | Children）"""
+        for element, callback in list(self.structure_handlers.values()):
+            if element is parent or element is parent.parent:
+                try:
+                    callback(change_type)
+                except Exception:
+                    pass
+        self.stats['events'] += 1
+    # endregion
+
+    # region 窗口
+    @property
+    def windows(self) -> List[SimWindow]:
+        """顶层窗口，按 z 序从上到下排列"""
+        with self.lock:
+            return list(self.root.children)
+
+    def window(self, hwnd: int) -> Optional[SimWindow]:
+        for win in self.windows:
+            if win.hwnd == hwnd:
+                return win
+        return None
+
+    def add_window(self, win: SimWindow, activate: bool = True) -> SimWindow:
+        with self.lock:
+            win.desktop = self
+            self.root.add(win, 0)
+            if activate:
+                self.activate(win)
+        for callback in list(self.window_handlers.values()):
+            try:
+                callback(win.hwnd)
+            except Exception:
+                pass
+        return win
+
+    def add_window_handler(self, callback: Callable[[int], None]) -> int:
+        token = next(self._handler_ids)
+        with self.lock:
+            self.window_handlers[token] = callback
+        return token
+
+    def remove_window_handler(self, token: int) -> None:
+        with self.lock:
+            self.window_handlers.pop(token, None)
+
+    def close_window(self, win: SimWindow) -> None:
+        with self.lock:
+            if win.parent is not self.root:
+                return
+            if self.focus is not None and self.focus.window is win:
+                self.focus = None
+            self.root.remove(win)
+            handler = win.behaviors.get('closed')
+            if handler:
+                handler(win)
+            if self.foreground == win.hwnd:
+                visible = [w for w in self.root.children if w.visible and not w.minimized]
+                self.foreground = visible[0].hwnd if visible else 0
+
+    def close_popups(self, keep: SimWindow = None) -> None:
+        with self.lock:
+            for win in self.windows:
+                if win.popup and win is not keep:
+                    self.close_window(win)
+
+    def activate(self, win: SimWindow) -> None:
+        with self.lock:
+            win.visible = True
+            win.minimized = False
+            if win.parent is self.root:
+                self.root.children.remove(win)
+                self.root.children.insert(0, win)
+            self.foreground = win.hwnd
+
+    def center(self, win: SimWindow) -> None:
+        with self.lock:
+            width, height = win.rect.width(), win.rect.height()
+            x = (self.size[0] - width) // 2
+            y = (self.size[1] - height) // 2
+            win.offset(x - win.rect.left, y - win.rect.top)
+
+    def element_from_point(self, x: int, y: int) -> Optional[SimElement]:
+        with self.lock:
+            for win in self.root.children:
+                if win.visible and not win.minimized and win.rect.contains(x, y):
+                    return win.element_from_point(x, y)
+        return None
+    # endregion
+
+    # region 输入
+    def dispatch(self, element: SimElement, event: str, bubble: bool = False, **kwargs) -> Any:
+        """把交互事件交给元素的回调处理，``bubble`` 为 True 时沿父节点向上查找回调"""
+        target = element
+        while target is not None:
+            handler = target.behaviors.get(event)
+            if handler is not None:
+                return handler(target, **kwargs)
+            if not bubble:
+                break
+            target = target.parent
+        return None
+
+    def click(self, element: SimElement, event: str = 'click') -> None:
+        with self.lock:
+            win = element.window
+            self.close_popups(keep=win if win is not None and win.popup else None)
+            if win is not None and win.parent is self.root and not win.popup:
+                self.activate(win)
+            if element.is_edit:
+                self.focus = element
+            self.dispatch(element, event)
+        self._input_done()
+
+    def click_at(self, x: int, y: int, event: str = 'click') -> None:
+        element = self.element_from_point(x, y)
+        if element is None:
+            self.close_popups()
+            return
+        self.click(element, event)
+
+    def wheel(self, element: SimElement, delta: int) -> None:
+        WindowFrameCache.invalidate()
+        with self.lock:
+            self.dispatch(element, 'wheel', bubble=True, delta=delta)
+        self._input_done()
+
+    def send_keys(self, element: SimElement, text: str) -> None:
+        WindowFrameCache.invalidate()
+        with self.lock:
+            self.focus = element
+            for modifiers, key in ParseKeys(text):
+                if element.is_edit and self._edit_key(element, modifiers, key):
+                    continue
+                self.dispatch(element, 'key', bubble=True, modifiers=modifiers, key=key)
+        self._input_done()
+
+    def _edit_key(self, element: SimElement, modifiers: frozenset, key: str) -> bool:
+        """编辑框的默认按键行为，返回 False 表示交给上层回调处理"""
+        value = element.value or ''
+        if 'CTRL' in modifiers:
+            if key == 'a':
+                element.selected = True
+                return True
+            if key == 'c':
+                self.clipboard = {CF_UNICODETEXT: value}
+                return True
+            if key == 'v':
+                if element.selected:
+                    value, element.attachments = '', []
+                if CF_HDROP in self.clipboard:
+                    files = list(self.clipboard[CF_HDROP])
+                    element.attachments.extend(files)
+                    value += OBJECT_REPLACEMENT_CHAR * len(files)
+                elif CF_UNICODETEXT in self.clipboard:
+                    value += str(self.clipboard[CF_UNICODETEXT])
+                self._set_value(element, value)
+                return True
+            return False
+        if key in ('DELETE', 'BACK'):
+            if element.selected:
+                element.attachments = []
+                self._set_value(element, '')
+            elif key == 'BACK' and value:
+                if value[-1] == OBJECT_REPLACEMENT_CHAR and element.attachments:
+                    element.attachments.pop()
+                self._set_value(element, value[:-1])
+            return True
+        if key == 'ENTER':
+            if not self.dispatch(element, 'submit'):
+                return False
+            return True
+        if len(key) == 1:
+            self._set_value(element, ('' if element.selected else value) + key)
+            return True
+        if key in ('HOME', 'END', 'LEFT', 'RIGHT', 'UP', 'DOWN'):
+            element.selected = False
+            return True
+        return False
+
+    def _set_value(self, element: SimElement, value: str) -> None:
+        element.value = value
+        element.selected = False
+        self.dispatch(element, 'changed')
+    # endregion
+
+    # region 截图
+    def render(self, element: SimElement, bbox: Tuple[int, int, int, int]) -> Image.Image:
+        """按元素的 ``fill`` 颜色绘制 bbox 区域"""
+        left, top, right, bottom = bbox
+        with self.lock:
+            background = element.fill
+            parent = element.parent
+            while background is None and parent is not None:
+                background = parent.fill
+                parent = parent.parent
+            img = Image.new('RGB', (max(right - left, 1), max(bottom - top, 1)), background or BACKGROUND_COLOR)
+            draw = ImageDraw.Draw(img)
+            for child, _ in element.walk():
+                rect = child.rect
+                if child.fill is None or rect.right <= left or rect.left >= right or rect.bottom <= top or rect.top >= bottom:
+                    continue
+                draw.rectangle(
+                    (rect.left - left, rect.top - top, rect.right - left - 1, rect.bottom - top - 1),
+                    fill=child.fill
+                )
+        self.stats['screenshots'] += 1
+        return img
+    # endregion
+
+
+def _current_desktop() -> SimDesktop:
+    from .backend import get_backend
+
+    backend = get_backend()
+    desktop = getattr(backend, 'desktop', None)
+    if desktop is None:
+        raise LookupError('当前 uia 后端不是 SimulatedBackend')
+    return desktop
+# endregion
+
+
+# region --- 控件接口 -----------------------------------------------------------
+class _SimValuePattern:
+    def __init__(self, control: 'SimControl'):
+        self._control = control
+
+    @property
+    def Value(self) -> str:
+        element = self._control.Element
+        self._control._desktop.count()
+        return element.value or ''
+
+    def SetValue(self, value: str) -> bool:
+        desktop = self._control._desktop
+        with desktop.lock:
+            desktop._set_value(self._control.Element, value)
+        return True
+
+
+class SimControl:
+    """与 ``uiautomation.Control`` 接口一致的模拟控件"""
+
+    ValidKeys = {'ControlType', 'ClassName', 'AutomationId', 'Name', 'SubName', 'RegexName', 'Depth', 'Compare'}
+
+    def __init__(
+            self,
+            searchFromControl: 'SimControl' = None,
+            searchDepth: int = 0xFFFFFFFF,
+            searchInterval: float = 0.5,
+            foundIndex: int = 1,
+            element: SimElement = None,
+            desktop: SimDesktop = None,
+            **searchProperties
+        ):
+        self.searchFromControl = searchFromControl
+        self.searchDepth = searchProperties.get('Depth', searchDepth)
+        self.searchInterval = searchInterval
+        self.foundIndex = foundIndex
+        self.searchProperties = searchProperties
+        regName = searchProperties.get('RegexName', '')
+        self.regexName = re.compile(regName) if regName else None
+        self._element = element
+        self._elementDirectAssign = element is not None
+        self._cachedProperties = None
+        if desktop is None and searchFromControl is not None:
+            desktop = searchFromControl._desktop
+        self._desktop = desktop or _current_desktop()
+
+    def __repr__(self):
+        return f'<SimControl {self.ControlTypeName} {self.searchProperties or self._element}>'
+
+    def __eq__(self, other):
+        if not isinstance(other, SimControl):
+            return False
+        return self.Element is other.Element
+
+    def __hash__(self):
+        return id(self)
+
+    def _wrap(self, element: Optional[SimElement]) -> Optional['SimControl']:
+        if element is None:
+            return None
+        return SimControl(element=element, desktop=self._desktop)
+
+    # region 查找
+    def _CompareFunction(self, element: SimElement, depth: int) -> bool:
+        for key, value in self.searchProperties.items():
+            if key == 'ControlType':
+                if value != element.control_type:
+                    return False
+            elif key == 'ClassName':
+                if value != element.class_name:
+                    return False
+            elif key == 'AutomationId':
+                if value != element.automation_id:
+                    return False
+            elif key == 'Name':
+                if value != element.name:
+                    return False
+            elif key == 'SubName':
+                if value not in element.name:
+                    return False
+            elif key == 'RegexName':
+                if not self.regexName.match(element.name):
+                    return False
+            elif key == 'Depth':
+                if value != depth:
+                    return False
+            elif key == 'Compare':
+                if not value(self._wrap(element), depth):
+                    return False
+        return True
+
+    def _find(self) -> Optional[SimElement]:
+        if self.searchFromControl is not None:
+            if not self.searchFromControl.Exists(0):
+                return None
+            root = self.searchFromControl._element
+        else:
+            root = self._desktop.root
+        desktop = self._desktop
+        found = 0
+        traversed = 0
+        with desktop.lock:
+            for element, depth in root.walk(self.searchDepth):
+                traversed += 1
+                if self._CompareFunction(element, depth):
+                    found += 1
+                    if found == self.foundIndex:
+                        desktop.count(n=traversed)
+                        return element
+        desktop.count(n=traversed)
+        return None
+
+    @property
+    def Element(self) -> SimElement:
+        if self._element is None:
+            self.Refind(maxSearchSeconds=0)
+        return self._element
+
+    def Exists(self, maxSearchSeconds: float = 5, searchIntervalSeconds: float = 0.5, printIfNotExist: bool = False) -> bool:
+        if self._element is not None and self._elementDirectAssign:
+            return self._element.alive
+        if not self.searchProperties:
+            raise LookupError("control's searchProperties must not be empty!")
+        self._element = None
+        start = time.monotonic()
+        while True:
+            element = self._find()
+            if element is not None:
+                self._element = element
+                return True
+            remain = start + maxSearchSeconds - time.monotonic()
+            if remain <= 0:
+                return False
+            time.sleep(min(remain, searchIntervalSeconds))
+
+    def Disappears(self, maxSearchSeconds: float = 5, searchIntervalSeconds: float = 0.5, printIfNotDisappear: bool = False) -> bool:
+        start = time.monotonic()
+        while True:
+            if not self.Exists(0, 0):
+                return True
+            remain = start + maxSearchSeconds - time.monotonic()
+            if remain <= 0:
+                return False
+            time.sleep(min(remain, searchIntervalSeconds))
+
+    def Refind(self, maxSearchSeconds: float = 0, searchIntervalSeconds: float = 0.5, raiseException: bool = True) -> bool:
+        if not self.Exists(maxSearchSeconds, searchIntervalSeconds):
+            if raiseException:
+                raise LookupError(f'Find Control Timeout: {self.searchProperties}')
+            return False
+        return True
+    # endregion
+
+    # region 属性
+    def _GetCachedProperty(self, name: str) -> Any:
+        if self._cachedProperties:
+            return self._cachedProperties.get(name)
+        return None
+
+    def ClearPropertyCache(self) -> None:
+        self._cachedProperties = None
+
+    def _live(self, attr: str) -> Any:
+        element = self.Element
+        self._desktop.count()
+        if UIACallCounter.enabled:
+            UIACallCounter.property()
+        return getattr(element, attr)
+
+    @property
+    def Name(self) -> str:
+        cached = self._GetCachedProperty('Name')
+        return cached if cached is not None else self._live('name')
+
+    @property
+    def ClassName(self) -> str:
+        cached = self._GetCachedProperty('ClassName')
+        return cached if cached is not None else self._live('class_name')
+
+    @property
+    def AutomationId(self) -> str:
+        cached = self._GetCachedProperty('AutomationId')
+        return cached if cached is not None else self._live('automation_id')
+
+    @property
+    def ControlType(self) -> int:
+        cached = self._GetCachedProperty('ControlType')
+        return cached if cached is not None else self._live('control_type')
+
+    @property
+    def ControlTypeName(self) -> str:
+        return ControlTypeNames.get(self.ControlType, 'Control')
+
+    @property
+    def BoundingRectangle(self) -> Rect:
+        return _copy_rect(self._live('rect'))
+
+    @property
+    def CachedBoundingRectangle(self) -> Rect:
+        cached = self._GetCachedProperty('BoundingRectangle')
+        return cached if cached is not None else self.BoundingRectangle
+
+    @property
+    def runtimeid(self) -> str:
+        cached = self._GetCachedProperty('runtimeid')
+        if cached is not None:
+            return cached
+        return ''.join(str(i) for i in self.GetRuntimeId())
+
+    def GetRuntimeId(self) -> List[int]:
+        return list(self._live('runtime_id'))
+
+    @property
+    def NativeWindowHandle(self) -> int:
+        element = self.Element
+        self._desktop.count()
+        return element.hwnd if isinstance(element, SimWindow) else 0
+
+    @property
+    def ProcessId(self) -> int:
+        window = self.Element.window
+        self._desktop.count()
+        return window.pid if window is not None else 0
+
+    @property
+    def HasKeyboardFocus(self) -> bool:
+        element = self.Element
+        self._desktop.count()
+        return self._desktop.focus is element
+
+    @property
+    def IsOffscreen(self) -> bool:
+        element = self.Element
+        self._desktop.count()
+        window = element.window
+        if window is None or not window.visible or window.minimized:
+            return True
+        rect, win_rect = element.rect, window.rect
+        return rect.bottom <= win_rect.top or rect.top >= win_rect.bottom or rect.height() <= 0
+
+    @property
+    def IsEnabled(self) -> bool:
+        return True
+
+    def GetValuePattern(self) -> _SimValuePattern:
+        return _SimValuePattern(self)
+    # endregion
+
+    # region 导航
+    def GetParentControl(self) -> Optional['SimControl']:
+        self._desktop.count()
+        return self._wrap(self.Element.parent)
+
+    def GetFirstChildControl(self) -> Optional['SimControl']:
+        self._desktop.count()
+        children = self.Element.children
+        return self._wrap(children[0]) if children else None
+
+    def GetLastChildControl(self) -> Optional['SimControl']:
+        self._desktop.count()
+        children = self.Element.children
+        return self._wrap(children[-1]) if children else None
+
+    def _sibling(self, step: int) -> Optional['SimControl']:
+        self._desktop.count()
+        element = self.Element
+        parent = element.parent
+        if parent is None:
+            return None
+        with self._desktop.lock:
+            siblings = parent.children
+            if element not in siblings:
+                return None
+            index = siblings.index(element) + step
+            if 0 <= index < len(siblings):
+                return self._wrap(siblings[index])
+        return None
+
+    def GetNextSiblingControl(self) -> Optional['SimControl']:
+        return self._sibling(1)
+
+    def GetPreviousSiblingControl(self) -> Optional['SimControl']:
+        return self._sibling(-1)
+
+    def GetChildren(self) -> List['SimControl']:
+        with self._desktop.lock:
+            children = list(self.Element.children)
+        self._desktop.count(n=len(children) + 1)
+        return [self._wrap(child) for child in children]
+
+    def GetCachedChildren(self, controlType: int = None) -> List['SimControl']:
+        """一次调用返回子控件，属性已预取（对应 ``FindAllBuildCache``）"""
+        with self._desktop.lock:
+            children = [
+                child for child in self.Element.children
+                if controlType is None or child.control_type == controlType
+            ]
+            controls = []
+            for child in children:
+                control = self._wrap(child)
+                control._cachedProperties = {
+                    'ControlType': child.control_type,
+                    'Name': child.name,
+                    'ClassName': child.class_name,
+                    'AutomationId': child.automation_id,
+                    'BoundingRectangle': _copy_rect(child.rect),
+                    'runtimeid': ''.join(str(i) for i in child.runtime_id),
+                }
+                controls.append(control)
+        self._desktop.count()
+        return controls
+
+    def GetAncestorControl(self, condition: Callable[['SimControl', int], bool]) -> Optional['SimControl']:
+        ancestor = self.GetParentControl()
+        depth = 0
+        while ancestor is not None:
+            depth -= 1
+            if condition(ancestor, depth):
+                return ancestor
+            ancestor = ancestor.GetParentControl()
+        return None
+
+    def GetTopLevelControl(self) -> Optional['SimControl']:
+        self._desktop.count()
+        return self._wrap(self.Element.window)
+
+    def IsTopLevel(self) -> bool:
+        element = self.Element
+        return isinstance(element, SimWindow) and element.parent is self._desktop.root
+    # endregion
+
+    # region 输入
+    def SetFocus(self) -> bool:
+        self._desktop.focus = self.Element
+        return True
+
+    def Click(self, x: int = None, y: int = None, ratioX: float = 0.5, ratioY: float = 0.5, simulateMove: bool = False, waitTime: float = 0) -> None:
+        self._desktop.click(self.Element, 'click')
+
+    def MiddleClick(self, x: int = None, y: int = None, ratioX: float = 0.5, ratioY: float = 0.5, simulateMove: bool = False, waitTime: float = 0) -> None:
+        self._desktop.click(self.Element, 'middle_click')
+
+    def RightClick(self, x: int = None, y: int = None, ratioX: float = 0.5, ratioY: float = 0.5, simulateMove: bool = False, waitTime: float = 0) -> None:
+        self._desktop.click(self.Element, 'right_click')
+
+    def DoubleClick(self, x: int = None, y: int = None, ratioX: float = 0.5, ratioY: float = 0.5, simulateMove: bool = False, waitTime: float = 0) -> None:
+        self._desktop.click(self.Element, 'double_click')
+
+    def WheelUp(self, x: int = None, y: int = None, ratioX: float = 0.5, ratioY: float = 0.5, wheelTimes: int = 1, interval: float = 0.05, waitTime: float = 0) -> None:
+        for _ in range(wheelTimes):
+            self._desktop.wheel(self.Element, 1)
+
+    def WheelDown(self, x: int = None, y: int = None, ratioX: float = 0.5, ratioY: float = 0.5, wheelTimes: int = 1, interval: float = 0.05, waitTime: float = 0) -> None:
+        for _ in range(wheelTimes):
+            self._desktop.wheel(self.Element, -1)
+
+    def SendKeys(self, text: str, interval: float = 0.01, waitTime: float = 0, charMode: bool = True) -> None:
+        self._desktop.send_keys(self.Element, text)
+
+    def Show(self, waitTime: float = 0) -> bool:
+        window = self.Element.window
+        if window is None:
+            return False
+        self._desktop.activate(window)
+        return True
+
+    def MoveToCenter(self) -> bool:
+        window = self.Element.window
+        if window is None:
+            return False
+        self._desktop.center(window)
+        return True
+    # endregion
+
+    # region 截图
+    def _capture(self, bbox) -> Image.Image:
+        """与 ``uiautomation.Control._capture`` 一致：截取整个顶层窗口后裁剪 bbox"""
+        window = self.Element.window
+        if window is None:
+            return self._desktop.render(self.Element, bbox)
+        rect = window.rect
+        window_rect = (rect.left, rect.top, rect.right, rect.bottom)
+        im = WindowFrameCache.get(window.hwnd, window_rect)
+        if im is None:
+            im = self._desktop.render(window, window_rect)
+            WindowFrameCache.put(window.hwnd, window_rect, im)
+        left, top = window_rect[0], window_rect[1]
+        return im.crop((bbox[0] - left, bbox[1] - top, bbox[2] - left, bbox[3] - top))
+
+    def ScreenShot(self, savePath: str = None, crop: tuple = (0, 0, 0, 0), crop_percentage: bool = False, return_img=False):
+        element = self.Element
+        self._desktop.count()
+        rect = element.rect
+        bbox = [rect.left, rect.top, rect.right, rect.bottom]
+        if crop_percentage:
+            width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+            crop = (
+                int(width * crop[0] / 100),
+                int(height * crop[1] / 100),
+                int(width * crop[2] / 100),
+                int(height * crop[3] / 100)
+            )
+        bbox = (bbox[0] + crop[0], bbox[1] + crop[1], bbox[2] - crop[2], bbox[3] - crop[3])
+        img = self._capture(bbox)
+        if return_img:
+            return img
+        if savePath is None:
+            fd, savePath = tempfile.mkstemp(prefix='uia_screenshot_', suffix='.png')
+            os.close(fd)
+        savePath = os.path.realpath(savePath)
+        img.save(savePath)
+        return savePath
+    # endregion
+
+
+def _make_finder(control_type: int):
+    def finder(self, searchDepth: int = 0xFFFFFFFF, searchInterval: float = 0.5, foundIndex: int = 1, **searchProperties) -> SimControl:
+        return SimControl(
+            searchFromControl=self,
+            searchDepth=searchDepth,
+            searchInterval=searchInterval,
+            foundIndex=foundIndex,
+            ControlType=control_type,
+            **searchProperties
+        )
+    return finder
+
+
+for _control_type, _control_type_name in ControlTypeNames.items():
+    setattr(SimControl, _control_type_name, _make_finder(_control_type))
+
+
+def WalkControl(control: SimControl, includeTop: bool = False, maxDepth: int = 0xFFFFFFFF):
+    """与 ``uiautomation.WalkControl`` 一致：产出 ``(控件, 深度)``"""
+    if includeTop:
+        yield control, 0
+    with control._desktop.lock:
+        elements = list(control.Element.walk(maxDepth))
+    control._desktop.count(n=len(elements))
+    for element, depth in elements:
+        yield control._wrap(element), depth
+# endregion
+
+
+# region --- 微信 4.1 模型 ------------------------------------------------------
+class SimMessage:
+    """模拟会话中的一条消息"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, attr: str, content: str, sender: str = '', msg_type: str = 'text', **extra):
+        self.id = next(SimMessage._ids)
+        self.attr = attr            # friend / self / system
+        self.content = content
+        self.sender = sender
+        self.type = msg_type
+        self.extra = extra
+        self.time = time.time()
+
+    def __repr__(self):
+        return f'<SimMessage {self.attr} {self.type} {self.content[:20]!r}>'
+
+    @property
+    def item_name(self) -> str:
+        if self.type == 'quote':
+            return f"{self.content} \n引用 {self.extra.get('quote_nickname', '')} 的消息 : {self.extra.get('quote_content', '')}"
+        if self.type == 'image':
+            return '图片'
+        if self.type == 'emoji':
+            return '动画表情'
+        if self.type == 'file':
+            return f"文件\n{self.content}\n{self.extra.get('size', '1.0KB')}\n微信电脑版"
+        if self.type == 'voice':
+            return f'语音{self.content}"'
+        if self.type == 'video':
+            return f'视频{self.content}'
+        return self.content
+
+    @property
+    def item_class(self) -> str:
+        if self.type in ('text', 'quote'):
+            return WxUI41Config.MSG_TEXT_ITEM_CLS
+        if self.type == 'voice':
+            return WxUI41Config.MSG_VOICE_ITEM_CLS
+        return WxUI41Config.MSG_BUBBLE_ITEM_CLS
+
+
+class SimChat:
+    """模拟会话"""
+
+    def __init__(self, name: str, is_group: bool = False):
+        self.name = name
+        self.is_group = is_group
+        self.messages: List[SimMessage] = []
+        self.unread = 0
+        self.pinned = False
+        self.last_active = 0.0
+
+    def __repr__(self):
+        return f'<SimChat {self.name} ({len(self.messages)})>'
+
+    @property
+    def preview(self) -> str:
+        if not self.messages:
+            return ''
+        last = self.messages[-1]
+        text = last.item_name.split('\n')[0] if last.type != 'text' else last.content
+        return f'[{self.unread}条] {text}' if self.unread else text
+
+
+def _avatar_color(name: str) -> Tuple[int, int, int]:
+    seed = sum(ord(c) for c in name)
+    return (40 + seed * 37 % 160, 40 + seed * 53 % 160, 40 + seed * 71 % 160)
+
+
+class SimChatPage:
+    """ChatMessagePage/XSplitterView 及其消息列表，可绑定到任意会话"""
+
+    ITEM_MARGIN = 8
+    LINE_HEIGHT = 22
+    CHAR_WIDTH = 14
+    MAX_BUBBLE_CHARS = 24
+
+    def __init__(self, app: 'SimWeChat', rect: Rect):
+        self.app = app
+        self.chat: Optional[SimChat] = None
+        self.scroll = 0
+        self.items: Dict[int, SimElement] = {}
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        self.page = SimElement(ControlType.GroupControl, class_name=WxUI41Config.CHAT_PAGE_CLS, rect=rect, fill=BACKGROUND_COLOR)
+        self.info = self.page.add(SimElement(
+            ControlType.GroupControl, class_name=WxUI41Config.CHAT_INFO_VIEW_CLS, rect=Rect(left, top, right, top + 60)))
+        self.title = self.info.add(SimElement(
+            ControlType.TextControl,
+            automation_id='top_content_h_view.top_spacing_v_view.top_left_info_v_view.big_title_line_h_view.current_chat_name_label',
+            rect=Rect(left + 20, top + 15, left + 320, top + 45)))
+        self.splitter = self.page.add(SimElement(
+            ControlType.CustomControl, class_name=WxUI41Config.CHAT_SPLITTER_CLS, rect=Rect(left, top + 60, right, bottom)))
+        view = self.splitter.add(SimElement(
+            ControlType.GroupControl, class_name=WxUI41Config.CHAT_MESSAGE_VIEW_CLS, rect=Rect(left, top + 60, right, bottom - 150)))
+        self.msgbox = view.add(SimElement(
+            ControlType.ListControl, '消息', rect=Rect(left, top + 60, right, bottom - 150), wheel=self._on_wheel))
+        self.tools = self.splitter.add(SimElement(ControlType.ToolBarControl, rect=Rect(left, bottom - 150, right, bottom - 115)))
+        self.editbox = self.splitter.add(SimElement(
+            ControlType.EditControl, class_name=WxUI41Config.CHAT_INPUT_FIELD_CLS, value='',
+            rect=Rect(left + 10, bottom - 115, right - 10, bottom - 50),
+            submit=self._on_submit, right_click=self._on_edit_right_click, middle_click=self._on_edit_focus))
+        self.sendbtn = self.splitter.add(SimElement(
+            ControlType.ButtonControl, '发送(S)', rect=Rect(right - 120, bottom - 45, right - 20, bottom - 15),
+            click=self._on_submit))
+
+    # region 布局
+    def bind(self, chat: Optional[SimChat]) -> None:
+        self.chat = chat
+        self.scroll = 0
+        self.items.clear()
+        self.msgbox.clear()
+        self.editbox.value = ''
+        self.editbox.attachments = []
+        self.editbox.name = chat.name if chat else ''
+        self.title.name = chat.name if chat else ''
+        if chat is not None:
+            capacity = self.app.message_capacity
+            for msg in (chat.messages[-capacity:] if capacity else chat.messages):
+                self._add_item(msg)
+        self.relayout()
+
+    def append(self, msg: SimMessage) -> None:
+        self._add_item(msg)
+        capacity = self.app.message_capacity
+        if capacity:
+            while len(self.msgbox.children) > capacity:
+                oldest = self.msgbox.children[0]
+                self.items.pop(oldest.data.get('message_id'), None)
+                self.msgbox.remove(oldest)
+        self.relayout()
+
+    def _add_item(self, msg: SimMessage) -> SimElement:
+        if msg.attr == 'system':
+            item = SimElement(ControlType.ListItemControl, msg.content, 'mmui::ChatItemView')
+        else:
+            item = SimElement(ControlType.ListItemControl, msg.item_name, msg.item_class, automation_id=f'chat_item_{msg.id}')
+            bubble_fill = SELF_BUBBLE_COLOR if msg.attr == 'self' else FRIEND_BUBBLE_COLOR
+            item.add(SimElement(ControlType.ButtonControl, msg.sender, fill=_avatar_color(msg.sender or self.app.nickname)))
+            if msg.type in ('image', 'emoji'):
+                bubble = SimElement(ControlType.GroupControl, msg.item_name, WxUI41Config.MSG_REFER_ITEM_CLS, fill=bubble_fill)
+            else:
+                bubble = SimElement(ControlType.GroupControl, msg.item_name, WxUI41Config.MSG_BUBBLE_ITEM_CLS, fill=bubble_fill)
+            item.add(bubble)
+        item.data['message_id'] = msg.id
+        item.data['message'] = msg
+        self.msgbox.add(item)
+        self.items[msg.id] = item
+        return item
+
+    def _item_height(self, msg: SimMessage) -> int:
+        if msg.attr == 'system':
+            return 30
+        if msg.type in ('image', 'emoji', 'video'):
+            return 140
+        if msg.type == 'file':
+            return 100
+        lines = sum(max(1, math.ceil(len(line) / self.MAX_BUBBLE_CHARS)) for line in msg.item_name.split('\n'))
+        return lines * self.LINE_HEIGHT + 2 * self.ITEM_MARGIN + 20
+
+    def _bubble_width(self, msg: SimMessage) -> int:
+        if msg.type in ('image', 'emoji', 'video'):
+            return 120
+        if msg.type == 'file':
+            return 240
+        longest = max(len(line) for line in msg.item_name.split('\n')) or 1
+        return min(longest, self.MAX_BUBBLE_CHARS) * self.CHAR_WIDTH + 24
+
+    def relayout(self) -> None:
+        box = self.msgbox.rect
+        bottom = box.bottom + self.scroll
+        for item in reversed(self.msgbox.children):
+            msg: SimMessage = item.data['message']
+            height = self._item_height(msg)
+            top = bottom - height
+            item.rect = Rect(box.left, top, box.right, bottom)
+            if item.children:
+                avatar, bubble = item.children
+                width = self._bubble_width(msg)
+                margin = self.ITEM_MARGIN
+                if msg.attr == 'self':
+                    avatar.rect = Rect(box.right - 52, top + margin, box.right - 16, top + margin + 36)
+                    bubble.rect = Rect(box.right - 64 - width, top + margin, box.right - 64, bottom - margin)
+                else:
+                    avatar.rect = Rect(box.left + 16, top + margin, box.left + 52, top + margin + 36)
+                    bubble.rect = Rect(box.left + 64, top + margin, box.left + 64 + width, bottom - margin)
+            bottom = top
+
+    def content_height(self) -> int:
+        return sum(self._item_height(item.data['message']) for item in self.msgbox.children)
+
+    def _on_wheel(self, element: SimElement, delta: int) -> None:
+        max_scroll = max(0, self.content_height() - self.msgbox.rect.height())
+        self.scroll = min(max(0, self.scroll + delta * 120), max_scroll)
+        self.relayout()
+    # endregion
+
+    # region 交互
+    def _on_edit_focus(self, element: SimElement) -> None:
+        self.app.desktop.focus = element
+
+    def _on_edit_right_click(self, element: SimElement) -> None:
+        self.app.show_menu(element, ['复制', '粘贴', '全选'], self._on_edit_menu)
+
+    def _on_edit_menu(self, option: str) -> None:
+        desktop = self.app.desktop
+        if option == '粘贴':
+            desktop._edit_key(self.editbox, frozenset({'CTRL'}), 'v')
+        elif option == '全选':
+            self.editbox.selected = True
+
+    def _on_submit(self, element: SimElement) -> bool:
+        if self.chat is None:
+            return False
+        value = self.editbox.value or ''
+        attachments = list(self.editbox.attachments)
+        text = value.replace(OBJECT_REPLACEMENT_CHAR, '').strip()
+        if not text and not attachments:
+            return True
+        self.editbox.value = ''
+        self.editbox.attachments = []
+        for path in attachments:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            self.app.add_message(self.chat.name, SimMessage(
+                'self', os.path.basename(path), self.app.nickname, 'file', size=f'{size / 1024:.1f}KB'))
+        if text:
+            self.app.add_message(self.chat.name, SimMessage('self', text, self.app.nickname))
+        return True
+    # endregion
+
+
+class SimWeChat:
+    """模拟已登录的微信 4.1：主窗口、会话列表、搜索、菜单与独立聊天窗口"""
+
+    MAIN_RECT = Rect(310, 140, 1610, 940)
+    SUB_RECT = Rect(560, 100, 1360, 980)
+    NAV_WIDTH = 60
+    SESSION_WIDTH = 280
+    SESSION_ROW_HEIGHT = 64
+    NAV_BUTTONS = ['微信', '通讯录', '收藏', '聊天文件', '朋友圈', '视频号', '看一看', '搜一搜', '小程序面板', '手机', '更多']
+    SESSION_MENU = ['置顶', '标为未读', '消息免打扰', '在独立窗口打开', '不显示聊天', '删除聊天']
+    WORDS = ['你好', '收到', '好的', '明天见', '方案已更新', '请查收', '哈哈', '辛苦了', '开会了', '稍等', '没问题', '晚上吃什么']
+
+    def __init__(
+            self,
+            desktop: SimDesktop,
+            nickname: str = 'wxauto4',
+            friends: Sequence[str] = ('文件传输助手', '张三', '李四', '王五'),
+            groups: Sequence[str] = ('工作群', '家人群'),
+            history: int = 20,
+            message_capacity: Optional[int] = None,
+            session_capacity: int = 60,
+            search_delay: float = 0.0,
+            seed: int = 0,
+            pid: int = 4321
+        ):
+        self.desktop = desktop
+        self.nickname = nickname
+        self.message_capacity = message_capacity
+        self.session_capacity = session_capacity
+        self.search_delay = search_delay
+        self.pid = pid
+        self.random = random.Random(seed)
+        self.chats: Dict[str, SimChat] = {}
+        self.sub_pages: Dict[str, SimChatPage] = {}
+        self.session_rows: Dict[str, SimElement] = {}
+        self._search_timer: Optional[threading.Timer] = None
+        self._traffic_thread: Optional[threading.Thread] = None
+        self._traffic_stop = threading.Event()
+
+        now = time.time()
+        for index, name in enumerate(list(friends) + list(groups)):
+            chat = SimChat(name, is_group=name in groups)
+            chat.last_active = now - index
+            self.chats[name] = chat
+            for _ in range(history):
+                chat.messages.append(self._random_message(chat))
+        with desktop.lock:
+            self._build_main_window()
+            first = next(iter(self.chats.values()), None)
+            self.main_page.bind(first)
+            self._refresh_sessions()
+
+    # region 构建
+    def _build_main_window(self) -> None:
+        rect = self.MAIN_RECT
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        self.main = SimWindow(
+            '微信', WxUI41Config.MAIN_WINDOW_UI_CLS, WxUI41Config.WIN_CLS_NAME, rect, pid=self.pid,
+            fill=BACKGROUND_COLOR, key=self._on_main_key)
+        nav = self.main.add(SimElement(
+            ControlType.ToolBarControl, '导航', WxUI41Config.NAVIGATION_BAR_CLS,
+            WxUI41Config.NAVIGATION_BAR_AUTOMATION_ID, rect=Rect(left, top, left + self.NAV_WIDTH, bottom), fill=(46, 46, 46)))
+        nav.add(SimElement(
+            ControlType.ButtonControl, self.nickname, rect=Rect(left + 10, top + 20, left + 50, top + 60),
+            fill=_avatar_color(self.nickname), click=self._on_avatar_click))
+        y = top + 80
+        for name in self.NAV_BUTTONS:
+            nav.add(SimElement(ControlType.ButtonControl, name, rect=Rect(left + 10, y, left + 50, y + 40)))
+            y += 50
+
+        session_left = left + self.NAV_WIDTH
+        session_right = session_left + self.SESSION_WIDTH
+        self.session_box = self.main.add(SimElement(
+            ControlType.GroupControl, class_name=WxUI41Config.SESSION_BOX_CLS,
+            rect=Rect(session_left, top, session_right, bottom), middle_click=self._close_search))
+        search_field = self.session_box.add(SimElement(
+            ControlType.GroupControl, class_name=WxUI41Config.SESSION_SEARCH_FIELD_CLS,
+            rect=Rect(session_left + 10, top + 20, session_right - 50, top + 50)))
+        self.searchbox = search_field.add(SimElement(
+            ControlType.EditControl, '搜索', value='', rect=Rect(session_left + 10, top + 20, session_right - 50, top + 50),
+            changed=self._on_search_changed, submit=self._on_search_submit))
+        session_list = self.session_box.add(SimElement(
+            ControlType.GroupControl, class_name=WxUI41Config.SESSION_LIST_CLS,
+            rect=Rect(session_left, top + 60, session_right, bottom)))
+        self.session_table = session_list.add(SimElement(
+            ControlType.ListControl, '会话', WxUI41Config.SESSION_TABLE_CLS,
+            rect=Rect(session_left, top + 60, session_right, bottom)))
+
+        self.main_page = SimChatPage(self, Rect(session_right, top, right, bottom))
+        self.main.add(self.main_page.page)
+        self.search_popover: Optional[SimElement] = None
+        self.desktop.add_window(self.main)
+    # endregion
+
+    # region 会话
+    @property
+    def current_chat(self) -> Optional[SimChat]:
+        return self.main_page.chat
+
+    def visible_chats(self) -> List[str]:
+        names = [name for name, page in self.sub_pages.items() if page.chat is not None]
+        if self.main_page.chat is not None and self.main.visible and not self.main.minimized:
+            names.append(self.main_page.chat.name)
+        return names
+
+    def _refresh_sessions(self) -> None:
+        chats = sorted(self.chats.values(), key=lambda c: (not c.pinned, -c.last_active))[:self.session_capacity]
+        table = self.session_table
+        box = table.rect
+        keep = {chat.name for chat in chats}
+        for name in list(self.session_rows):
+            if name not in keep:
+                table.remove(self.session_rows.pop(name))
+        for index, chat in enumerate(chats):
+            row = self.session_rows.get(chat.name)
+            if row is None:
+                row = SimElement(
+                    ControlType.ListItemControl, class_name='mmui::ChatSessionCell',
+                    click=self._on_session_click, double_click=self._on_session_double_click,
+                    right_click=self._on_session_right_click)
+                row.data['chat'] = chat.name
+                self.session_rows[chat.name] = row
+            last_time = time.strftime('%H:%M', time.localtime(chat.last_active))
+            row.name = f'{chat.name}\n{chat.preview}\n{last_time}'
+            if table.children[index:index + 1] != [row]:
+                table.add(row, index)
+            row_top = box.top + index * self.SESSION_ROW_HEIGHT
+            row.rect = Rect(box.left, row_top, box.right, row_top + self.SESSION_ROW_HEIGHT)
+
+    def open_chat(self, name: str) -> bool:
+        """在主窗口打开会话"""
+        with self.desktop.lock:
+            chat = self.chats.get(name)
+            if chat is None:
+                return False
+            if self.main_page.chat is not chat:
+                self.main_page.bind(chat)
+            chat.unread = 0
+            self._refresh_sessions()
+            return True
+
+    def open_sub_window(self, name: str) -> Optional[SimWindow]:
+        """在独立窗口打开会话，已打开时直接置前"""
+        with self.desktop.lock:
+            chat = self.chats.get(name)
+            if chat is None:
+                return None
+            page = self.sub_pages.get(name)
+            if page is not None:
+                window = page.page.window
+                self.desktop.activate(window)
+                return window
+            rect = _copy_rect(self.SUB_RECT)
+            window = SimWindow(
+                name, WxUI41Config.SUB_WINDOW_UI_CLS, WxUI41Config.WIN_CLS_NAME, rect, pid=self.pid,
+                key=self._on_sub_key, closed=self._on_sub_closed)
+            page = SimChatPage(self, rect)
+            window.add(page.page)
+            window.data['chat'] = name
+            page.bind(chat)
+            self.sub_pages[name] = page
+            chat.unread = 0
+            self._refresh_sessions()
+            return self.desktop.add_window(window)
+
+    def close_sub_window(self, name: str) -> None:
+        page = self.sub_pages.get(name)
+        if page is not None:
+            self.desktop.close_window(page.page.window)
+
+    def _on_sub_closed(self, window: SimWindow) -> None:
+        self.sub_pages.pop(window.data.get('chat'), None)
+
+    def _on_sub_key(self, element: SimElement, modifiers: frozenset, key: str) -> None:
+        if key == 'ESC':
+            self.desktop.close_window(element)
+
+    def _on_main_key(self, element: SimElement, modifiers: frozenset, key: str) -> None:
+        if key == 'ESC':
+            self._close_search()
+
+    def _session_of(self, element: SimElement) -> Optional[str]:
+        return element.data.get('chat')
+
+    def _on_session_click(self, element: SimElement) -> None:
+        self.open_chat(self._session_of(element))
+
+    def _on_session_double_click(self, element: SimElement) -> None:
+        self.open_sub_window(self._session_of(element))
+
+    def _on_session_right_click(self, element: SimElement) -> None:
+        name = self._session_of(element)
+        self.show_menu(element, self.SESSION_MENU, lambda option: self._on_session_menu(name, option))
+
+    def _on_session_menu(self, name: str, option: str) -> None:
+        chat = self.chats.get(name)
+        if chat is None:
+            return
+        if option == '在独立窗口打开':
+            self.open_sub_window(name)
+        elif option == '置顶':
+            chat.pinned = True
+        elif option == '取消置顶':
+            chat.pinned = False
+        elif option == '标为未读':
+            chat.unread = max(chat.unread, 1)
+        elif option in ('不显示聊天', '删除聊天'):
+            self.session_table.remove(self.session_rows.pop(name))
+            return
+        self._refresh_sessions()
+    # endregion
+
+    # region 菜单与弹窗
+    def show_menu(self, anchor: SimElement, options: Sequence[str], on_select: Callable[[str], None]) -> SimWindow:
+        """在 anchor 旁弹出 mmui::XMenu 菜单窗口"""
+        left, top = anchor.rect.left + 10, anchor.rect.top + 10
+        menu = SimWindow(
+            'Weixin', WxUI41Config.MENU_CLS, WxUI41Config.MENU_WIN_CLS,
+            Rect(left, top, left + 160, top + 32 * len(options)), pid=self.pid, popup=True, fill=(255, 255, 255))
+
+        def select(element: SimElement):
+            self.desktop.close_window(menu)
+            on_select(element.name)
+
+        for index, option in enumerate(options):
+            menu.add(SimElement(
+                ControlType.MenuItemControl, option, rect=Rect(left, top + 32 * index, left + 160, top + 32 * (index + 1)),
+                click=select))
+        menu.behaviors['key'] = lambda element, modifiers, key: key == 'ESC' and self.desktop.close_window(menu)
+        return self.desktop.add_window(menu)
+
+    def _on_avatar_click(self, element: SimElement) -> None:
+        left, top = element.rect.right + 10, element.rect.top
+        popup = SimWindow(
+            'Weixin', 'mmui::ProfileUniquePop', WxUI41Config.MENU_WIN_CLS,
+            Rect(left, top, left + 300, top + 200), pid=self.pid, popup=True, fill=(255, 255, 255))
+        popup.add(SimElement(
+            ControlType.ButtonControl, self.nickname, WxUI41Config.CONTACT_HEAD_VIEW_CLS,
+            WxUI41Config.CONTACT_HEAD_VIEW_AUTOMATION_ID, rect=Rect(left + 20, top + 20, left + 80, top + 80)))
+        self.desktop.add_window(popup)
+    # endregion
+
+    # region 搜索
+    def _on_search_changed(self, element: SimElement) -> None:
+        keyword = (element.value or '').strip()
+        if self._search_timer is not None:
+            self._search_timer.cancel()
+            self._search_timer = None
+        if not keyword:
+            self._close_search()
+        elif self.search_delay > 0:
+            self._search_timer = threading.Timer(self.search_delay, self._show_search_results, args=(keyword,))
+            self._search_timer.daemon = True
+            self._search_timer.start()
+        else:
+            self._show_search_results(keyword)
+
+    def _on_search_submit(self, element: SimElement) -> bool:
+        if self.search_popover is not None:
+            items = [i for i in self.search_popover.children[0].children if i.behaviors.get('click')]
+            if items:
+                self.desktop.dispatch(items[0], 'click')
+        return True
+
+    def _show_search_results(self, keyword: str) -> None:
+        with self.desktop.lock:
+            if (self.searchbox.value or '').strip() != keyword:
+                return
+            self._close_search(clear=False)
+            lowered = keyword.lower()
+            friends = [c.name for c in self.chats.values() if not c.is_group and lowered in c.name.lower()]
+            groups = [c.name for c in self.chats.values() if c.is_group and lowered in c.name.lower()]
+            box = self.session_box.rect
+            rect = Rect(box.left, box.top + 60, box.right + 200, box.bottom)
+            popover = SimElement(
+                ControlType.WindowControl, class_name=WxUI41Config.SESSION_SEARCH_CONTENT_CLS, rect=rect, fill=(255, 255, 255))
+            result_list = popover.add(SimElement(ControlType.ListControl, rect=_copy_rect(rect)))
+            entries = []
+            if friends:
+                entries.append(('联系人', None))
+                entries.extend((name, name) for name in friends)
+            if groups:
+                entries.append(('群聊', None))
+                entries.extend((name, name) for name in groups)
+            entries.append((f'搜索网络结果 {keyword}', None))
+            for index, (text, target) in enumerate(entries):
+                item_top = rect.top + index * 50
+                item = SimElement(
+                    ControlType.ListItemControl, text, 'mmui::SearchContentCellView',
+                    rect=Rect(rect.left, item_top, rect.right, item_top + 50))
+                if target is not None:
+                    item.data['chat'] = target
+                    item.behaviors['click'] = self._on_search_result_click
+                result_list.add(item)
+            self.search_popover = self.main.add(popover)
+
+    def _on_search_result_click(self, element: SimElement) -> None:
+        name = element.data['chat']
+        self._close_search()
+        self.open_chat(name)
+
+    def _close_search(self, element: SimElement = None, clear: bool = True) -> None:
+        with self.desktop.lock:
+            if self.search_popover is not None:
+                self.main.remove(self.search_popover)
+                self.search_popover = None
+            if clear:
+                self.searchbox.value = ''
+    # endregion
+
+    # region 消息
+    def _random_message(self, chat: SimChat, attr: str = None) -> SimMessage:
+        attr = attr or self.random.choice(['friend', 'friend', 'self'])
+        content = ''.join(self.random.choice(self.WORDS) for _ in range(self.random.randint(1, 4)))
+        sender = self.nickname if attr == 'self' else chat.name
+        if chat.is_group and attr == 'friend':
+            sender = self.random.choice(['张三', '李四', '王五', '赵六'])
+        msg_type = self.random.choices(['text', 'image', 'quote', 'voice', 'emoji'], [80, 8, 5, 4, 3])[0]
+        extra = {}
+        if msg_type == 'quote':
+            extra = {'quote_nickname': chat.name, 'quote_content': self.random.choice(self.WORDS)}
+        elif msg_type == 'voice':
+            content = str(self.random.randint(1, 59))
+        return SimMessage(attr, content, sender, msg_type, **extra)
+
+    def add_message(self, chat_name: str, msg: SimMessage) -> SimMessage:
+        """把消息追加到会话，并同步到所有显示该会话的页面与会话列表"""
+        with self.desktop.lock:
+            chat = self.chats.get(chat_name)
+            if chat is None:
+                chat = self.chats[chat_name] = SimChat(chat_name)
+            chat.messages.append(msg)
+            chat.last_active = time.time()
+            visible = False
+            for page in [self.main_page] + list(self.sub_pages.values()):
+                if page.chat is chat:
+                    page.append(msg)
+                    visible = visible or page is not self.main_page or (self.main.visible and not self.main.minimized)
+            if msg.attr == 'friend' and not visible:
+                chat.unread += 1
+            self._refresh_sessions()
+        return msg
+
+    def receive_message(self, chat_name: str, content: str = None, sender: str = None, msg_type: str = 'text', **extra) -> SimMessage:
+        """模拟收到好友消息，content 为空时随机生成"""
+        chat = self.chats.get(chat_name) or SimChat(chat_name)
+        if content is None:
+            msg = self._random_message(chat, 'friend')
+        else:
+            msg = SimMessage('friend', content, sender or chat_name, msg_type, **extra)
+        return self.add_message(chat_name, msg)
+
+    def send_message(self, chat_name: str, content: str) -> SimMessage:
+        """模拟在手机端等其他设备发送的消息"""
+        return self.add_message(chat_name, SimMessage('self', content, self.nickname))
+
+    def system_message(self, chat_name: str, content: str = None) -> SimMessage:
+        return self.add_message(chat_name, SimMessage('system', content or time.strftime('%H:%M')))
+
+    def start_traffic(self, rate: float = 10.0, chats: Sequence[str] = None, duration: float = None) -> threading.Thread:
+        """后台线程按 rate（条/秒）向 chats 随机注入好友消息"""
+        self.stop_traffic()
+        self._traffic_stop.clear()
+        names = list(chats or self.chats)
+
+        def run():
+            t0 = time.monotonic()
+            while not self._traffic_stop.is_set():
+                if duration is not None and time.monotonic() - t0 > duration:
+                    break
+                self.receive_message(self.random.choice(names))
+                self._traffic_stop.wait(self.random.expovariate(rate) if rate > 0 else 1)
+
+        self._traffic_thread = threading.Thread(target=run, name='SimWeChatTraffic', daemon=True)
+        self._traffic_thread.start()
+        return self._traffic_thread
+
+    def stop_traffic(self) -> None:
+        self._traffic_stop.set()
+        if self._traffic_thread is not None:
+            self._traffic_thread.join()
+            self._traffic_thread = None
+    # endregion
+# endregion
+
+
+class SimulatedBackend(UIABackend):
+    """基于 :class:`SimDesktop` 的后端"""
+
+    name = 'simulated'
+
+    def __init__(self, desktop: SimDesktop = None):
+        self.desktop = desktop or SimDesktop()
+        self.app: Optional[SimWeChat] = None
+
+    @classmethod
+    def wechat(cls, desktop: SimDesktop = None, **kwargs) -> 'SimulatedBackend':
+        """创建带有一个已登录微信的模拟后端，kwargs 传给 :class:`SimWeChat`"""
+        backend = cls(desktop)
+        backend.app = SimWeChat(backend.desktop, **kwargs)
+        return backend
+
+    def ControlFromHandle(self, handle: int) -> Optional[SimControl]:
+        window = self.desktop.window(handle)
+        if window is None:
+            return None
+        return SimControl(element=window, desktop=self.desktop)
+
+    def GetRootControl(self) -> SimControl:
+        return SimControl(element=self.desktop.root, desktop=self.desktop)
+
+    def AddStructureChangedHandler(self, control: SimControl, callback: Callable[[int], None]) -> int:
+        return self.desktop.add_structure_handler(control.Element, callback)
+
+    def RemoveStructureChangedHandler(self, token: int) -> None:
+        self.desktop.remove_structure_handler(token)
+
+    def AddWindowShownHandler(self, callback: Callable[[int], None]) -> int:
+        return self.desktop.add_window_handler(callback)
+
+    def RemoveWindowShownHandler(self, token: int) -> None:
+        self.desktop.remove_window_handler(token)
+
+    def GetAllWindows(self, name: str = None, classname: str = None) -> List[Tuple[int, str, str]]:
+        self.desktop.count(n=len(self.desktop.root.children))
+        windows = [(win.hwnd, win.win_class, win.name) for win in self.desktop.windows]
+        if name:
+            windows = [i for i in windows if i[-1] == name]
+        if classname:
+            windows = [i for i in windows if i[1] == classname]
+        return windows
+
+    def EnumWindows(self, classname: str = None, name: str = None, pid: int = None, first: bool = False) -> List[Tuple[int, str, str]]:
+        windows = []
+        examined = 0
+        for win in self.desktop.windows:
+            examined += 1
+            if (
+                (classname is None or win.win_class == classname)
+                and (pid is None or win.pid == pid)
+                and (name is None or win.name == name)
+            ):
+                windows.append((win.hwnd, win.win_class, win.name))
+                if first:
+                    break
+        self.desktop.count(n=examined)
+        return windows
+
+    def GetWindowProcessId(self, hwnd: int) -> int:
+        win = self.desktop.window(hwnd)
+        return win.pid if win is not None else 0
+
+    def FindWindow(self, classname: str = None, name: str = None) -> int:
+        self.desktop.count()
+        for win in self.desktop.windows:
+            if (classname is None or win.win_class == classname) and (name is None or win.name == name):
+                return win.hwnd
+        return 0
+
+    def GetWindowsByPid(self, pid: int) -> List[int]:
+        return [win.hwnd for win in self.desktop.windows if win.pid == pid and win.visible and not win.minimized]
+
+    def IsWindow(self, hwnd: int) -> bool:
+        return self.desktop.window(hwnd) is not None
+
+    def IsWindowVisible(self, hwnd: int) -> bool:
+        win = self.desktop.window(hwnd)
+        return bool(win and win.visible and not win.minimized)
+
+    def GetForegroundWindow(self) -> int:
+        return self.desktop.foreground
+
+    def ShowWindow(self, hwnd: int) -> None:
+        win = self.desktop.window(hwnd)
+        if win is not None:
+            self.desktop.activate(win)
+
+    def MoveWindowToCenter(self, hwnd: int) -> None:
+        win = self.desktop.window(hwnd)
+        if win is not None:
+            self.desktop.center(win)
+
+    def Click(self, x: int, y: int) -> None:
+        self.desktop.click_at(x, y)
+
+    def SetClipboardText(self, text: str) -> None:
+        self.desktop.clipboard = {CF_UNICODETEXT: text}
+
+    def SetClipboardFiles(self, paths: Sequence[str]) -> bool:
+        if isinstance(paths, str):
+            paths = [paths]
+        valid_paths = []
+        for path in paths:
+            if not os.path.exists(path):
+                raise ValueError(f"文件路径不存在: {path}")
+            valid_paths.append(os.path.abspath(path))
+        if not valid_paths:
+            return False
+        self.desktop.clipboard = {CF_HDROP: tuple(valid_paths)}
+        return True
+
+    def SetClipboardData(self, data_dict: Dict[str, Any]) -> None:
+        self.desktop.clipboard = {str(k): v for k, v in data_dict.items()}
+
+    def ReadClipboardData(self) -> Dict[str, Any]:
+        return dict(self.desktop.clipboard)
+
+
+__all__ = [
+    'SimElement',
+    'SimWindow',
+    'SimDesktop',
+    'SimControl',
+    'SimMessage',
+    'SimChat',
+    'SimChatPage',
+    'SimWeChat',
+    'SimulatedBackend',
+    'WalkControl',
+    'ParseKeys',
+]
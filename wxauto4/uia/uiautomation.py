@@ -27,6 +27,19 @@ import win32gui
 import win32ui
 from PIL import Image
 from typing import (Any, Callable, Dict, List, Iterable, Tuple)  # need pip install typing for Python3.4 or lower
+from .common import (
+    ControlType,
+    ControlTypeNames,
+    TreeScope,
+    StructureChangeType,
+    Rect,
+    RollIntoView,
+    CheckElementPosition,
+    IsElementInWindow,
+    GetElementPositionDescription,
+    WindowFrameCache,
+    UIACallCounter,
+)
 TreeNode = Any
 
 # print('uia done')
@@ -135,99 +148,6 @@ class _DllClient:
             self.dll.Uninitialize()
 
 
-class ControlType:
-    """
-    ControlType from IUIAutomation.
-    Refer https://docs.microsoft.com/en-us/windows/desktop/WinAuto/uiauto-controltype-ids
-    """
-    AppBarControl = 50040
-    ButtonControl = 50000
-    CalendarControl = 50001
-    CheckBoxControl = 50002
-    ComboBoxControl = 50003
-    CustomControl = 50025
-    DataGridControl = 50028
-    DataItemControl = 50029
-    DocumentControl = 50030
-    EditControl = 50004
-    GroupControl = 50026
-    HeaderControl = 50034
-    HeaderItemControl = 50035
-    HyperlinkControl = 50005
-    ImageControl = 50006
-    ListControl = 50008
-    ListItemControl = 50007
-    MenuBarControl = 50010
-    MenuControl = 50009
-    MenuItemControl = 50011
-    PaneControl = 50033
-    ProgressBarControl = 50012
-    RadioButtonControl = 50013
-    ScrollBarControl = 50014
-    SemanticZoomControl = 50039
-    SeparatorControl = 50038
-    SliderControl = 50015
-    SpinnerControl = 50016
-    SplitButtonControl = 50031
-    StatusBarControl = 50017
-    TabControl = 50018
-    TabItemControl = 50019
-    TableControl = 50036
-    TextControl = 50020
-    ThumbControl = 50027
-    TitleBarControl = 50037
-    ToolBarControl = 50021
-    ToolTipControl = 50022
-    TreeControl = 50023
-    TreeItemControl = 50024
-    WindowControl = 50032
-
-
-ControlTypeNames = {
-    ControlType.AppBarControl: 'AppBarControl',
-    ControlType.ButtonControl: 'ButtonControl',
-    ControlType.CalendarControl: 'CalendarControl',
-    ControlType.CheckBoxControl: 'CheckBoxControl',
-    ControlType.ComboBoxControl: 'ComboBoxControl',
-    ControlType.CustomControl: 'CustomControl',
-    ControlType.DataGridControl: 'DataGridControl',
-    ControlType.DataItemControl: 'DataItemControl',
-    ControlType.DocumentControl: 'DocumentControl',
-    ControlType.EditControl: 'EditControl',
-    ControlType.GroupControl: 'GroupControl',
-    ControlType.HeaderControl: 'HeaderControl',
-    ControlType.HeaderItemControl: 'HeaderItemControl',
-    ControlType.HyperlinkControl: 'HyperlinkControl',
-    ControlType.ImageControl: 'ImageControl',
-    ControlType.ListControl: 'ListControl',
-    ControlType.ListItemControl: 'ListItemControl',
-    ControlType.MenuBarControl: 'MenuBarControl',
-    ControlType.MenuControl: 'MenuControl',
-    ControlType.MenuItemControl: 'MenuItemControl',
-    ControlType.PaneControl: 'PaneControl',
-    ControlType.ProgressBarControl: 'ProgressBarControl',
-    ControlType.RadioButtonControl: 'RadioButtonControl',
-    ControlType.ScrollBarControl: 'ScrollBarControl',
-    ControlType.SemanticZoomControl: 'SemanticZoomControl',
-    ControlType.SeparatorControl: 'SeparatorControl',
-    ControlType.SliderControl: 'SliderControl',
-    ControlType.SpinnerControl: 'SpinnerControl',
-    ControlType.SplitButtonControl: 'SplitButtonControl',
-    ControlType.StatusBarControl: 'StatusBarControl',
-    ControlType.TabControl: 'TabControl',
-    ControlType.TabItemControl: 'TabItemControl',
-    ControlType.TableControl: 'TableControl',
-    ControlType.TextControl: 'TextControl',
-    ControlType.ThumbControl: 'ThumbControl',
-    ControlType.TitleBarControl: 'TitleBarControl',
-    ControlType.ToolBarControl: 'ToolBarControl',
-    ControlType.ToolTipControl: 'ToolTipControl',
-    ControlType.TreeControl: 'TreeControl',
-    ControlType.TreeItemControl: 'TreeItemControl',
-    ControlType.WindowControl: 'WindowControl',
-}
-
-
 class PatternId:
     """
     PatternId from IUIAutomation.
@@ -1683,262 +1603,10 @@ class INPUT(ctypes.Structure):
                 ('union', _INPUTUnion))
 
 
-class Rect():
-    """
-    class Rect, like `ctypes.wintypes.RECT`.
-    """
-    def __init__(self, left: int = 0, top: int = 0, right: int = 0, bottom: int = 0):
-        self.left = left
-        self.top = top
-        self.right = right
-        self.bottom = bottom
-
-    def width(self) -> int:
-        return self.right - self.left
-
-    def height(self) -> int:
-        return self.bottom - self.top
-
-    def xcenter(self) -> int:
-        return self.left + self.width() // 2
-
-    def ycenter(self) -> int:
-        return self.top + self.height() // 2
-
-    def contains(self, x: int, y: int) -> bool:
-        return self.left <= x < self.right and self.top <= y < self.bottom
-    
-    def __eq__(self, rect):
-        return self.left == rect.left and self.top == rect.top and self.right == rect.right and self.bottom == rect.bottom
-
-    def __str__(self) -> str:
-        return '({},{},{},{})[{}x{}]'.format(self.left, self.top, self.right, self.bottom, self.width(), self.height())
-
-    def __repr__(self) -> str:
-        return '{}({},{},{},{})[{}x{}]'.format(self.__class__.__name__, self.left, self.top, self.right, self.bottom, self.width(), self.height())
-
-
 _StdOutputHandle = -11
 _ConsoleOutputHandle = ctypes.c_void_p(0)
 _DefaultConsoleColor = None
 
-def RollIntoView(win, ele, equal=True, bias=0):
-    """
-    将目标元素滚动到主窗口内可见区域
-    
-    参数:
-        win: 主窗口元素 (uiautomation.Control对象)
-        ele: 目标元素 (uiautomation.Control对象)  
-        bias: 偏移量，元素边缘需要超过这个量才算完全在窗口内 (默认为0)
-    """
-    # 获取窗口和元素的边界矩形
-    win_rect = win.BoundingRectangle
-    ele_rect = ele.BoundingRectangle
-    
-    # 计算窗口的有效显示区域（考虑bias偏移）
-    win_top = win_rect.top + bias
-    win_bottom = win_rect.bottom - bias
-    win_height = win_bottom - win_top
-    
-    # 获取元素的位置信息
-    ele_top = ele_rect.top
-    ele_bottom = ele_rect.bottom
-    ele_height = ele_rect.height()
-    ele_ycenter = ele_rect.ycenter()
-    
-    # 如果元素高度超过窗口高度，只需要确保元素中心在窗口内
-    if ele_height > win_height:
-        # 元素太高，只需要中心点在窗口内即可
-        target_top = ele_ycenter
-        target_bottom = ele_ycenter
-    else:
-        # 元素高度适中，需要整个元素都在窗口内
-        target_top = ele_top
-        target_bottom = ele_bottom
-    
-    # 执行滚动操作
-    max_attempts = 100  # 防止无限循环
-    attempt = 0
-    
-    while attempt < max_attempts:
-        # 重新获取当前位置（滚动后位置会变化）
-        current_ele_rect = ele.BoundingRectangle
-        
-        if ele_height > win_height:
-            # 元素太高的情况，检查中心点
-            current_ycenter = current_ele_rect.ycenter()
-            if win_top <= current_ycenter <= win_bottom:
-                break  # 中心点已在窗口内，停止滚动
-                
-            if current_ycenter < win_top:
-                # 中心点在窗口上方，需要向下滚动
-                # print('下滚动')
-                win.WheelUp()
-                time.sleep(0.1)
-            elif current_ycenter > win_bottom:
-                # 中心点在窗口下方，需要向上滚动  
-                # print('上滚动')
-                win.WheelDown()
-                time.sleep(0.1)
-        else:
-            # 元素高度适中的情况，检查整个元素
-            current_top = current_ele_rect.top
-            current_bottom = current_ele_rect.bottom
-            
-            # 检查是否已经完全在窗口内
-            if win_top <= current_top and current_bottom <= win_bottom:
-                break  # 元素已完全在窗口内，停止滚动
-            
-            if current_top < win_top:
-                # 元素顶部在窗口上方，需要向下滚动
-                # print('下滚动')
-                win.WheelUp()
-                time.sleep(0.1)
-            elif current_bottom > win_bottom:
-                # 元素底部在窗口下方，需要向上滚动
-                # print('上滚动')
-                win.WheelDown()
-                time.sleep(0.1)
-            else:
-                # 理论上不应该到达这里
-                break
-        
-        attempt += 1
-    
-    if attempt >= max_attempts:
-        print(f"Warning: 滚动操作达到最大尝试次数({max_attempts})，可能元素无法完全滚动到视图内")
-
-def CheckElementPosition(win, ele, bias=0):
-    """
-    判断目标元素相对于主窗口的位置关系
-    
-    参数:
-        win: 主窗口元素 (uiautomation.Control对象)
-        ele: 目标元素 (uiautomation.Control对象)
-        bias: 偏移量，调整判断的边界 (默认为0)
-    
-    返回:
-        dict: 包含各种位置关系判断结果的字典
-    """
-    # 获取窗口和元素的边界矩形
-    win_rect = win.BoundingRectangle
-    ele_rect = ele.BoundingRectangle
-    
-    # 计算实际的判断边界（考虑bias）
-    win_top = win_rect.top + bias
-    win_bottom = win_rect.bottom - bias
-    win_left = win_rect.left + bias
-    win_right = win_rect.right - bias
-    
-    # 元素的边界
-    ele_top = ele_rect.top
-    ele_bottom = ele_rect.bottom
-    ele_left = ele_rect.left
-    ele_right = ele_rect.right
-    
-    # 各种位置关系判断
-    result = {
-        # 垂直方向的关系
-        'ele_top_above_win_top': ele_top < win_top,                    # ele顶部高于win顶部
-        'ele_bottom_below_win_bottom': ele_bottom > win_bottom,        # ele底部低于win底部
-        'ele_completely_above_win': ele_bottom <= win_top,             # ele完全在win上方
-        'ele_completely_below_win': ele_top >= win_bottom,             # ele完全在win下方
-        'ele_vertically_inside_win': win_top <= ele_top and ele_bottom <= win_bottom,  # ele垂直方向完全在win内
-        'win_vertically_inside_ele': ele_top <= win_top and win_bottom <= ele_bottom,  # win垂直方向完全在ele内
-        
-        # 水平方向的关系
-        'ele_left_before_win_left': ele_left < win_left,              # ele左边在win左边之前
-        'ele_right_after_win_right': ele_right > win_right,           # ele右边在win右边之后
-        'ele_completely_left_of_win': ele_right <= win_left,          # ele完全在win左侧
-        'ele_completely_right_of_win': ele_left >= win_right,         # ele完全在win右侧
-        'ele_horizontally_inside_win': win_left <= ele_left and ele_right <= win_right,  # ele水平方向完全在win内
-        'win_horizontally_inside_ele': ele_left <= win_left and win_right <= ele_right,  # win水平方向完全在ele内
-        
-        # 综合关系
-        'ele_completely_inside_win': False,                           # ele完全在win内部
-        'win_completely_inside_ele': False,                           # win完全在ele内部
-        'ele_and_win_overlap': False,                                 # ele和win有重叠
-        'ele_and_win_separate': False,                                # ele和win完全分离
-    }
-    
-    # 计算综合关系
-    result['ele_completely_inside_win'] = (result['ele_vertically_inside_win'] and 
-                                          result['ele_horizontally_inside_win'])
-    
-    result['win_completely_inside_ele'] = (result['win_vertically_inside_ele'] and 
-                                          result['win_horizontally_inside_ele'])
-    
-    # 判断是否有重叠（在两个方向上都有重叠）
-    vertical_overlap = not (result['ele_completely_above_win'] or result['ele_completely_below_win'])
-    horizontal_overlap = not (result['ele_completely_left_of_win'] or result['ele_completely_right_of_win'])
-    result['ele_and_win_overlap'] = vertical_overlap and horizontal_overlap
-    
-    # 判断是否完全分离
-    result['ele_and_win_separate'] = not result['ele_and_win_overlap']
-    
-    return result
-
-
-def IsElementInWindow(win, ele, bias=0):
-    """
-    简化版本：判断元素是否在窗口内（仅垂直方向）
-    
-    参数:
-        win: 主窗口元素 (uiautomation.Control对象)
-        ele: 目标元素 (uiautomation.Control对象)
-        bias: 偏移量 (默认为0)
-    
-    返回:
-        bool: True表示元素在窗口内，False表示不在
-    """
-    position_info = CheckElementPosition(win, ele, bias)
-    return position_info['ele_vertically_inside_win']
-
-
-def GetElementPositionDescription(win, ele, bias=0):
-    """
-    获取元素位置的文字描述
-    
-    参数:
-        win: 主窗口元素 (uiautomation.Control对象)
-        ele: 目标元素 (uiautomation.Control对象)
-        bias: 偏移量 (默认为0)
-    
-    返回:
-        str: 位置关系的文字描述
-    """
-    result = CheckElementPosition(win, ele, bias)
-    
-    if result['ele_completely_inside_win']:
-        return "元素完全在窗口内部"
-    elif result['win_completely_inside_ele']:
-        return "窗口完全在元素内部"
-    elif result['ele_completely_above_win']:
-        return "元素完全在窗口上方"
-    elif result['ele_completely_below_win']:
-        return "元素完全在窗口下方"
-    elif result['ele_completely_left_of_win']:
-        return "元素完全在窗口左侧"
-    elif result['ele_completely_right_of_win']:
-        return "元素完全在窗口右侧"
-    elif result['ele_and_win_overlap']:
-        descriptions = []
-        if result['ele_top_above_win_top']:
-            descriptions.append("元素顶部高于窗口顶部")
-        if result['ele_bottom_below_win_bottom']:
-            descriptions.append("元素底部低于窗口底部")
-        if result['ele_left_before_win_left']:
-            descriptions.append("元素左边超出窗口左边")
-        if result['ele_right_after_win_right']:
-            descriptions.append("元素右边超出窗口右边")
-        
-        if descriptions:
-            return "元素与窗口重叠，" + "，".join(descriptions)
-        else:
-            return "元素与窗口重叠"
-    else:
-        return "元素与窗口完全分离"
-
 def GetClipboardText() -> str:
     if ctypes.windll.user32.OpenClipboard(0):
         if ctypes.windll.user32.IsClipboardFormatAvailable(13): # CF_TEXT=1, CF_UNICODETEXT=13
@@ -2273,6 +1941,7 @@ def WheelDown(wheelTimes: int = 1, interval: float = 0.05, waitTime: float = OPE
     interval: float.
     waitTime: float.
     """
+    WindowFrameCache.invalidate()
     for i in range(wheelTimes):
         mouse_event(MouseEventFlag.Wheel, 0, 0, -120, 0)    #WHEEL_DELTA=120
         time.sleep(interval)
@@ -2286,6 +1955,7 @@ def WheelUp(wheelTimes: int = 1, interval: float = 0.05, waitTime: float = OPERA
     interval: float.
     waitTime: float.
     """
+    WindowFrameCache.invalidate()
     for i in range(wheelTimes):
         mouse_event(MouseEventFlag.Wheel, 0, 0, 120, 0) #WHEEL_DELTA=120
         time.sleep(interval)
@@ -2881,6 +2551,7 @@ def SendKeys(text: str, interval: float = 0.01, waitTime: float = OPERATION_WAIT
     SendKeys('`~!@#$%^&*()-_=+{Enter}')
     SendKeys('[]{{}{}}\\|;:\'\",<.>/?{Enter}')
     """
+    WindowFrameCache.invalidate()
     holdKeys = ('WIN', 'LWIN', 'RWIN', 'SHIFT', 'LSHIFT', 'RSHIFT', 'CTRL', 'CONTROL', 'LCTRL', 'RCTRL', 'LCONTROL', 'LCONTROL', 'ALT', 'LALT', 'RALT')
     keys = []
     printKeys = []
@@ -5517,6 +5188,7 @@ class Control():
         regName = searchProperties.get('RegexName', '')
         self.regexName = re.compile(regName) if regName else None
         self._supportedPatterns = {}
+        self._cachedProperties = None
 
     def __str__(self) -> str:
         rect = self.BoundingRectangle
@@ -5525,8 +5197,36 @@ class Control():
 
     @property
     def runtimeid(self):
+        cached = self._GetCachedProperty('runtimeid')
+        if cached is not None:
+            return cached
         return ''.join([str(i) for i in self.GetRuntimeId()])
 
+    def _GetCachedProperty(self, name: str) -> Any:
+        """
+        Return the property value prefetched by `GetCachedChildren`, or None if it is not cached.
+        """
+        if self._cachedProperties:
+            return self._cachedProperties.get(name)
+        return None
+
+    def ClearPropertyCache(self) -> None:
+        """
+        Drop the properties prefetched by `GetCachedChildren`, later reads go to the element again.
+        """
+        self._cachedProperties = None
+
+    @property
+    def CachedBoundingRectangle(self) -> 'Rect':
+        """
+        BoundingRectangle prefetched by `GetCachedChildren`, falls back to `BoundingRectangle`.
+        The cached rect is a snapshot, call `BoundingRectangle` if the control may have moved since then.
+        """
+        rect = self._GetCachedProperty('BoundingRectangle')
+        if rect is not None:
+            return rect
+        return self.BoundingRectangle
+
     @staticmethod
     def CreateControlFromElement(element) -> 'Control':
         """
@@ -5557,6 +5257,29 @@ class Control():
         # 获取窗口的屏幕坐标
         window_rect = win32gui.GetWindowRect(hwnd)
         win_left, win_top, win_right, win_bottom = window_rect
+
+        # 批量截图时复用同一帧窗口画面，见 WindowFrameCache
+        im = WindowFrameCache.get(hwnd, window_rect)
+        if im is None:
+            im = self._capture_window(hwnd, window_rect)
+            WindowFrameCache.put(hwnd, window_rect, im)
+
+        # 计算bbox相对于窗口左上角的坐标
+        bbox_left, bbox_top, bbox_right, bbox_bottom = bbox
+        # 转换为截图图像中的相对坐标
+        crop_left = bbox_left - win_left
+        crop_top = bbox_top - win_top
+        crop_right = bbox_right - win_left
+        crop_bottom = bbox_bottom - win_top
+
+        # 裁剪目标区域
+        cropped_im = im.crop((crop_left, crop_top, crop_right, crop_bottom))
+        
+        return cropped_im
+
+    @staticmethod
+    def _capture_window(hwnd, window_rect):
+        win_left, win_top, win_right, win_bottom = window_rect
         win_width = win_right - win_left
         win_height = win_bottom - win_top
 
@@ -5587,18 +5310,7 @@ class Control():
         mfcDC.DeleteDC()
         win32gui.ReleaseDC(hwnd, hwndDC)
 
-        # 计算bbox相对于窗口左上角的坐标
-        bbox_left, bbox_top, bbox_right, bbox_bottom = bbox
-        # 转换为截图图像中的相对坐标
-        crop_left = bbox_left - win_left
-        crop_top = bbox_top - win_top
-        crop_right = bbox_right - win_left
-        crop_bottom = bbox_bottom - win_top
-
-        # 裁剪目标区域
-        cropped_im = im.crop((crop_left, crop_top, crop_right, crop_bottom))
-        
-        return cropped_im
+        return im
     
     def ScreenShot(self, savePath: str = None, crop: tuple = (0, 0, 0, 0), crop_percentage: bool = False, return_img=False) -> str:
         """
@@ -5625,7 +5337,7 @@ class Control():
             os.close(fd)  # 关闭文件描述符，不保留文件
             os.remove(path)  # 删除实际文件，只保留路径
             return path
-        rect = self.Element.CurrentBoundingRectangle
+        rect = self._PropertyElement.CurrentBoundingRectangle
         bbox = [rect.left, rect.top, rect.right, rect.bottom]
         
         if crop_percentage:
@@ -5734,7 +5446,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentAcceleratorKey.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentacceleratorkey
         """
-        return self.Element.CurrentAcceleratorKey
+        return self._PropertyElement.CurrentAcceleratorKey
 
     @property
     def AccessKey(self) -> str:
@@ -5743,7 +5455,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentAccessKey.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentaccesskey
         """
-        return self.Element.CurrentAccessKey
+        return self._PropertyElement.CurrentAccessKey
 
     @property
     def AriaProperties(self) -> str:
@@ -5752,7 +5464,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentAriaProperties.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentariaproperties
         """
-        return self.Element.CurrentAriaProperties
+        return self._PropertyElement.CurrentAriaProperties
 
     @property
     def AriaRole(self) -> str:
@@ -5761,7 +5473,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentAriaRole.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentariarole
         """
-        return self.Element.CurrentAriaRole
+        return self._PropertyElement.CurrentAriaRole
 
     @property
     def AutomationId(self) -> str:
@@ -5770,7 +5482,10 @@ class Control():
         Call IUIAutomationElement::get_CurrentAutomationId.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentautomationid
         """
-        return self.Element.CurrentAutomationId
+        cached = self._GetCachedProperty('AutomationId')
+        if cached is not None:
+            return cached
+        return self._PropertyElement.CurrentAutomationId
 
     @property
     def BoundingRectangle(self) -> Rect:
@@ -5783,7 +5498,7 @@ class Control():
         rect = control.BoundingRectangle
         print(rect.left, rect.top, rect.right, rect.bottom, rect.width(), rect.height(), rect.xcenter(), rect.ycenter())
         """
-        rect = self.Element.CurrentBoundingRectangle
+        rect = self._PropertyElement.CurrentBoundingRectangle
         return Rect(rect.left, rect.top, rect.right, rect.bottom)
 
     @property
@@ -5793,7 +5508,10 @@ class Control():
         Call IUIAutomationElement::get_CurrentClassName.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentclassname
         """
-        return self.Element.CurrentClassName
+        cached = self._GetCachedProperty('ClassName')
+        if cached is not None:
+            return cached
+        return self._PropertyElement.CurrentClassName
 
     @property
     def ControlType(self) -> int:
@@ -5803,11 +5521,14 @@ class Control():
         Call IUIAutomationElement::get_CurrentControlType.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentcontroltype
         """
-        return self.Element.CurrentControlType
+        cached = self._GetCachedProperty('ControlType')
+        if cached is not None:
+            return cached
+        return self._PropertyElement.CurrentControlType
 
     #@property
     #def ControllerFor(self):
-        #return self.Element.CurrentControllerFor
+        #return self._PropertyElement.CurrentControllerFor
 
     @property
     def Culture(self) -> int:
@@ -5816,15 +5537,15 @@ class Control():
         Call IUIAutomationElement::get_CurrentCulture.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentculture
         """
-        return self.Element.CurrentCulture
+        return self._PropertyElement.CurrentCulture
 
     #@property
     #def DescribedBy(self):
-        #return self.Element.CurrentDescribedBy
+        #return self._PropertyElement.CurrentDescribedBy
 
     #@property
     #def FlowsTo(self):
-        #return self.Element.CurrentFlowsTo
+        #return self._PropertyElement.CurrentFlowsTo
 
     @property
     def FrameworkId(self) -> str:
@@ -5834,7 +5555,7 @@ class Control():
         Return str, such as Win32, WPF...
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentframeworkid
         """
-        return self.Element.CurrentFrameworkId
+        return self._PropertyElement.CurrentFrameworkId
 
     @property
     def HasKeyboardFocus(self) -> bool:
@@ -5843,7 +5564,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentHasKeyboardFocus.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currenthaskeyboardfocus
         """
-        return bool(self.Element.CurrentHasKeyboardFocus)
+        return bool(self._PropertyElement.CurrentHasKeyboardFocus)
 
     @property
     def HelpText(self) -> str:
@@ -5852,7 +5573,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentHelpText.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currenthelptext
         """
-        return self.Element.CurrentHelpText
+        return self._PropertyElement.CurrentHelpText
 
     @property
     def IsContentElement(self) -> bool:
@@ -5861,7 +5582,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsContentElement.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentiscontentelement
         """
-        return bool(self.Element.CurrentIsContentElement)
+        return bool(self._PropertyElement.CurrentIsContentElement)
 
     @property
     def IsControlElement(self) -> bool:
@@ -5870,7 +5591,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsControlElement.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentiscontrolelement
         """
-        return bool(self.Element.CurrentIsControlElement)
+        return bool(self._PropertyElement.CurrentIsControlElement)
 
     @property
     def IsDataValidForForm(self) -> bool:
@@ -5879,7 +5600,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsDataValidForForm.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentisdatavalidforform
         """
-        return bool(self.Element.CurrentIsDataValidForForm)
+        return bool(self._PropertyElement.CurrentIsDataValidForForm)
 
     @property
     def IsEnabled(self) -> bool:
@@ -5888,7 +5609,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsEnabled.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentisenabled
         """
-        return self.Element.CurrentIsEnabled
+        return self._PropertyElement.CurrentIsEnabled
 
     @property
     def IsKeyboardFocusable(self) -> bool:
@@ -5897,7 +5618,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsKeyboardFocusable.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentiskeyboardfocusable
         """
-        return self.Element.CurrentIsKeyboardFocusable
+        return self._PropertyElement.CurrentIsKeyboardFocusable
 
     @property
     def IsOffscreen(self) -> bool:
@@ -5906,7 +5627,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsOffscreen.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentisoffscreen
         """
-        return self.Element.CurrentIsOffscreen
+        return self._PropertyElement.CurrentIsOffscreen
 
     @property
     def IsPassword(self) -> bool:
@@ -5915,7 +5636,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsPassword.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentispassword
         """
-        return self.Element.CurrentIsPassword
+        return self._PropertyElement.CurrentIsPassword
 
     @property
     def IsRequiredForForm(self) -> bool:
@@ -5924,7 +5645,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentIsRequiredForForm.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentisrequiredforform
         """
-        return self.Element.CurrentIsRequiredForForm
+        return self._PropertyElement.CurrentIsRequiredForForm
 
     @property
     def ItemStatus(self) -> str:
@@ -5933,7 +5654,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentItemStatus.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentitemstatus
         """
-        return self.Element.CurrentItemStatus
+        return self._PropertyElement.CurrentItemStatus
 
     @property
     def ItemType(self) -> str:
@@ -5942,11 +5663,11 @@ class Control():
         Call IUIAutomationElement::get_CurrentItemType.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentitemtype
         """
-        return self.Element.CurrentItemType
+        return self._PropertyElement.CurrentItemType
 
     #@property
     #def LabeledBy(self):
-        #return self.Element.CurrentLabeledBy
+        #return self._PropertyElement.CurrentLabeledBy
 
     @property
     def LocalizedControlType(self) -> str:
@@ -5955,7 +5676,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentLocalizedControlType.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentlocalizedcontroltype
         """
-        return self.Element.CurrentLocalizedControlType
+        return self._PropertyElement.CurrentLocalizedControlType
 
     @property
     def Name(self) -> str:
@@ -5964,7 +5685,10 @@ class Control():
         Call IUIAutomationElement::get_CurrentName.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentname
         """
-        return self.Element.CurrentName or ''   # CurrentName may be None
+        cached = self._GetCachedProperty('Name')
+        if cached is not None:
+            return cached
+        return self._PropertyElement.CurrentName or ''   # CurrentName may be None
 
     @property
     def NativeWindowHandle(self) -> str:
@@ -5973,7 +5697,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentNativeWindowHandle.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentnativewindowhandle
         """
-        handle = self.Element.CurrentNativeWindowHandle
+        handle = self._PropertyElement.CurrentNativeWindowHandle
         return 0 if handle is None else handle
 
     @property
@@ -5984,7 +5708,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentOrientation.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentorientation
         """
-        return self.Element.CurrentOrientation
+        return self._PropertyElement.CurrentOrientation
 
     @property
     def ProcessId(self) -> int:
@@ -5993,7 +5717,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentProcessId.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentprocessid
         """
-        return self.Element.CurrentProcessId
+        return self._PropertyElement.CurrentProcessId
 
     @property
     def ProviderDescription(self) -> str:
@@ -6002,7 +5726,7 @@ class Control():
         Call IUIAutomationElement::get_CurrentProviderDescription.
         Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-get_currentproviderdescription
         """
-        return self.Element.CurrentProviderDescription
+        return self._PropertyElement.CurrentProviderDescription
 
     #FindAll
     #FindAllBuildCache
@@ -6096,10 +5820,19 @@ class Control():
         Property Element.
         Return `ctypes.POINTER(IUIAutomationElement)`.
         """
+        if UIACallCounter.enabled:
+            UIACallCounter.com()
         if not self._element:
             self.Refind(maxSearchSeconds=TIME_OUT_SECOND, searchIntervalSeconds=self.searchInterval)
         return self._element
 
+    @property
+    def _PropertyElement(self):
+        """读取控件属性时使用的 Element，追踪开启时计入属性调用次数"""
+        if UIACallCounter.enabled:
+            UIACallCounter.property()
+        return self.Element
+
     @property
     def ControlTypeName(self) -> str:
         """
@@ -6275,6 +6008,52 @@ class Control():
             child = child.GetNextSiblingControl()
         return children
 
+    def GetCachedChildren(self, controlType: int = None) -> List['Control']:
+        """
+        Get children with ControlType, Name, ClassName, AutomationId, BoundingRectangle and RuntimeId
+        prefetched by one IUIAutomationElement::FindAllBuildCache call.
+        controlType: int, a value in class `ControlType`, if not None, only return children of this type.
+        Return List[Control], a list of `Control` subclasses, the same order as `GetChildren`.
+        Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomationelement-findallbuildcache
+        """
+        client = _AutomationClient.instance()
+        try:
+            cacheRequest = client.IUIAutomation.CreateCacheRequest()
+            for propertyId in _ChildrenCacheProperties:
+                cacheRequest.AddProperty(propertyId)
+            cacheRequest.TreeScope = TreeScope.Element
+            # keep the same view as GetChildren, which walks the raw view
+            cacheRequest.TreeFilter = client.IUIAutomation.RawViewCondition
+            if controlType is None:
+                condition = client.IUIAutomation.CreateTrueCondition()
+            else:
+                condition = client.IUIAutomation.CreatePropertyCondition(PropertyId.ControlTypeProperty, controlType)
+            elementArray = self.Element.FindAllBuildCache(TreeScope.Children, condition, cacheRequest)
+        except comtypes.COMError:
+            children = self.GetChildren()
+            if controlType is not None:
+                children = [child for child in children if child.ControlType == controlType]
+            return children
+        children = []
+        if not elementArray:
+            return children
+        for index in range(elementArray.Length):
+            element = elementArray.GetElement(index)
+            cachedControlType = element.CachedControlType
+            constructor = ControlConstructors.get(cachedControlType, Control)
+            control = constructor(element=element)
+            rect = element.CachedBoundingRectangle
+            control._cachedProperties = {
+                'ControlType': cachedControlType,
+                'Name': element.CachedName or '',
+                'ClassName': element.CachedClassName,
+                'AutomationId': element.CachedAutomationId,
+                'BoundingRectangle': Rect(rect.left, rect.top, rect.right, rect.bottom),
+                'runtimeid': ''.join([str(i) for i in (element.GetCachedPropertyValue(PropertyId.RuntimeIdProperty) or ())]) or None,
+            }
+            children.append(control)
+        return children
+
     def _CompareFunction(self, control: 'Control', depth: int) -> bool:
         """
         Define how to search.
@@ -7852,6 +7631,16 @@ ControlConstructors = {
 }
 
 
+_ChildrenCacheProperties = (
+    PropertyId.ControlTypeProperty,
+    PropertyId.NameProperty,
+    PropertyId.ClassNameProperty,
+    PropertyId.AutomationIdProperty,
+    PropertyId.BoundingRectangleProperty,
+    PropertyId.RuntimeIdProperty,
+)
+
+
 class UIAutomationInitializerInThread:
     def __init__(self, debug: bool = False):
         self.debug = debug
@@ -8079,6 +7868,43 @@ def ControlsAreSame(control1: Control, control2: Control) -> bool:
     return bool(_AutomationClient.instance().IUIAutomation.CompareElements(control1.Element, control2.Element))
 
 
+def AddStructureChangedEventHandler(control: Control, callback: Callable[[int], None],
+                                    treeScope: int = TreeScope.Element | TreeScope.Children) -> Any:
+    """
+    Call IUIAutomation.AddStructureChangedEventHandler.
+    control: `Control` or its subclass.
+    callback: function(changeType: int), changeType is a value in class `StructureChangeType`.
+        It is called on a UIA worker thread and must not call back into UIA.
+    treeScope: int, a value in class `TreeScope`.
+    Return the handler object, pass it to `RemoveStructureChangedEventHandler` to unsubscribe.
+    Refer https://docs.microsoft.com/en-us/windows/desktop/api/uiautomationclient/nf-uiautomationclient-iuiautomation-addstructurechangedeventhandler
+    """
+    client = _AutomationClient.instance()
+
+    class StructureChangedEventHandler(comtypes.COMObject):
+        _com_interfaces_ = [client.UIAutomationCore.IUIAutomationStructureChangedEventHandler]
+
+        def HandleStructureChangedEvent(self, sender, changeType, runtimeId):
+            try:
+                callback(changeType)
+            except Exception:
+                pass
+            return 0  # S_OK
+
+    handler = StructureChangedEventHandler()
+    client.IUIAutomation.AddStructureChangedEventHandler(control.Element, treeScope, None, handler)
+    return handler
+
+
+def RemoveStructureChangedEventHandler(control: Control, handler: Any) -> None:
+    """
+    Call IUIAutomation.RemoveStructureChangedEventHandler.
+    control: `Control` or its subclass, the same control passed to `AddStructureChangedEventHandler`.
+    handler: the object returned by `AddStructureChangedEventHandler`.
+    """
+    _AutomationClient.instance().IUIAutomation.RemoveStructureChangedEventHandler(control.Element, handler)
+
+
 def WalkControl(control: Control, includeTop: bool = False, maxDepth: int = 0xFFFFFFFF):
     """
     control: `Control` or its subclass.
@@ -0,0 +1,109 @@
+"""带过期时间的 LRU 缓存。
+
+用于缓存代价较高、但短时间内结果基本不变的 UI 查找结果（例如搜索关键词解析出的聊天名称）：
+
+- 容量满时淘汰最久未使用的条目；
+- 条目超过 ``ttl`` 秒后视为过期，下次读取时丢弃；
+- 调用方发现缓存结果已经失效时用 :meth:`TTLCache.invalidate` 主动删除；
+- :meth:`TTLCache.stats` 给出命中、未命中、淘汰、过期、失效次数与命中率。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+import threading
+import time
+
+V = TypeVar('V')
+
+
+class TTLCache(Generic[V]):
+    """线程安全的 LRU + TTL 缓存
+
+    Args:
+        maxsize (int): 最多缓存的条目数，小于等于 0 表示不缓存
+        ttl (float, optional): 条目有效期，单位秒，None 表示不过期
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, Tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key, time.monotonic()) is not None
+
+    def _lookup(self, key: Hashable, now: float) -> Optional[Tuple[float, V]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and now - entry[0] > self.ttl:
+            del self._data[key]
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, key: Hashable, default: V = None) -> Optional[V]:
+        """读取缓存，命中时将条目标记为最近使用"""
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key: Hashable, default: V = None) -> Optional[V]:
+        """读取缓存，不计入命中统计，也不改变淘汰顺序"""
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            return default if entry is None else entry[1]
+
+    def put(self, key: Hashable, value: V) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """删除条目，返回条目是否存在"""
+        with self._lock:
+            if self._data.pop(key, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计：size、hits、misses、hit_rate、evictions、expirations、invalidations"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,122 @@
+"""监听模式使用的消息列表变化事件源。
+
+事件源只负责回答“哪些聊天的消息列表变化了”，由 ``Listener`` 决定何时扫描：
+
+- :class:`UIAEventSource`：通过当前 uia 后端订阅 ``mmui::MessageView`` 列表的 StructureChanged 事件；
+- :class:`SyntheticEventSource`：不订阅任何控件，由调用方通过 :meth:`EventSource.notify` 注入事件，
+  用于测试监听的调度逻辑。
+"""
+
+from __future__ import annotations
+
+from wxauto4 import uia
+from wxauto4.logger import wxlog
+from abc import ABC, abstractmethod
+from typing import (
+    Any,
+    Dict,
+    Optional,
+    Set,
+)
+import threading
+import time
+
+
+class EventSource(ABC):
+    """消息列表变化事件源，``key`` 通常是监听对象的昵称"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._dirty: Set[str] = set()
+        self._closed = False
+        self.event_count = 0
+
+    @abstractmethod
+    def subscribe(self, key: str, control: Any) -> bool:
+        """订阅 control 的变化，返回 False 表示无法订阅（该对象需要轮询）"""
+
+    @abstractmethod
+    def unsubscribe(self, key: str) -> None:
+        """取消订阅"""
+
+    def notify(self, key: str) -> None:
+        """标记 key 对应的消息列表发生了变化，可在任意线程调用"""
+        with self._cond:
+            self._dirty.add(key)
+            self.event_count += 1
+            self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None, debounce: float = 0) -> Set[str]:
+        """等待事件，返回期间发生变化的 key 集合（超时或关闭时可能为空）
+
+        Args:
+            timeout: 最长等待时间，None 表示一直等待
+            debounce: 收到第一个事件后再等待的时间，用于合并同一批消息产生的多个事件
+        """
+        with self._cond:
+            if not self._dirty and not self._closed:
+                self._cond.wait(timeout)
+        if debounce > 0 and self._dirty and not self._closed:
+            time.sleep(debounce)
+        with self._cond:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def close(self) -> None:
+        """取消所有订阅并唤醒等待线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class SyntheticEventSource(EventSource):
+    """不订阅真实控件的事件源，事件全部由 :meth:`notify` 注入"""
+
+    def __init__(self):
+        super().__init__()
+        self.subscribed: Set[str] = set()
+
+    def subscribe(self, key: str, control: Any) -> bool:
+        self.subscribed.add(key)
+        return True
+
+    def unsubscribe(self, key: str) -> None:
+        self.subscribed.discard(key)
+
+
+class UIAEventSource(EventSource):
+    """基于 uia 后端 StructureChanged 事件的事件源"""
+
+    def __init__(self):
+        super().__init__()
+        self._tokens: Dict[str, Any] = {}
+
+    def subscribe(self, key: str, control: Any) -> bool:
+        self.unsubscribe(key)
+        try:
+            token = uia.get_backend().AddStructureChangedHandler(
+                control, lambda change_type: self.notify(key)
+            )
+        except Exception as e:
+            wxlog.debug(f'订阅消息列表事件失败，{key} 将使用轮询：{e}')
+            return False
+        self._tokens[key] = token
+        return True
+
+    def unsubscribe(self, key: str) -> None:
+        token = self._tokens.pop(key, None)
+        if token is None:
+            return
+        try:
+            uia.get_backend().RemoveStructureChangedHandler(token)
+        except Exception as e:
+            wxlog.debug(f'取消订阅消息列表事件失败：{key} - {e}')
+
+    def close(self) -> None:
+        for key in list(self._tokens):
+            self.unsubscribe(key)
+        super().close()
@@ -0,0 +1,178 @@
+"""基于文件的命名跨进程锁。
+
+同一台机器上互不相关的多个 Python 进程只要使用相同的锁名称和目录，就会通过同一个锁文件互斥：
+
+- POSIX 使用 ``fcntl.flock``，Windows 使用 ``msvcrt.locking``，锁由操作系统持有，
+  持有锁的进程崩溃或被杀死时随文件句柄一起释放，不会留下需要手动清理的死锁；
+- 持有者的 pid、进程启动时间与获得锁的时间写在旁边的 ``.owner`` 文件中，用于超时时的错误信息，
+  也用于识别上一任持有者未正常释放（进程已退出）的情况并记录日志。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import psutil
+
+from wxauto4.logger import wxlog
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def _process_started(pid: int) -> Optional[float]:
+    try:
+        return psutil.Process(pid).create_time()
+    except Exception:
+        return None
+
+
+class FileLock:
+    """以名称标识的跨进程互斥锁，接口与 ``multiprocessing.Lock`` 相同（``acquire``/``release``）
+
+    Args:
+        name (str): 锁名称，使用相同名称和目录的进程互斥
+        directory (str, optional): 锁文件所在目录，默认为系统临时目录
+    """
+
+    # 轮询锁文件的最短与最长间隔，单位秒
+    MIN_POLL = 0.001
+    MAX_POLL = 0.05
+
+    def __init__(self, name: str, directory: str = None):
+        self.name = name
+        directory = directory or tempfile.gettempdir()
+        self.path = os.path.join(directory, f'{name}.lock')
+        self.owner_path = os.path.join(directory, f'{name}.lock.owner')
+        self._fd: Optional[int] = None
+        self._guard = threading.Lock()
+        self.recovered = 0
+
+    def _open(self) -> int:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        return self._fd
+
+    def _try_lock(self) -> bool:
+        fd = self._open()
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def owner(self) -> Optional[Dict[str, Any]]:
+        """锁文件记录的持有者信息，没有记录时返回 None"""
+
+        try:
+            with open(self.owner_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            return json.loads(content) if content else None
+        except Exception:
+            return None
+
+    def _write_owner(self) -> None:
+        pid = os.getpid()
+        info = {
+            'pid': pid,
+            'host': socket.gethostname(),
+            'started': _process_started(pid),
+            'acquired': time.time(),
+        }
+        try:
+            with open(self.owner_path, 'w', encoding='utf-8') as f:
+                json.dump(info, f)
+        except Exception:
+            pass
+
+    def _check_stale_owner(self) -> None:
+        """拿到锁时如果记录的上一任持有者没有释放记录且进程已经不存在，说明它在持有锁时退出了"""
+
+        owner = self.owner()
+        if not owner or owner.get('host') != socket.gethostname():
+            return
+        pid = owner.get('pid')
+        if pid == os.getpid():
+            return
+        started = _process_started(pid) if isinstance(pid, int) else None
+        if started is None or (owner.get('started') is not None and abs(started - owner['started']) > 1):
+            self.recovered += 1
+            wxlog.debug(f'UI 锁 {self.name} 的上一任持有者（pid={pid}）未释放就已退出，锁已由系统回收')
+
+    def acquire(self, block: bool = True, timeout: float = None) -> bool:
+        """获取锁
+
+        Args:
+            block (bool): 是否等待
+            timeout (float, optional): 最长等待时间，None 表示一直等待
+
+        Returns:
+            bool: 是否获得锁
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = self.MIN_POLL
+        with self._guard:
+            while not self._try_lock():
+                if not block:
+                    return False
+                if deadline is not None:
+                    remain = deadline - time.monotonic()
+                    if remain <= 0:
+                        return False
+                    delay = min(delay, remain)
+                time.sleep(delay)
+                delay = min(delay * 2, self.MAX_POLL)
+            self._check_stale_owner()
+            self._write_owner()
+            return True
+
+    def release(self) -> None:
+        with self._guard:
+            if self._fd is None:
+                raise RuntimeError('释放了未持有的文件锁')
+            try:
+                with open(self.owner_path, 'w', encoding='utf-8'):
+                    pass
+            except Exception:
+                pass
+            self._unlock()
+
+    def close(self) -> None:
+        """关闭锁文件句柄（不删除锁文件，删除会让其他进程锁住不同的文件）"""
+
+        with self._guard:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def __repr__(self) -> str:
+        return f'<FileLock {self.path!r}>'
@@ -1,61 +1,404 @@
-"""线程、进程与异步环境下的全局 UI 锁。"""
+"""线程、进程与异步环境下的全局 UI 锁。
+
+锁分为共享（读）与独占（写）两种模式：
+
+- 注入输入的操作（点击、SendKeys、剪贴板等）获取独占锁，同一时间只有一个持有者；
+- 只读取 UIA 属性的操作（获取消息、会话列表等）获取共享锁，可以彼此并发，只等待独占锁。
+
+锁按持有者（线程，或在事件循环中时为 asyncio 任务）计数，同一持有者可以重复进入，
+例如 ``forward`` 内部调用 ``select_option``；持有共享锁时不能再获取独占锁。
+
+等待中的请求按优先级排队，同一优先级内先到先得。优先级来自 ``@uilock(priority=...)``，
+未指定时使用 :meth:`LockManager.priority` 为当前线程/任务设置的优先级，例如监听线程以
+``WxParam.LISTENER_LOCK_PRIORITY`` 扫描消息和执行回调，批量发送可以在 ``LockPriority.LOW`` 下运行。
+
+最外层的独占锁还会获取跨进程锁，后端由 ``WxParam.UI_LOCK_BACKEND`` 选择：``multiprocessing`` 只对同一父进程
+派生的进程有效；``file`` 使用命名的锁文件（见 :class:`~wxauto4.utils.filelock.FileLock`），互不相关的进程也能互斥。
+等待时间超过 ``WxParam.UI_LOCK_TIMEOUT`` 时抛出 :class:`~wxauto4.exceptions.WxautoLockTimeoutError`。
+"""
 
 from __future__ import annotations
 
 import asyncio
+import bisect
+import contextvars
 import functools
 import inspect
+import itertools
 import multiprocessing
 import threading
+import time
+from collections import deque
 from contextlib import asynccontextmanager, contextmanager
-from typing import Any, Awaitable, Callable, TypeVar, overload
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar, overload
+
+from wxauto4.param import WxParam
+from wxauto4.exceptions import WxautoLockTimeoutError
+from wxauto4.utils.filelock import FileLock
 
 
 F = TypeVar("F", bound=Callable[..., Any])
 AsyncReturn = TypeVar("AsyncReturn")
 
 
+class LockPriority:
+    """UI 锁的常用优先级，数值越大越优先"""
+
+    LOW = 0
+    NORMAL = 10
+    HIGH = 20
+
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar('uilock_priority', default=LockPriority.NORMAL)
+
+
+def _current_owner() -> Hashable:
+    """当前锁持有者：事件循环中的 asyncio 任务，否则为当前线程"""
+
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task if task is not None else threading.get_ident()
+
+
+def _percentile(samples: List[float], percent: float) -> Optional[float]:
+    """最近秩法分位数，samples 须已排序"""
+
+    if not samples:
+        return None
+    rank = max(1, -(-len(samples) * percent // 100))
+    return samples[int(rank) - 1]
+
+
+class LockMetrics:
+    """一个调用点的获取次数、等待时间与持有时间统计（只统计最外层的获取）
+
+    分位数基于最近 ``WxParam.LOCK_STATS_WINDOW`` 次获取计算。
+    """
+
+    def __init__(self, mode: str, priority: int):
+        self.mode = mode
+        self.priority = priority
+        self.reset()
+
+    def reset(self) -> None:
+        self.acquisitions = 0
+        self.wait_max = 0.0
+        self.hold_max = 0.0
+        self.waits = deque(maxlen=WxParam.LOCK_STATS_WINDOW)
+        self.holds = deque(maxlen=WxParam.LOCK_STATS_WINDOW)
+
+    def record_wait(self, wait: float) -> None:
+        self.acquisitions += 1
+        self.wait_max = max(self.wait_max, wait)
+        self.waits.append(wait)
+
+    def record_hold(self, hold: float) -> None:
+        self.hold_max = max(self.hold_max, hold)
+        self.holds.append(hold)
+
+    def to_dict(self) -> Dict[str, Any]:
+        waits, holds = sorted(self.waits), sorted(self.holds)
+        return {
+            'mode': self.mode,
+            'priority': self.priority,
+            'acquisitions': self.acquisitions,
+            'wait_p50': _percentile(waits, 50),
+            'wait_p99': _percentile(waits, 99),
+            'wait_max': self.wait_max,
+            'hold_p50': _percentile(holds, 50),
+            'hold_p99': _percentile(holds, 99),
+            'hold_max': self.hold_max,
+        }
+
+
+class RWLock:
+    """按优先级排队的可重入读写锁
+
+    - 等待者按（优先级从高到低，到达顺序）排队，独占锁只授予队首，且要求没有任何持有者；
+    - 共享锁在没有独占持有者、且队列中排在它前面的都不是独占请求时授予，相邻的共享请求一起放行；
+    - 已持有锁的持有者重复进入时不排队，只增加重入计数。
+
+    只负责进程内的互斥，跨进程锁由 :class:`LockManager` 在最外层的独占锁上获取。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers: Dict[Hashable, int] = {}
+        self._writer: Optional[Hashable] = None
+        self._write_depth = 0
+        # 等待队列：(-priority, seq, read)，保持有序
+        self._queue: List[Tuple[int, int, bool]] = []
+        self._seq = itertools.count()
+
+    def _grantable(self, ticket: Tuple[int, int, bool]) -> bool:
+        if self._writer is not None:
+            return False
+        if not ticket[2]:
+            return not self._readers and self._queue[0] == ticket
+        for waiting in self._queue:
+            if waiting == ticket:
+                return True
+            if not waiting[2]:
+                return False
+        return False
+
+    def acquire(self, read: bool = False, owner: Hashable = None, priority: int = None, timeout: float = None) -> bool:
+        """获取锁，返回是否为该持有者最外层的获取
+
+        Raises:
+            WxautoLockTimeoutError: 超过 timeout 秒仍未获得锁
+        """
+
+        owner = _current_owner() if owner is None else owner
+        deadline = None if timeout is None else time.monotonic() + timeout
+        priority = _priority.get() if priority is None else priority
+        with self._cond:
+            if self._writer == owner:
+                self._write_depth += 1
+                return False
+            if owner in self._readers:
+                if not read:
+                    raise RuntimeError('持有共享 UI 锁时不能获取独占 UI 锁')
+                self._readers[owner] += 1
+                return False
+            ticket = (-priority, next(self._seq), read)
+            bisect.insort(self._queue, ticket)
+            try:
+                while not self._grantable(ticket):
+                    if deadline is None:
+                        self._cond.wait()
+                    elif not self._cond.wait(deadline - time.monotonic()) and time.monotonic() >= deadline:
+                        raise WxautoLockTimeoutError(message=f'{timeout} 秒内未获得进程内 UI 锁')
+            finally:
+                self._queue.remove(ticket)
+                # 队首变化后其他等待者可能可以放行
+                self._cond.notify_all()
+            if read:
+                self._readers[owner] = 1
+                return True
+            self._writer = owner
+            self._write_depth = 1
+            return True
+
+    def release(self, read: bool = False, owner: Hashable = None) -> bool:
+        """释放锁，返回是否为该持有者最外层的释放"""
+
+        owner = _current_owner() if owner is None else owner
+        with self._cond:
+            if self._writer == owner:
+                self._write_depth -= 1
+                if self._write_depth:
+                    return False
+                self._writer = None
+            elif self._readers.get(owner):
+                self._readers[owner] -= 1
+                if self._readers[owner]:
+                    return False
+                del self._readers[owner]
+            else:
+                raise RuntimeError('释放了未持有的 UI 锁')
+            self._cond.notify_all()
+            return True
+
+    def owned(self, owner: Hashable = None) -> Optional[str]:
+        """当前持有者持有的锁模式：'write'、'read' 或 None"""
+
+        owner = _current_owner() if owner is None else owner
+        with self._cond:
+            if self._writer == owner:
+                return 'write'
+            if owner in self._readers:
+                return 'read'
+            return None
+
+    @property
+    def waiting(self) -> int:
+        """排队中的请求数量"""
+
+        with self._cond:
+            return len(self._queue)
+
+
 class LockManager:
-    """提供跨线程/进程/异步的锁。"""
+    """提供跨线程/进程/异步的读写锁。"""
 
     process_lock = multiprocessing.Lock()
-    thread_lock = threading.RLock()
-    _async_lock: asyncio.Lock | None = None
+    rwlock = RWLock()
+    metrics: Dict[str, LockMetrics] = {}
+    _file_locks: Dict[Tuple[str, Optional[str]], FileLock] = {}
+    # 当前进程内独占锁持有者获取的跨进程锁（同一时间只有一个独占持有者）
+    _held_process_lock = None
+    # 当前持有者 -> (调用点, 模式, 优先级, 获得锁的时间)
+    _holders: Dict[Hashable, Tuple[str, str, int, float]] = {}
+    _metrics_lock = threading.Lock()
 
     @classmethod
-    def _get_async_lock(cls) -> asyncio.Lock:
-        """返回与当前事件循环绑定的 ``asyncio.Lock``。"""
+    @contextmanager
+    def priority(cls, priority: int):
+        """在当前线程/任务中以指定优先级获取 UI 锁（``@uilock`` 未显式指定优先级时生效）"""
 
-        loop = None
+        token = _priority.set(priority)
         try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            pass
+            yield
+        finally:
+            _priority.reset(token)
+
+    @classmethod
+    def get_process_lock(cls):
+        """按 ``WxParam.UI_LOCK_BACKEND`` 返回跨进程锁"""
+
+        if WxParam.UI_LOCK_BACKEND == 'file':
+            key = (WxParam.UI_LOCK_NAME, WxParam.UI_LOCK_DIR)
+            lock = cls._file_locks.get(key)
+            if lock is None:
+                lock = cls._file_locks[key] = FileLock(*key)
+            return lock
+        return cls.process_lock
+
+    @classmethod
+    def _begin(cls, read: bool, owner: Hashable, priority: int, site: str, timeout: float = None) -> Optional[float]:
+        """获取锁并记录等待时间，返回最外层获取的时间点"""
 
-        lock = cls._async_lock
-        if lock is None or (loop and getattr(lock, "_loop", loop) is not loop):
-            lock = asyncio.Lock()
-            cls._async_lock = lock
-        return lock
+        t0 = time.perf_counter()
+        if not cls.rwlock.acquire(read, owner, priority, timeout):
+            return None
+        if not read:
+            process_lock = cls.get_process_lock()
+            remain = None if timeout is None else max(0.0, timeout - (time.perf_counter() - t0))
+            try:
+                acquired = process_lock.acquire(timeout=remain)
+            except BaseException:
+                cls.rwlock.release(read, owner)
+                raise
+            if not acquired:
+                cls.rwlock.release(read, owner)
+                raise WxautoLockTimeoutError(
+                    message=f'{timeout} 秒内未获得跨进程 UI 锁',
+                    detail=f'持有者：{process_lock.owner()}' if isinstance(process_lock, FileLock) else None
+                )
+            cls._held_process_lock = process_lock
+        t1 = time.perf_counter()
+        mode = 'read' if read else 'write'
+        with cls._metrics_lock:
+            metrics = cls.metrics.get(site)
+            if metrics is None:
+                metrics = cls.metrics[site] = LockMetrics(mode, priority)
+            metrics.priority = priority
+            metrics.record_wait(t1 - t0)
+            cls._holders[owner] = (site, mode, priority, t1)
+        return t1
+
+    @classmethod
+    def _end(cls, read: bool, owner: Hashable, site: str, acquired_at: Optional[float]) -> None:
+        """释放锁并记录持有时间"""
+
+        if acquired_at is not None:
+            with cls._metrics_lock:
+                cls._holders.pop(owner, None)
+                cls.metrics[site].record_hold(time.perf_counter() - acquired_at)
+            if not read:
+                # 先释放跨进程锁，再放行进程内的下一个独占持有者
+                process_lock, cls._held_process_lock = cls._held_process_lock, None
+                process_lock.release()
+        cls.rwlock.release(read, owner)
 
     @classmethod
     @contextmanager
-    def acquire(cls):
-        """同步环境下获取锁。"""
+    def acquire(
+            cls,
+            read: bool = False,
+            priority: int = None,
+            site: str = 'LockManager.acquire',
+            timeout: float = None
+        ):
+        """同步环境下获取锁。
+
+        Args:
+            read (bool): True 获取共享锁，False 获取独占锁
+            priority (int, optional): 排队优先级，默认使用 :meth:`priority` 设置的值
+            site (str): 统计时使用的调用点名称
+            timeout (float, optional): 最长等待时间，默认为 ``WxParam.UI_LOCK_TIMEOUT``
 
-        with cls.process_lock:
-            with cls.thread_lock:
-                yield
+        Raises:
+            WxautoLockTimeoutError: 等待超时
+        """
+
+        owner = _current_owner()
+        priority = _priority.get() if priority is None else priority
+        timeout = WxParam.UI_LOCK_TIMEOUT if timeout is None else timeout
+        acquired_at = cls._begin(read, owner, priority, site, timeout)
+        try:
+            yield
+        finally:
+            cls._end(read, owner, site, acquired_at)
 
     @classmethod
     @asynccontextmanager
-    async def acquire_async(cls):
-        """异步环境下获取锁。"""
+    async def acquire_async(
+            cls,
+            read: bool = False,
+            priority: int = None,
+            site: str = 'LockManager.acquire_async',
+            timeout: float = None
+        ):
+        """异步环境下获取锁，等待在线程池中进行，不阻塞事件循环。
+
+        Args:
+            read (bool): True 获取共享锁，False 获取独占锁
+            priority (int, optional): 排队优先级，默认使用 :meth:`priority` 设置的值
+            site (str): 统计时使用的调用点名称
+            timeout (float, optional): 最长等待时间，默认为 ``WxParam.UI_LOCK_TIMEOUT``
+
+        Raises:
+            WxautoLockTimeoutError: 等待超时
+        """
 
-        async with cls._get_async_lock():
-            with cls.process_lock:
-                with cls.thread_lock:
-                    yield
+        owner = _current_owner()
+        priority = _priority.get() if priority is None else priority
+        timeout = WxParam.UI_LOCK_TIMEOUT if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, cls._begin, read, owner, priority, site, timeout)
+        try:
+            acquired_at = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # 取消时线程池中的获取仍在进行，拿到后立即释放
+            future.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or cls._end(read, owner, site, f.result())
+            )
+            raise
+        try:
+            yield
+        finally:
+            cls._end(read, owner, site, acquired_at)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """每个调用点的模式、优先级、获取次数，以及等待/持有时间的 p50、p99 与最大值（秒）
+
+        Returns:
+            dict: {调用点: 统计}，``@uilock`` 装饰的函数以 ``模块.限定名`` 作为调用点
+        """
+
+        with cls._metrics_lock:
+            return {site: metrics.to_dict() for site, metrics in cls.metrics.items()}
+
+    @classmethod
+    def holders(cls) -> List[Dict[str, Any]]:
+        """当前持有锁的调用点、模式、优先级与已持有时间（秒）"""
+
+        now = time.perf_counter()
+        with cls._metrics_lock:
+            return [
+                {'site': site, 'mode': mode, 'priority': priority, 'held_for': now - acquired_at}
+                for site, mode, priority, acquired_at in cls._holders.values()
+            ]
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._metrics_lock:
+            cls.metrics.clear()
 
 
 @overload
@@ -68,24 +411,39 @@ def uilock(func: F) -> F:
     ...
 
 
-def uilock(func: F):  # type: ignore[misc]
-    """确保 UI 自动化操作串行执行的装饰器。"""
+@overload
+def uilock(*, read: bool = False, priority: int = None) -> Callable[[F], F]:
+    ...
+
+
+def uilock(func: F = None, *, read: bool = False, priority: int = None):  # type: ignore[misc]
+    """确保 UI 自动化操作互斥执行的装饰器。
+
+    ``@uilock`` 获取独占锁，用于点击、输入、剪贴板等注入输入的操作；
+    ``@uilock(read=True)`` 获取共享锁，用于只读取 UIA 属性的操作；
+    ``priority`` 固定该操作的排队优先级，不指定时使用调用方所在线程/任务的优先级。
+    """
+
+    if func is None:
+        return functools.partial(uilock, read=read, priority=priority)
+
+    site = f'{func.__module__}.{func.__qualname__}'
 
     if inspect.iscoroutinefunction(func):
 
         @functools.wraps(func)
         async def async_wrapper(*args: Any, **kwargs: Any):
-            async with LockManager.acquire_async():
+            async with LockManager.acquire_async(read, priority, site):
                 return await func(*args, **kwargs)
 
         return async_wrapper
 
     @functools.wraps(func)
     def sync_wrapper(*args: Any, **kwargs: Any):
-        with LockManager.acquire():
+        with LockManager.acquire(read, priority, site):
             return func(*args, **kwargs)
 
     return sync_wrapper  # type: ignore[return-value]
 
 
-__all__ = ["LockManager", "uilock"]
+__all__ = ["LockManager", "LockMetrics", "LockPriority", "RWLock", "uilock"]
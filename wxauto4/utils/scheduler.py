@@ -0,0 +1,192 @@
+"""监听对象的自适应轮询调度。
+
+每个需要轮询的聊天都有自己的下次到期时间：
+
+- 有活动迹象（事件、会话列表变化等）或 ``LISTEN_HOT_PERIOD`` 秒内收到过消息的聊天按 ``LISTEN_INTERVAL`` 快速轮询；
+- 安静超过 ``LISTEN_HOT_PERIOD`` 的聊天每次轮询没有新消息就按 ``LISTEN_BACKOFF_FACTOR`` 指数退避，最长 ``LISTEN_MAX_INTERVAL``；
+- 平时不需要轮询的聊天（已订阅事件、在会话列表中可见）由 :meth:`ListenScheduler.touch` 临时加入调度，
+  在快速轮询期内接住后续消息，安静后自动移出调度。
+
+监听大量聊天而只有少数活跃时，安静的聊天很快退避到上限，每轮的 UIA 调用量随之大幅下降。
+"""
+
+from __future__ import annotations
+
+from wxauto4.param import WxParam
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+import threading
+import time
+
+
+@dataclass
+class ChatSchedule:
+    """单个聊天的调度状态与统计"""
+
+    interval: float
+    next_due: float
+    polls: int = 0
+    hits: int = 0
+    hints: int = 0
+    last_poll: Optional[float] = None
+    last_hit: Optional[float] = None
+    total_gap: float = 0.0
+    # 临时加入调度的聊天，安静后移出而不是退避
+    temporary: bool = False
+
+    @property
+    def avg_interval(self) -> Optional[float]:
+        """相邻两次轮询的平均间隔"""
+        if self.polls < 2:
+            return None
+        return self.total_gap / (self.polls - 1)
+
+    def to_dict(self) -> dict:
+        return {
+            'interval': self.interval,
+            'avg_interval': self.avg_interval,
+            'polls': self.polls,
+            'hits': self.hits,
+            'hints': self.hints,
+        }
+
+
+class ListenScheduler:
+    """按聊天维护下次到期时间的轮询调度器，可在多个线程中使用"""
+
+    def __init__(
+            self,
+            fast_interval: float = None,
+            max_interval: float = None,
+            backoff: float = None,
+            hot_period: float = None
+        ):
+        self.fast_interval = WxParam.LISTEN_INTERVAL if fast_interval is None else fast_interval
+        self.max_interval = WxParam.LISTEN_MAX_INTERVAL if max_interval is None else max_interval
+        self.backoff = WxParam.LISTEN_BACKOFF_FACTOR if backoff is None else backoff
+        self.hot_period = WxParam.LISTEN_HOT_PERIOD if hot_period is None else hot_period
+        self._chats: Dict[str, ChatSchedule] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __contains__(self, who: str) -> bool:
+        return who in self._chats
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def add(self, who: str) -> None:
+        """加入调度，立即到期；已临时加入的聊天改为一直轮询"""
+        with self._cond:
+            schedule = self._chats.get(who)
+            if schedule is None:
+                self._chats[who] = ChatSchedule(self.fast_interval, time.monotonic())
+                self._cond.notify_all()
+            else:
+                schedule.temporary = False
+
+    def remove(self, who: str) -> None:
+        with self._cond:
+            self._chats.pop(who, None)
+
+    def release(self, who: str) -> None:
+        """不再需要一直轮询：安静的聊天立即移出调度，快速轮询期内的聊天改为临时调度，安静后移出"""
+        now = time.monotonic()
+        with self._cond:
+            schedule = self._chats.get(who)
+            if schedule is None:
+                return
+            if self._is_hot(schedule, now):
+                schedule.temporary = True
+            else:
+                del self._chats[who]
+
+    def touch(self, who: str, add: bool = False) -> None:
+        """有活动迹象：回到快速轮询并立即到期
+
+        Args:
+            who: 聊天名称
+            add: 不在调度中时是否临时加入调度，在快速轮询期结束后自动移出
+        """
+        now = time.monotonic()
+        with self._cond:
+            schedule = self._chats.get(who)
+            if schedule is None:
+                if not add:
+                    return
+                schedule = self._chats[who] = ChatSchedule(self.fast_interval, now, temporary=True)
+            schedule.hints += 1
+            schedule.last_hit = now
+            schedule.interval = self.fast_interval
+            schedule.next_due = now
+            self._cond.notify_all()
+
+    def _is_hot(self, schedule: ChatSchedule, now: float) -> bool:
+        return schedule.last_hit is not None and now - schedule.last_hit < self.hot_period
+
+    def record(self, who: str, got_messages: bool) -> None:
+        """记录一次轮询结果并安排下次到期时间"""
+        now = time.monotonic()
+        with self._cond:
+            schedule = self._chats.get(who)
+            if schedule is None:
+                return
+            if schedule.last_poll is not None:
+                schedule.total_gap += now - schedule.last_poll
+            schedule.last_poll = now
+            schedule.polls += 1
+            if got_messages:
+                schedule.hits += 1
+                schedule.last_hit = now
+                schedule.interval = self.fast_interval
+            elif self._is_hot(schedule, now):
+                schedule.interval = self.fast_interval
+            elif schedule.temporary:
+                del self._chats[who]
+                return
+            else:
+                schedule.interval = min(schedule.interval * self.backoff, self.max_interval)
+            schedule.next_due = now + schedule.interval
+
+    def due(self, now: float = None) -> Set[str]:
+        """返回已经到期的聊天"""
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            return {who for who, schedule in self._chats.items() if schedule.next_due <= now}
+
+    def time_to_next(self, now: float = None) -> Optional[float]:
+        """距离最早到期还有多久，没有聊天时返回 None"""
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            if not self._chats:
+                return None
+            return max(0.0, min(schedule.next_due for schedule in self._chats.values()) - now)
+
+    def wait(self, timeout: float = None) -> Set[str]:
+        """等待直到有聊天到期、有聊天被 :meth:`add`/:meth:`touch` 或调度器关闭，返回到期的聊天
+
+        Args:
+            timeout: 最长等待时间，None 表示一直等待到有聊天到期
+        """
+        with self._cond:
+            if not self._closed:
+                wait = self.time_to_next()
+                if wait is None or (timeout is not None and timeout < wait):
+                    wait = timeout
+                if wait is None or wait > 0:
+                    self._cond.wait(wait)
+        return self.due()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self, whos: Iterable[str] = None) -> Dict[str, dict]:
+        """每个聊天的当前轮询间隔、平均间隔、轮询次数、命中次数与活动提示次数"""
+        with self._cond:
+            return {
+                who: schedule.to_dict()
+                for who, schedule in self._chats.items()
+                if whos is None or who in whos
+            }
@@ -2,16 +2,26 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 from pathlib import Path
+import io
 import math
+import os
 import re
 import shutil
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal, Union
 
 from PIL import Image
 
-from wxauto4.uia import uiautomation as uia
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时使用纯 Python 实现
+    np = None
 
-from .win32 import GetAllWindows
+from wxauto4 import uia
+
+from .win32 import EnumWindows
+from .wait import wait_for
 
 def get_file_dir(dir_path=None):
     if dir_path is None:
@@ -22,26 +32,19 @@ def get_file_dir(dir_path=None):
     return dir_path
 
 def find_window_from_root(classname=None, name=None, pid:int=None, uiaclsname:str=None, timeout=1):
-    t0 = time.time()
-    while True:
-        wins = find_all_windows_from_root(classname, name, pid, uiaclsname)
-        if len(wins) > 0:
-            return wins[0]
-        if time.time() - t0 > timeout:
-            return None
-
-def find_all_windows_from_root(classname:str=None, name:str=None, pid:int=None, uiaclsname:str=None):
-    windows = GetAllWindows()
-    targets = []
-    for window in windows:
-        if (
-            (all((classname, name)) and classname == window[1] and name == window[2])
-            or (all((classname, not name)) and classname == window[1])
-            or (all((not classname, name)) and name == window[2])
-        ):
-            targets.append(uia.ControlFromHandle(window[0]))
-    if pid:
-        targets = [w for w in targets if w.ProcessId == pid]
+    wins = wait_for(
+        lambda: find_all_windows_from_root(classname, name, pid, uiaclsname, first=not uiaclsname, fresh=True),
+        timeout,
+        name=f'find_window_from_root({name or classname})',
+        window_event=True
+    )
+    return wins[0] if wins else None
+
+def find_all_windows_from_root(classname:str=None, name:str=None, pid:int=None, uiaclsname:str=None, first:bool=False, fresh:bool=False):
+    if not (classname or name):
+        return []
+    windows = EnumWindows(classname or None, name or None, pid or None, first, fresh)
+    targets = [uia.ControlFromHandle(window[0]) for window in windows]
     if uiaclsname:
         targets = [w for w in targets if w.ClassName == uiaclsname]
     return targets
@@ -130,33 +133,35 @@ def delete_update_files():
 #                                                           消息解析方法
 # ============================================================================================================================================
 
-def detect_message_direction(
-    image_path: str,
-    avatar_height_ratio: float = 0.8,
-    tolerance: int = 5,  # 增加容忍度，从0改为5，提高检测准确性
-) -> tuple[str, float]:
-    """通过截图判断消息气泡的方向。
+ImageInput = Union[str, os.PathLike, bytes, bytearray, memoryview, Image.Image, Any]
+
+
+def _load_image(image: ImageInput) -> Image.Image:
+    """将各种形式的图片统一为 RGB 模式的 PIL 图片，全程不读写临时文件
 
     Args:
-        image_path: 消息截图路径。
-        avatar_height_ratio: 头像在截图中占据的高度比例。
-        tolerance: 像素颜色比较的容忍度。
+        image: 图片路径、PIL 图片、编码后的图片字节（如 PNG）或形如 (h, w, 3) 的数组
 
     Returns:
-        Tuple[str, float]: ``("left", distance)`` 或 ``("right", distance)``，
-        ``distance`` 表示从对应方向开始出现气泡的列索引，便于后续定位。
+        Image.Image: RGB 模式的图片
     """
-
-    img = Image.open(image_path)
+    if isinstance(image, Image.Image):
+        img = image
+    elif isinstance(image, (str, os.PathLike)):
+        img = Image.open(image)
+    elif isinstance(image, (bytes, bytearray, memoryview)):
+        img = Image.open(io.BytesIO(image))
+    elif hasattr(image, '__array_interface__'):
+        img = Image.fromarray(image)
+    else:
+        raise TypeError(f'不支持的图片类型：{type(image).__name__}')
     if img.mode != 'RGB':
         img = img.convert('RGB')
-    w, h = img.size
-
-    # 仅取中间 band 区域
-    band_h = int(h * avatar_height_ratio)
-    y0 = (h - band_h) // 2
-    y1 = y0 + band_h
+    return img
 
+def _find_bubble_columns_python(img: Image.Image, y0: int, y1: int, tolerance: int) -> tuple:
+    """逐列读取像素，返回 (left_idx, right_idx)，含义见 :func:`detect_message_direction`"""
+    w, _ = img.size
     pixels = img.load()  # 获取像素访问对象
 
     def is_uniform_column(x: int) -> bool:
@@ -187,6 +192,61 @@ def detect_message_direction(
         if not is_uniform_column(x):
             right_idx = offset  # 距右边界的列数
             break
+    return left_idx, right_idx
+
+def _find_bubble_columns_numpy(img: Image.Image, y0: int, y1: int, tolerance: int) -> tuple:
+    """与 :func:`_find_bubble_columns_python` 结果一致，一次数组运算得到所有列是否一致"""
+    w, h = img.size
+    # 只转换三行采样点，不转换整张截图；行号取模与像素访问的负索引行为一致
+    rows = np.stack([
+        np.asarray(img.crop((0, y % h, w, y % h + 1)))[0]
+        for y in (y0, (y0 + y1) // 2, y1 - 1)
+    ]).astype(np.int16)  # (3, w, 3)
+    # 任一采样点与第一个采样点在任一通道上相差超过容忍度，即为非一致列
+    changed = (np.abs(rows[1:] - rows[0]) > tolerance).any(axis=(0, 2))
+
+    left_start = max(0, int(w * 0.05))
+    hits = np.flatnonzero(changed[left_start:])
+    left_idx = left_start + int(hits[0]) if hits.size else math.inf
+
+    right_start = max(0, int(w * 0.95))
+    hits = np.flatnonzero(changed[right_start:][::-1])
+    right_idx = int(hits[0]) if hits.size else math.inf
+    return left_idx, right_idx
+
+def detect_message_direction(
+    image_path: ImageInput,
+    avatar_height_ratio: float = 0.8,
+    tolerance: int = 5,  # 增加容忍度，从0改为5，提高检测准确性
+    vectorized: bool = None,
+) -> tuple[str, float]:
+    """通过截图判断消息气泡的方向。
+
+    Args:
+        image_path: 消息截图，可以是路径、PIL 图片、图片字节或数组。
+        avatar_height_ratio: 头像在截图中占据的高度比例。
+        tolerance: 像素颜色比较的容忍度。
+        vectorized: 是否使用 numpy 向量化扫描，默认在安装了 numpy 时使用。
+
+    Returns:
+        Tuple[str, float]: ``("left", distance)`` 或 ``("right", distance)``，
+        ``distance`` 表示从对应方向开始出现气泡的列索引，便于后续定位。
+    """
+
+    img = _load_image(image_path)
+    w, h = img.size
+
+    # 仅取中间 band 区域
+    band_h = int(h * avatar_height_ratio)
+    y0 = (h - band_h) // 2
+    y1 = y0 + band_h
+
+    if vectorized is None:
+        vectorized = np is not None
+    if vectorized:
+        left_idx, right_idx = _find_bubble_columns_numpy(img, y0, y1, tolerance)
+    else:
+        left_idx, right_idx = _find_bubble_columns_python(img, y0, y1, tolerance)
 
     # 改进判断逻辑：如果距离差异很小，使用更严格的判断
     # 如果 left_idx 和 right_idx 都很小，说明消息气泡在中间，需要更仔细判断
@@ -221,18 +281,39 @@ def detect_message_direction(
         return 'left', float(left_idx)
     return 'right', float(right_idx)
 
-def calculate_pixel_variance(region):
+def _region_array(region):
+    """将 PIL 图片或数组转换为 (像素数, 通道数) 的 int64 数组"""
+    arr = np.asarray(region)
+    if arr.ndim == 2:
+        arr = arr[:, :, None]
+    return arr.reshape(-1, arr.shape[-1]).astype(np.int64)
+
+def calculate_pixel_variance(region, vectorized: bool = None):
     """
     计算图像区域的像素变化程度
     
     Args:
         region: PIL Image对象
+        vectorized: 是否使用 numpy 计算，默认在安装了 numpy 时使用
     
     Returns:
         float: 像素变化程度的度量值
     """
     if region.size[0] == 0 or region.size[1] == 0:
         return 0
+
+    if vectorized is None:
+        vectorized = np is not None
+    if vectorized:
+        # 与 calculate_variance 相同的两遍算法：先求均值，再按像素顺序累加离差平方（cumsum 逐项累加，
+        # 不用 sum 的分组求和），结果与逐像素计算完全一致
+        arr = _region_array(region)[:, :3]
+        n = arr.shape[0]
+        means = [int(total) / n for total in arr.sum(axis=0)]
+        return sum(
+            float(np.cumsum((arr[:, c] - mean) ** 2)[-1]) / n
+            for c, mean in enumerate(means)
+        )
     
     # 获取所有像素值
     pixels = list(region.getdata())
@@ -272,16 +353,29 @@ def calculate_variance(values):
     
     return variance
 
-def calculate_color_diversity(region):
+def calculate_color_diversity(region, vectorized: bool = None):
     """
     计算区域颜色多样性（备用方法）
     
     Args:
         region: PIL Image对象
+        vectorized: 是否使用 numpy 计算，默认在安装了 numpy 时使用
     
     Returns:
         float: 颜色多样性得分
     """
+    if vectorized is None:
+        vectorized = np is not None
+    if vectorized:
+        if region.size[0] == 0 or region.size[1] == 0:
+            return 0
+        # 每个像素的各通道打包为一个整数后去重，不创建像素元组
+        arr = _region_array(region)
+        packed = np.zeros(arr.shape[0], dtype=np.int64)
+        for channel in range(arr.shape[1]):
+            packed = (packed << 8) | arr[:, channel]
+        return np.unique(packed).size / arr.shape[0]
+
     pixels = list(region.getdata())
     
     if not pixels:
@@ -297,23 +391,25 @@ def calculate_color_diversity(region):
     return diversity_ratio
 
 def detect_message_direction_enhanced(
-    image_path: str,
+    image_path: ImageInput,
     avatar_width_ratio: float = 0.15,
     avatar_height_ratio: float = 0.8,
+    vectorized: bool = None,
 ) -> tuple[str, float]:
     """
     增强版检测，结合方差和颜色多样性
     
     Args:
-        image_path: 消息图片路径
+        image_path: 消息图片，可以是路径、PIL 图片、图片字节或数组
         avatar_width_ratio: 头像区域宽度比例
         avatar_height_ratio: 头像区域高度比例
+        vectorized: 是否使用 numpy 计算，默认在安装了 numpy 时使用
     
     Returns:
         str: 'left' 或 'right'
     """
     
-    img = Image.open(image_path).convert('RGB')
+    img = _load_image(image_path)
     width, height = img.size
     
     avatar_width = int(width * avatar_width_ratio)
@@ -329,11 +425,11 @@ def detect_message_direction_enhanced(
     right_region = img.crop(right_box)
     
     # 计算方差和颜色多样性
-    left_variance = calculate_pixel_variance(left_region)
-    right_variance = calculate_pixel_variance(right_region)
+    left_variance = calculate_pixel_variance(left_region, vectorized)
+    right_variance = calculate_pixel_variance(right_region, vectorized)
     
-    left_diversity = calculate_color_diversity(left_region)
-    right_diversity = calculate_color_diversity(right_region)
+    left_diversity = calculate_color_diversity(left_region, vectorized)
+    right_diversity = calculate_color_diversity(right_region, vectorized)
     
     # 综合评分（方差权重0.7，多样性权重0.3）
     left_score = left_variance * 0.7 + left_diversity * 1000 * 0.3
@@ -343,46 +439,80 @@ def detect_message_direction_enhanced(
         return 'left', float(left_score)
     return 'right', float(right_score)
 
-def batch_detect_messages(image_paths, method='basic', **kwargs):
-    """
-    批量检测多条消息的方向
-    
-    Args:
-        image_paths: 图片路径列表
-        method: 检测方法 ('basic' 或 'enhanced')
-        **kwargs: 传递给检测函数的额外参数
-    
-    Returns:
-        list: 检测结果列表
-    """
-    results = []
-    
+def _detect_message_chunk(method: str, images: list, kwargs: dict) -> list:
+    """在工作进程/线程中检测一组图片，单张图片的异常记录在对应结果中"""
     detect_func = detect_message_direction if method == 'basic' else detect_message_direction_enhanced
-
-    for path in image_paths:
+    results = []
+    for image in images:
         try:
-            result = detect_func(path, **kwargs)
+            result = detect_func(image, **kwargs)
             if isinstance(result, tuple):
                 direction, distance = result
             else:
                 direction, distance = result, None
             sender = '对方' if direction == 'left' else '自己'
             results.append({
-                'path': path,
                 'direction': direction,
                 'sender': sender,
                 'distance': distance,
             })
         except Exception as e:
             results.append({
-                'path': path,
                 'direction': 'unknown',
                 'sender': '未知',
                 'error': str(e)
             })
-    
     return results
 
+def batch_detect_messages(
+    image_paths,
+    method='basic',
+    workers: int = 1,
+    pool: Literal['process', 'thread'] = 'process',
+    chunksize: int = None,
+    **kwargs
+):
+    """
+    批量检测多条消息的方向
+    
+    Args:
+        image_paths: 图片列表，元素可以是路径、PIL 图片、图片字节或数组
+        method: 检测方法 ('basic' 或 'enhanced')
+        workers: 并行数量，1 表示在当前线程中依次检测
+        pool: 并行方式，'process' 使用进程池（Windows 下需在 ``if __name__ == '__main__':`` 中调用），'thread' 使用线程池
+        chunksize: 并行检测（workers > 1）时每个任务包含的图片数，进程池与线程池都按此分组，
+            默认把图片均分为约 workers * 4 份；依次检测时不分组，忽略此参数
+        **kwargs: 传递给检测函数的额外参数
+    
+    Returns:
+        list: 检测结果列表，与输入顺序一致；输入为路径时 ``path`` 为该路径，否则为 None
+    """
+    images = [bytes(image) if isinstance(image, memoryview) else image for image in image_paths]
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(images) <= 1:
+        results = _detect_message_chunk(method, images, kwargs)
+    else:
+        if chunksize is None:
+            chunksize = max(1, math.ceil(len(images) / (workers * 4)))
+        executor_class = ProcessPoolExecutor if pool == 'process' else ThreadPoolExecutor
+        chunks = [images[i:i + chunksize] for i in range(0, len(images), chunksize)]
+        results = []
+        with executor_class(max_workers=workers) as executor:
+            futures = [executor.submit(_detect_message_chunk, method, chunk, kwargs) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # 任务本身失败（如图片无法序列化到子进程），整组记为错误
+                    results.extend({'direction': 'unknown', 'sender': '未知', 'error': str(e)} for _ in chunk)
+
+    return [
+        {'path': image if isinstance(image, (str, os.PathLike)) else None, **result}
+        for image, result in zip(images, results)
+    ]
+
 
 # ============================================================================================================================================
 #                                                           消息解析方法End
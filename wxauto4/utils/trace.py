@@ -0,0 +1,241 @@
+"""操作追踪：记录每个操作（span）的耗时与 UIA 调用量，用于定位延迟长尾。
+
+默认关闭，关闭时被追踪的函数只多一次函数调用与一次属性判断。开启后：
+
+- 嵌套调用形成父子 span，例如 ``Chat.SendMsg`` > ``ChatBox.send_msg``；
+- 每个 span 记录墙钟时间，以及期间当前线程发出的 UIA 跨进程调用（com）与属性读取（property）次数；
+- 最近 ``TRACE_BUFFER`` 个 span 可以导出为 Chrome trace-event JSON，在 chrome://tracing 或 Perfetto 中查看；
+- 每个 span 名称保留最近 ``TRACE_SUMMARY_WINDOW`` 次的耗时，汇总为 p50/p99/max。
+
+用法::
+
+    from wxauto4.utils.trace import Tracer
+
+    Tracer.enable()
+    wx.SendMsg('你好', '文件传输助手')
+    print(Tracer.summary())
+    Tracer.export_chrome('trace.json')
+"""
+
+from __future__ import annotations
+
+from wxauto4.param import WxParam
+from wxauto4.uia.common import UIACallCounter
+from wxauto4.utils.lock import _percentile
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+import functools
+import json
+import os
+import threading
+import time
+
+
+class Span:
+    """一次被追踪的操作"""
+
+    __slots__ = ('name', 'start', 'end', 'tid', 'depth', 'com', 'property', 'error')
+
+    def __init__(self, name: str, tid: int, depth: int):
+        self.name = name
+        self.tid = tid
+        self.depth = depth
+        self.error = False
+        self.com, self.property = UIACallCounter.snapshot()
+        self.start = time.perf_counter()
+        self.end = None
+
+    def finish(self, error: bool) -> None:
+        self.end = time.perf_counter()
+        com, prop = UIACallCounter.snapshot()
+        self.com = com - self.com
+        self.property = prop - self.property
+        self.error = error
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_event(self, epoch: float, pid: int) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'cat': 'wxauto4',
+            'ph': 'X',
+            'ts': round((self.start - epoch) * 1e6, 3),
+            'dur': round(self.duration * 1e6, 3),
+            'pid': pid,
+            'tid': self.tid,
+            'args': {'com': self.com, 'property': self.property, 'error': self.error},
+        }
+
+
+class SpanSummary:
+    """单个 span 名称的滚动汇总"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.durations: Deque[float] = deque(maxlen=WxParam.TRACE_SUMMARY_WINDOW)
+        self.com: Deque[int] = deque(maxlen=WxParam.TRACE_SUMMARY_WINDOW)
+        self.property: Deque[int] = deque(maxlen=WxParam.TRACE_SUMMARY_WINDOW)
+
+    def add(self, span: Span) -> None:
+        self.count += 1
+        self.errors += span.error
+        self.durations.append(span.duration)
+        self.com.append(span.com)
+        self.property.append(span.property)
+
+    def to_dict(self) -> Dict[str, Any]:
+        durations = sorted(self.durations)
+        n = len(durations)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'p50': _percentile(durations, 50),
+            'p99': _percentile(durations, 99),
+            'max': durations[-1] if durations else None,
+            'avg_com': sum(self.com) / n if n else None,
+            'avg_property': sum(self.property) / n if n else None,
+            'max_com': max(self.com) if n else None,
+        }
+
+
+class Tracer:
+    """全局追踪开关与记录，所有线程共用"""
+
+    enabled = False
+
+    _local = threading.local()
+    _lock = threading.Lock()
+    _spans: Deque[Span] = deque(maxlen=WxParam.TRACE_BUFFER)
+    _summary: Dict[str, SpanSummary] = {}
+    _epoch = time.perf_counter()
+
+    @classmethod
+    def enable(cls) -> None:
+        """开启追踪（同时开启 UIA 调用计数）"""
+        with cls._lock:
+            if cls._spans.maxlen != WxParam.TRACE_BUFFER:
+                cls._spans = deque(cls._spans, maxlen=WxParam.TRACE_BUFFER)
+        UIACallCounter.enabled = True
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = False
+        UIACallCounter.enabled = False
+
+    @classmethod
+    def reset(cls) -> None:
+        """清空已记录的 span 与汇总"""
+        with cls._lock:
+            cls._spans.clear()
+            cls._summary = {}
+
+    @classmethod
+    @contextmanager
+    def span(cls, name: str):
+        """追踪一段代码，追踪关闭时不做任何记录"""
+        if not cls.enabled:
+            yield None
+            return
+        stack = cls._stack()
+        span = Span(name, threading.get_ident(), len(stack))
+        stack.append(span)
+        error = False
+        try:
+            yield span
+        except BaseException:
+            error = True
+            raise
+        finally:
+            stack.pop()
+            span.finish(error)
+            cls._record(span)
+
+    @classmethod
+    def _stack(cls) -> List[Span]:
+        stack = getattr(cls._local, 'stack', None)
+        if stack is None:
+            stack = cls._local.stack = []
+        return stack
+
+    @classmethod
+    def _record(cls, span: Span) -> None:
+        with cls._lock:
+            cls._spans.append(span)
+            summary = cls._summary.get(span.name)
+            if summary is None:
+                summary = cls._summary[span.name] = SpanSummary()
+            summary.add(span)
+
+    @classmethod
+    def spans(cls) -> List[Span]:
+        """最近记录的 span，按结束时间排序"""
+        with cls._lock:
+            return list(cls._spans)
+
+    @classmethod
+    def summary(cls) -> Dict[str, Dict[str, Any]]:
+        """每个 span 名称的 count、errors、耗时 p50/p99/max（秒）与平均 com/property 调用次数"""
+        with cls._lock:
+            return {name: summary.to_dict() for name, summary in cls._summary.items()}
+
+    @classmethod
+    def slowest(cls, n: int = 10, name: str = None) -> List[Span]:
+        """最近记录中耗时最长的 n 个 span，可按名称过滤"""
+        spans = [s for s in cls.spans() if name is None or s.name == name]
+        return sorted(spans, key=lambda s: s.duration, reverse=True)[:n]
+
+    @classmethod
+    def export_chrome(cls, path: str = None) -> Dict[str, Any]:
+        """导出 Chrome trace-event 格式，指定 path 时同时写入文件"""
+        pid = os.getpid()
+        trace = {
+            'traceEvents': [span.to_event(cls._epoch, pid) for span in cls.spans()],
+            'displayTimeUnit': 'ms',
+        }
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(trace, f, ensure_ascii=False)
+        return trace
+
+
+def traced(func: Callable = None, *, name: str = None):
+    """追踪函数调用的装饰器，span 名称默认为 ``类名.函数名``
+
+    Examples:
+        >>> @traced
+        ... def send_msg(self, msg): ...
+
+        >>> @traced(name='Listener.tick')
+        ... def _get_listen_messages(self): ...
+    """
+    def decorator(f: Callable) -> Callable:
+        span_name = name or f.__qualname__
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if not Tracer.enabled:
+                return f(*args, **kwargs)
+            with Tracer.span(span_name):
+                return f(*args, **kwargs)
+        wrapper.__wrapped_traced__ = True
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def trace_methods(cls: type) -> type:
+    """追踪类中直接定义的所有公开方法（不含下划线开头的方法、属性与已追踪的方法）"""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith('_') or not callable(value) or isinstance(value, (type, staticmethod, classmethod)):
+            continue
+        if getattr(value, '__wrapped_traced__', False):
+            continue
+        setattr(cls, attr, traced(value, name=f'{cls.__name__}.{attr}'))
+    return cls
@@ -0,0 +1,167 @@
+"""等待 UI 状态出现的统一入口。
+
+:func:`wait_for` 反复调用判断函数直到返回真值或超时：
+
+- 两次判断之间的间隔从 ``WAIT_MIN_INTERVAL`` 开始按 ``WAIT_BACKOFF`` 倍数增长，最长 ``WAIT_MAX_INTERVAL``，
+  刚出现的窗口能很快被发现，等待时间较长时也不会空转占满 CPU；
+- ``window_event=True`` 时订阅当前 uia 后端的窗口显示事件（Windows 下为 WinEvent 钩子），
+  有新窗口显示就立即重新判断，不必等到下一次轮询；后端不支持时退回纯轮询；
+- 每个 ``name`` 记录等待次数、超时次数、判断次数以及从开始等待到条件成立的时间分布，
+  通过 :func:`wait_stats` 查看，例如微信菜单实际需要多久才会显示。
+"""
+
+from __future__ import annotations
+
+from wxauto4 import uia
+from wxauto4.param import WxParam
+from wxauto4.logger import wxlog
+from wxauto4.utils.lock import _percentile
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+import threading
+import time
+
+T = TypeVar('T')
+
+
+class WindowEvents:
+    """当前 uia 后端窗口显示事件的共享订阅，首次使用时订阅，后端切换后重新订阅"""
+
+    _cond = threading.Condition()
+    _backend = None
+    _token = None
+    _available = False
+    generation = 0
+
+    @classmethod
+    def _notify(cls, hwnd: int) -> None:
+        with cls._cond:
+            cls.generation += 1
+            cls._cond.notify_all()
+
+    @classmethod
+    def ensure(cls) -> bool:
+        """确保已订阅当前后端的窗口显示事件，返回后端是否支持"""
+        backend = uia.get_backend()
+        if cls._backend is backend:
+            return cls._available
+        with cls._cond:
+            if cls._backend is backend:
+                return cls._available
+            if cls._backend is not None and cls._token is not None:
+                try:
+                    cls._backend.RemoveWindowShownHandler(cls._token)
+                except Exception:
+                    pass
+            cls._token = None
+            try:
+                cls._token = backend.AddWindowShownHandler(cls._notify)
+                cls._available = True
+            except Exception as e:
+                wxlog.debug(f'订阅窗口显示事件失败，等待窗口时使用轮询：{e}')
+                cls._available = False
+            cls._backend = backend
+            return cls._available
+
+    @classmethod
+    def wait(cls, generation: int, timeout: float) -> None:
+        """在 timeout 秒内等待 generation 之后的下一个窗口显示事件"""
+        with cls._cond:
+            if cls.generation == generation:
+                cls._cond.wait(timeout)
+
+
+class WaitStats:
+    """单个等待点的统计"""
+
+    def __init__(self):
+        self.calls = 0
+        self.timeouts = 0
+        self.polls = 0
+        self.appear: Deque[float] = deque(maxlen=WxParam.LOCK_STATS_WINDOW)
+
+    def record(self, elapsed: float, polls: int, found: bool) -> None:
+        self.calls += 1
+        self.polls += polls
+        if found:
+            self.appear.append(elapsed)
+        else:
+            self.timeouts += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        appear = sorted(self.appear)
+        return {
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'avg_polls': self.polls / self.calls if self.calls else None,
+            'appear_p50': _percentile(appear, 50),
+            'appear_p99': _percentile(appear, 99),
+            'appear_max': appear[-1] if appear else None,
+        }
+
+
+_stats: Dict[str, WaitStats] = {}
+_stats_lock = threading.Lock()
+
+
+def wait_for(
+        predicate: Callable[[], T],
+        timeout: float,
+        backoff: float = None,
+        name: str = None,
+        window_event: bool = False,
+        min_interval: float = None,
+        max_interval: float = None
+    ) -> Optional[T]:
+    """等待 predicate() 返回真值
+
+    Args:
+        predicate: 判断函数，返回真值表示条件成立，抛出异常视为不成立
+        timeout: 最长等待时间，单位秒；至少会判断一次
+        backoff: 判断间隔的增长倍数，默认 WxParam.WAIT_BACKOFF
+        name: 统计名称，None 表示不记录统计
+        window_event: 有窗口显示时是否立即重新判断，用于等待新窗口、弹出菜单
+        min_interval: 初始判断间隔，默认 WxParam.WAIT_MIN_INTERVAL
+        max_interval: 最长判断间隔，默认 WxParam.WAIT_MAX_INTERVAL
+
+    Returns:
+        predicate 返回的真值，超时返回 None
+    """
+    backoff = WxParam.WAIT_BACKOFF if backoff is None else backoff
+    interval = WxParam.WAIT_MIN_INTERVAL if min_interval is None else min_interval
+    max_interval = WxParam.WAIT_MAX_INTERVAL if max_interval is None else max_interval
+    use_events = window_event and WxParam.WAIT_WINDOW_EVENTS and WindowEvents.ensure()
+    t0 = time.monotonic()
+    deadline = t0 + timeout
+    polls = 0
+    while True:
+        generation = WindowEvents.generation
+        polls += 1
+        try:
+            result = predicate()
+        except Exception:
+            result = None
+        now = time.monotonic()
+        if result or now >= deadline:
+            if name is not None:
+                with _stats_lock:
+                    stats = _stats.get(name) or _stats.setdefault(name, WaitStats())
+                    stats.record(now - t0, polls, bool(result))
+            return result or None
+        delay = min(interval, deadline - now)
+        if use_events:
+            WindowEvents.wait(generation, delay)
+        else:
+            time.sleep(delay)
+        interval = min(interval * backoff, max_interval)
+
+
+def wait_stats() -> Dict[str, Dict[str, Any]]:
+    """各等待点的统计：calls、timeouts、avg_polls 与条件成立耗时的 appear_p50/p99/max（秒）"""
+    with _stats_lock:
+        return {name: stats.to_dict() for name, stats in _stats.items()}
+
+
+def reset_wait_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
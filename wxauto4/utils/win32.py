@@ -2,23 +2,48 @@ import os
 import time
 import struct
 import shutil
-import win32ui
-import win32gui
-import win32api
-import win32con
-import win32process
-import win32clipboard
 import traceback
-import pyperclip
 import psutil
 import ctypes
+import threading
+from ctypes import wintypes
 from PIL import Image
 from wxauto4 import uia
+from wxauto4.param import WxParam
+from wxauto4.utils.lock import uilock
+from wxauto4.utils.cache import TTLCache
+from wxauto4.utils.wait import wait_for
+
+try:
+    import win32ui
+    import win32gui
+    import win32api
+    import win32con
+    import win32process
+    import win32clipboard
+except ImportError:
+    # 非 Windows 环境（如模拟后端）下 pywin32 不可用，窗口与剪贴板操作经由 uia 后端完成
+    win32ui = win32gui = win32api = win32con = win32process = win32clipboard = None
+
+if hasattr(ctypes, 'WINFUNCTYPE'):
+    _WNDENUMPROC = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_void_p)
+    _WINEVENTPROC = ctypes.WINFUNCTYPE(
+        None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+        wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+    )
+else:
+    _WNDENUMPROC = _WINEVENTPROC = None
+
+# 最近一次按相同条件枚举窗口的结果，WINDOW_SNAPSHOT_TTL 秒内的重复枚举直接复用
+_window_snapshots = TTLCache(64, WxParam.WINDOW_SNAPSHOT_TTL)
 
 def GetAllWindows(name=None, classname=None):
     """
     获取所有窗口的信息，返回一个列表，每个元素包含 (窗口句柄, 类名, 窗口标题)
     """
+    return uia.get_backend().GetAllWindows(name, classname)
+
+def _GetAllWindows(name=None, classname=None):
     windows = []
     
     def enum_windows_proc(hwnd, extra):
@@ -33,6 +58,112 @@ def GetAllWindows(name=None, classname=None):
         windows = [i for i in windows if i[1] == classname]
     return windows
 
+def EnumWindows(classname=None, name=None, pid=None, first=False, fresh=False):
+    """
+    按条件枚举顶层窗口，返回一个列表，每个元素包含 (窗口句柄, 类名, 窗口标题)
+
+    在枚举回调中过滤：先比较类名，类名符合（或未指定类名）时才按需读取进程 ID 与窗口标题，
+    first=True 时找到第一个符合条件的窗口就停止枚举。
+
+    相同条件在 WxParam.WINDOW_SNAPSHOT_TTL 秒内的重复调用直接返回上次的结果，fresh=True 时总是重新枚举。
+    """
+    key = (uia.get_backend(), classname, name, pid, first)
+    _window_snapshots.ttl = WxParam.WINDOW_SNAPSHOT_TTL
+    if not fresh and WxParam.WINDOW_SNAPSHOT_TTL > 0:
+        if (windows := _window_snapshots.get(key)) is not None:
+            return list(windows)
+    windows = uia.get_backend().EnumWindows(classname, name, pid, first)
+    if WxParam.WINDOW_SNAPSHOT_TTL > 0:
+        _window_snapshots.put(key, tuple(windows))
+    return windows
+
+def _EnumWindows(classname=None, name=None, pid=None, first=False):
+    user32 = ctypes.windll.user32
+    class_buf = ctypes.create_unicode_buffer(256)
+    title_buf = ctypes.create_unicode_buffer(512)
+    process_id = ctypes.c_ulong()
+    windows = []
+
+    def enum_windows_proc(hwnd, lparam):
+        if classname is not None:
+            user32.GetClassNameW(hwnd, class_buf, 256)
+            if class_buf.value != classname:
+                return True
+        if pid is not None:
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(process_id))
+            if process_id.value != pid:
+                return True
+        length = user32.GetWindowTextLengthW(hwnd)
+        if name is not None and length < len(name):
+            return True
+        if length >= len(title_buf):
+            buf = ctypes.create_unicode_buffer(length + 1)
+        else:
+            buf = title_buf
+        user32.GetWindowTextW(hwnd, buf, len(buf))
+        if name is not None and buf.value != name:
+            return True
+        if classname is None:
+            user32.GetClassNameW(hwnd, class_buf, 256)
+        windows.append((hwnd, class_buf.value, buf.value))
+        return not first
+
+    user32.EnumWindows(_WNDENUMPROC(enum_windows_proc), 0)
+    return windows
+
+class WinEventHook(threading.Thread):
+    """在独立线程中通过 SetWinEventHook 订阅窗口显示事件（EVENT_OBJECT_SHOW），
+    有窗口显示时在该线程中调用 callback(hwnd)
+
+    WINEVENT_OUTOFCONTEXT 的事件投递到安装钩子的线程，因此线程内需要运行消息循环。
+    """
+
+    EVENT_OBJECT_SHOW = 0x8002
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+
+    def __init__(self, callback):
+        super().__init__(name='wxauto4-winevent', daemon=True)
+        self.callback = callback
+        self._thread_id = None
+        self._hooked = False
+        self._ready = threading.Event()
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, thread, timestamp):
+        if id_object == self.OBJID_WINDOW and hwnd:
+            try:
+                self.callback(hwnd)
+            except:
+                pass
+
+    def run(self):
+        user32 = ctypes.windll.user32
+        proc = _WINEVENTPROC(self._on_event)
+        hook = user32.SetWinEventHook(
+            self.EVENT_OBJECT_SHOW, self.EVENT_OBJECT_SHOW, 0, proc, 0, 0, self.WINEVENT_OUTOFCONTEXT
+        )
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        self._hooked = bool(hook)
+        self._ready.set()
+        if not hook:
+            return
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def start(self):
+        super().start()
+        self._ready.wait()
+        if not self._hooked:
+            raise OSError('SetWinEventHook 失败')
+
+    def stop(self):
+        if self._thread_id is not None and self.is_alive():
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
 def GetCursorWindow():
     x, y = win32api.GetCursorPos()
     hwnd = win32gui.WindowFromPoint((x, y))
@@ -135,15 +266,15 @@ def GetAllWindowExs(HWND):
     return handles
 
 def FindWindow(classname=None, name=None, timeout=0) -> int:
-    t0 = time.time()
-    while True:
-        HWND = win32gui.FindWindow(classname, name)
-        if HWND:
-            break
-        if time.time() - t0 > timeout:
-            break
-        time.sleep(0.01)
-    return HWND
+    backend = uia.get_backend()
+    if not timeout:
+        return backend.FindWindow(classname, name)
+    return wait_for(
+        lambda: backend.FindWindow(classname, name),
+        timeout,
+        name=f'FindWindow({classname})',
+        window_event=True
+    ) or 0
 
 def FindTopLevelControl(classname=None, name=None, timeout=3):
     hwnd = FindWindow(classname, name, timeout)
@@ -194,6 +325,9 @@ def ClipboardFormats(unit=0, *units):
     return units
 
 def ReadClipboardData():
+    return uia.get_backend().ReadClipboardData()
+
+def _ReadClipboardData():
     Dict = {}
     formats = ClipboardFormats()
 
@@ -216,7 +350,11 @@ def ReadClipboardData():
     return Dict
 
 
+@uilock
 def SetClipboardData(data_dict):
+    uia.get_backend().SetClipboardData(data_dict)
+
+def _SetClipboardData(data_dict):
     try:
         # 打开剪贴板
         win32clipboard.OpenClipboard()
@@ -245,8 +383,9 @@ def SetClipboardData(data_dict):
         except:
             pass
 
+@uilock
 def SetClipboardText(text: str):
-    pyperclip.copy(text)
+    uia.get_backend().SetClipboardText(text)
 
 
 class DROPFILES(ctypes.Structure):
@@ -341,8 +480,9 @@ def set_files_to_clipboard(file_paths):
         except:
             pass
 
+@uilock
 def SetClipboardFiles(paths):
-    set_files_to_clipboard(paths)
+    return uia.get_backend().SetClipboardFiles(paths)
 
 def PasteFile(folder):
     folder = os.path.realpath(folder)
@@ -401,9 +541,10 @@ def is_window_visible(hwnd):
     return False
 
 def get_windows_by_pid(pid):
+    backend = uia.get_backend()
     while True:
         try:
-            windows = enum_windows_by_pid(pid)
+            windows = backend.GetWindowsByPid(pid)
             return windows
         except :
             time.sleep(0.1)
\ No newline at end of file
@@ -3,7 +3,11 @@ from wxauto4.ui import WeChatMainWnd, WeChatSubWnd
 from wxauto4.logger import wxlog
 from wxauto4.param import WxParam, WxResponse, PROJECT_NAME
 from wxauto4.utils import GetAllWindows, uilock
+from wxauto4.utils.lock import LockManager
 from wxauto4.utils.tools import delete_update_files
+from wxauto4.utils.events import EventSource, UIAEventSource
+from wxauto4.utils.scheduler import ListenScheduler
+from wxauto4.utils.trace import trace_methods, traced
 from wxauto4.moment import Moment
 from concurrent.futures import ThreadPoolExecutor
 from abc import ABC, abstractmethod
@@ -20,36 +24,146 @@ from typing import (
     Dict,
     Literal,
     Optional,
+    Set,
 )
 if TYPE_CHECKING:
     from wxauto4.msgs.base import Message
     from wxauto4.ui.sessionbox import SessionElement
 
 class Listener(ABC):
-    def _listener_start(self):
+    def _listener_start(self, event_source: Optional[EventSource] = None):
+        """启动监听线程
+
+        Args:
+            event_source: 消息列表变化事件源，默认由 :meth:`_listener_create_event_source` 按 LISTEN_MODE 创建；
+                传入 SyntheticEventSource 等事件源时按事件模式调度，可用于测试
+        """
         wxlog.debug('开始监听')
         self._listener_is_listening = True
         self._listener_messages = {}
         self._lock = threading.RLock()
         self._listener_stop_event = threading.Event()
+        self._listener_events = self._listener_create_event_source() if event_source is None else event_source
+        self._listener_scheduler = ListenScheduler()
+        self._listener_fingerprints = {}
+        self._listener_next_full_scan = 0
+        for who, (chat, _) in getattr(self, 'listen', {}).copy().items():
+            self._listener_subscribe(who, chat._api._chat_api.msgbox)
         self._listener_thread = threading.Thread(target=self._listener_listen, daemon=True)
         self._listener_thread.start()
 
+    def _listener_create_event_source(self) -> Optional[EventSource]:
+        """创建监听使用的事件源，None 表示不使用事件（轮询或会话模式），子类可重写"""
+        if WxParam.LISTEN_MODE == 'event':
+            return UIAEventSource()
+        return None
+
     def _listener_listen(self):
         self._excutor = ThreadPoolExecutor(max_workers=WxParam.LISTENER_EXCUTOR_WORKERS)
         if not hasattr(self, 'listen') or not self.listen:
             self.listen = {}
+        with LockManager.priority(WxParam.LISTENER_LOCK_PRIORITY):
+            self._listener_loop()
+
+    def _listener_loop(self):
         while not self._listener_stop_event.is_set():
             delete_update_files()
             try:
-                self._get_listen_messages()
+                whos = self._listener_wait()
+                if self._listener_stop_event.is_set():
+                    break
+                if whos is None or whos:
+                    self._get_listen_messages(whos)
             except KeyboardInterrupt:
                 wxlog.debug("监听消息终止")
                 self._listener_stop()
                 break
             except:
                 wxlog.debug(f'监听消息失败：{traceback.format_exc()}')
-            time.sleep(WxParam.LISTEN_INTERVAL)
+
+    def _listener_wait(self) -> Optional[Set[str]]:
+        """等待下一轮扫描，返回需要扫描的监听对象，None 表示全部扫描
+
+        需要轮询的对象（轮询模式下的全部对象、事件模式下无法订阅事件的对象）由 ListenScheduler 按各自的间隔调度；
+        事件模式还会等待消息列表变化事件，收到事件的对象在 LISTEN_HOT_PERIOD 内临时快速轮询，
+        并每隔 LISTEN_FALLBACK_INTERVAL 全量扫描一次
+        """
+        events = self._listener_events
+        scheduler = self._listener_scheduler
+        if WxParam.LISTEN_MODE == 'session':
+            return self._listener_wait_session()
+        if events is None:
+            return scheduler.wait(WxParam.LISTEN_MAX_INTERVAL)
+        now = time.monotonic()
+        remain = self._listener_next_full_scan - now
+        if remain <= 0:
+            self._listener_next_full_scan = now + WxParam.LISTEN_FALLBACK_INTERVAL
+            return None
+        poll_wait = scheduler.time_to_next(now)
+        timeout = remain if poll_wait is None else min(remain, poll_wait)
+        whos = events.wait(timeout, WxParam.LISTEN_EVENT_DEBOUNCE)
+        self._listener_touch(whos)
+        return whos | scheduler.due()
+
+    def _listener_wait_session(self) -> Optional[Set[str]]:
+        """会话列表模式：每隔 LISTEN_INTERVAL 读取一次会话列表，只返回指纹发生变化的监听对象
+
+        不在会话列表中（被挤出可见区域）的对象交给调度器轮询，指纹变化的对象在 LISTEN_HOT_PERIOD 内临时快速轮询，
+        并每隔 LISTEN_FALLBACK_INTERVAL 全量扫描一次
+        """
+        scheduler = self._listener_scheduler
+        now = time.monotonic()
+        if self._listener_next_full_scan - now <= 0:
+            self._listener_next_full_scan = now + WxParam.LISTEN_FALLBACK_INTERVAL
+            return None
+        self._listener_stop_event.wait(WxParam.LISTEN_INTERVAL)
+        try:
+            fingerprints = self._get_session_fingerprints()
+        except Exception as e:
+            wxlog.debug(f'读取会话列表失败，本轮全量扫描：{e}')
+            return None
+        changed = set()
+        for who in list(getattr(self, 'listen', {})):
+            fingerprint = fingerprints.get(who)
+            if fingerprint is None:
+                scheduler.add(who)
+                continue
+            scheduler.release(who)
+            previous = self._listener_fingerprints.get(who)
+            if previous != fingerprint:
+                self._listener_fingerprints[who] = fingerprint
+                changed.add(who)
+                if previous is not None:
+                    # 第一次读到的指纹不算活动
+                    self._listener_touch({who})
+        return changed | scheduler.due()
+
+    def _listener_touch(self, whos: Set[str]) -> None:
+        """收到事件或会话指纹变化的监听对象回到快速轮询，不在调度中的临时加入"""
+        listen = getattr(self, 'listen', {})
+        for who in whos:
+            if who in listen:
+                self._listener_scheduler.touch(who, add=True)
+
+    def _listener_subscribe(self, who: str, control) -> None:
+        """订阅监听对象消息列表的变化事件，订阅失败或轮询模式下交给调度器轮询"""
+        events = getattr(self, '_listener_events', None)
+        if events is None or not events.subscribe(who, control):
+            self._listener_scheduler.add(who)
+
+    def _listener_unsubscribe(self, who: str) -> None:
+        scheduler = getattr(self, '_listener_scheduler', None)
+        if scheduler is not None:
+            scheduler.remove(who)
+        events = getattr(self, '_listener_events', None)
+        if events is not None:
+            events.unsubscribe(who)
+
+    def _listener_record(self, who: str, got_messages: bool) -> None:
+        """记录一次扫描结果，调整该对象的轮询间隔"""
+        scheduler = getattr(self, '_listener_scheduler', None)
+        if scheduler is not None:
+            scheduler.record(who, got_messages)
 
     def _safe_callback(
             self, 
@@ -58,20 +172,32 @@ class Listener(ABC):
             chat: 'Chat'
         ):
         try:
-            callback(msg, chat)
+            # 回调中的回复与监听扫描同样优先于普通调用获取 UI 锁
+            with LockManager.priority(WxParam.LISTENER_LOCK_PRIORITY):
+                callback(msg, chat)
         except Exception as e:
             wxlog.debug(f"监听消息回调发生错误：{traceback.format_exc()}")
 
     def _listener_stop(self):
         self._listener_is_listening = False
         self._listener_stop_event.set()
+        self._listener_scheduler.close()
+        if self._listener_events is not None:
+            self._listener_events.close()
         self._listener_thread.join()
         self._excutor.shutdown(wait=True)
 
     @abstractmethod
-    def _get_listen_messages(self):
+    def _get_listen_messages(self, whos: Optional[Set[str]] = None):
+        """扫描监听对象的新消息，whos 为 None 时扫描全部"""
+        ...
+
+    @abstractmethod
+    def _get_session_fingerprints(self) -> Dict[str, tuple]:
+        """读取一次会话列表，返回 会话名称 -> 指纹"""
         ...
 
+@trace_methods
 class Chat:
     """微信聊天窗口实例"""
 
@@ -165,6 +291,7 @@ class Chat:
         """
         return self._api.send_files(filepath, who, exact)
     
+    @uilock(read=True)
     def GetAllMessage(self) -> List['Message']:
         """获取当前聊天窗口的所有消息
         
@@ -173,6 +300,7 @@ class Chat:
         """
         return self._api.get_msgs()
     
+    @uilock(read=True)
     def GetNewMessage(self) -> List['Message']:
         """获取当前聊天窗口的新消息
 
@@ -185,20 +313,23 @@ class Chat:
         # 使用窗口标题而不是 ChatInfo()，避免触发点击操作
         if (_last_chat := self.who) != self._last_chat:
             self._last_chat = _last_chat
-            self._api._chat_api._update_used_msg_ids()
+            self._api._chat_api._reset_msg_cursor()
             return []
         return self._api.get_new_msgs()
 
+    @uilock(read=True)
     def GetMessageById(self, msg_id) -> Optional['Message']:
         """根据消息 runtime id 获取消息实例"""
 
         return self._api.get_msg_by_id(msg_id)
 
+    @uilock(read=True)
     def GetMessageByHash(self, msg_hash: str) -> Optional['Message']:
         """根据消息哈希值获取消息实例"""
 
         return self._api.get_msg_by_hash(msg_hash)
 
+    @uilock(read=True)
     def GetLastMessage(self) -> Optional['Message']:
         """获取当前聊天窗口的最后一条消息"""
 
@@ -208,6 +339,7 @@ class Chat:
         """关闭微信窗口"""
         self._api.close()
 
+@trace_methods
 class WeChat(Chat, Listener):
     """微信主窗口实例"""
 
@@ -236,43 +368,60 @@ class WeChat(Chat, Listener):
             wxlog.set_debug(True)
             wxlog.debug('Debug mode is on')
         
-    def _get_listen_messages(self):
-        """获取监听消息（优化版：增强错误处理和稳定性）"""
+    @traced(name='Listener.tick')
+    def _get_listen_messages(self, whos: Optional[Set[str]] = None):
+        """获取监听消息（优化版：增强错误处理和稳定性）
+        
+        Args:
+            whos: 需要扫描的监听对象，None 表示全部扫描（事件模式下只扫描发生变化的对象）
+        """
         try:
             sys.stdout.flush()
         except:
             pass
         temp_listen = self.listen.copy()
         for who in temp_listen:
+            if whos is not None and who not in whos:
+                continue
             chat, callback = temp_listen.get(who, (None, None))
+            got_messages = False
             try:
-                # 检查聊天窗口是否存在
-                if chat is None:
-                    self.RemoveListenChat(who)
-                    continue
-                # 检查窗口是否仍然有效
-                if not chat._api.exists(0):
-                    self.RemoveListenChat(who)
-                    continue
-            except Exception as e:
-                # 如果检查失败，尝试移除该监听
-                try:
-                    self.RemoveListenChat(who)
-                except:
-                    pass
-                continue
-            
-            # 获取新消息
+                got_messages = self._listener_scan(who, chat, callback)
+            finally:
+                # 无论扫描是否成功都安排下次到期时间，否则到期时间停留在过去，调度器会不停地立即返回
+                self._listener_record(who, got_messages)
+
+    def _listener_scan(self, who: str, chat: 'Chat', callback) -> bool:
+        """扫描单个监听对象的新消息并提交回调，返回是否获取到新消息"""
+        try:
+            # 检查聊天窗口是否存在
+            if chat is None:
+                self.RemoveListenChat(who)
+                return False
+            # 检查窗口是否仍然有效
+            if not chat._api.exists(0):
+                self.RemoveListenChat(who)
+                return False
+        except Exception as e:
+            # 如果检查失败，尝试移除该监听
             try:
-                with self._lock:
-                    msgs = chat.GetNewMessage()
-                    for msg in msgs:
-                        wxlog.debug(f"[{msg.attr}]获取到新消息：{who} - {msg.content}")
-                        self._excutor.submit(self._safe_callback, callback, msg, chat)
-            except Exception as e:
-                # 获取消息失败，记录但不中断监听
-                wxlog.debug(f"获取 {who} 的新消息失败: {e}")
-                continue
+                self.RemoveListenChat(who)
+            except:
+                pass
+            return False
+        
+        # 获取新消息
+        try:
+            with self._lock:
+                msgs = chat.GetNewMessage()
+                for msg in msgs:
+                    wxlog.debug(f"[{msg.attr}]获取到新消息：{who} - {msg.content}")
+                    self._excutor.submit(self._safe_callback, callback, msg, chat)
+                return bool(msgs)
+        except Exception as e:
+            # 获取消息失败，记录但不中断监听
+            wxlog.debug(f"获取 {who} 的新消息失败: {e}")
+            return False
 
     @property
     def path(self):
@@ -292,6 +441,11 @@ class WeChat(Chat, Listener):
                 self.StopListening(True)
                 break
     
+    @uilock(read=True)
+    def _get_session_fingerprints(self) -> Dict[str, tuple]:
+        return self._api._session_api.get_session_fingerprints()
+
+    @uilock(read=True)
     def GetSession(self) -> List['SessionElement']:
         """获取当前会话列表
 
@@ -372,22 +526,27 @@ class WeChat(Chat, Listener):
             return WxResponse.failure('找不到聊天窗口')
         name = subwin.nickname
         chat = Chat(subwin)
-        chatbox_id = chat._api._chat_api.id if hasattr(chat._api, '_chat_api') and chat._api._chat_api else None
-        if chatbox_id:
-            from wxauto4.ui.chatbox import USED_MSG_IDS, LAST_MSG_COUNT
+        if hasattr(chat._api, '_chat_api') and chat._api._chat_api:
             try:
-                msg_controls = chat._api._chat_api.msgbox.GetChildren()
-                msg_controls = [c for c in msg_controls if c.ControlTypeName == 'ListItemControl']
-                current_msg_count = len(msg_controls)
-                all_msg_ids = tuple((i.runtimeid for i in msg_controls))
-                USED_MSG_IDS[chatbox_id] = all_msg_ids[-100:] if len(all_msg_ids) > 100 else all_msg_ids
-                LAST_MSG_COUNT[chatbox_id] = current_msg_count
+                chat._api._chat_api._reset_msg_cursor()
             except:
-                USED_MSG_IDS[chatbox_id] = tuple()
-                LAST_MSG_COUNT[chatbox_id] = 0
+                pass
         self.listen[name] = (chat, callback)
+        self._listener_subscribe(name, chat._api._chat_api.msgbox)
         return chat
     
+    def GetListenStats(self) -> Dict[str, dict]:
+        """获取轮询中的监听对象的调度统计
+
+        Returns:
+            Dict[str, dict]: 监听对象 -> {'interval': 当前轮询间隔, 'avg_interval': 平均轮询间隔,
+                'polls': 轮询次数, 'hits': 获取到新消息的次数, 'hints': 活动提示次数}
+        """
+        scheduler = getattr(self, '_listener_scheduler', None)
+        if scheduler is None:
+            return {}
+        return scheduler.stats()
+
     def StopListening(self, remove: bool = True) -> None:
         """停止监听
         
@@ -401,9 +560,16 @@ class WeChat(Chat, Listener):
             for who in listen:
                 self.RemoveListenChat(who)
 
-    def StartListening(self) -> None:
-        if not self._listener_thread.is_alive():
-            self._listener_start()
+    def StartListening(self, event_source: EventSource = None) -> None:
+        """开始监听
+
+        Args:
+            event_source (EventSource, optional): 消息列表变化事件源，默认按 WxParam.LISTEN_MODE 创建；
+                传入 SyntheticEventSource 后由调用方 notify 注入事件
+        """
+        thread = getattr(self, '_listener_thread', None)
+        if thread is None or not thread.is_alive():
+            self._listener_start(event_source)
 
     @uilock
     def RemoveListenChat(
@@ -423,6 +589,11 @@ class WeChat(Chat, Listener):
         if nickname not in self.listen:
             return WxResponse.failure('未找到监听对象')
         chat, _ = self.listen[nickname]
+        self._listener_unsubscribe(nickname)
+        try:
+            chat._api._chat_api._drop_msg_cursor()
+        except:
+            pass
         if close_window:
             chat.Close()
         del self.listen[nickname]